@@ -4,10 +4,18 @@ const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
 // -------------------- PUBLIC API FUNCTIONS --------------------
 
+// Every post: BlogPage filters by category on the client, so follow `next` to the last page
 export async function getBlogPosts() {
-  const res = await fetch(`${API_BASE}/api/blog/posts/`);
-  if (!res.ok) throw new Error('Failed to fetch blog posts');
-  return await res.json();
+  const posts = [];
+  let url = `${API_BASE}/api/blog/posts/?page_size=50`;
+  while (url) {
+    const res = await fetch(url);
+    if (!res.ok) throw new Error('Failed to fetch blog posts');
+    const data = await res.json();
+    posts.push(...data.results);
+    url = data.next;
+  }
+  return posts;
 }
 
 export async function getFaqCategories() {
@@ -114,8 +122,12 @@ export async function getCurrentUser() {
 
 // -------------------- DOCTOR/ADMIN SECURE FUNCTIONS (COOKIES) --------------------
 
-export async function getPatients() {
-  const res = await fetch(`${API_BASE}/api/patients/patients/`, {
+// A page of patients, newest first, or the best matches for `query` (name, username, email or phone).
+// Returns { count, next, results }: pass `next` back as `pageUrl` for the following page;
+// `count` (all patients) only comes with the first page.
+export async function getPatients(query = '', pageUrl = null) {
+  const params = query ? `?q=${encodeURIComponent(query)}` : '';
+  const res = await fetch(pageUrl || `${API_BASE}/api/patients/patients/${params}`, {
     credentials: 'include',
   });
   if (res.status === 401 || res.status === 403) {
@@ -125,6 +137,15 @@ export async function getPatients() {
   return await res.json();
 }
 
+// One patient's full record: history, prescriptions and appointments
+export async function getPatient(id) {
+  const res = await fetch(`${API_BASE}/api/patients/patients/${id}/`, {
+    credentials: 'include',
+  });
+  if (!res.ok) throw new Error('Failed to fetch patient');
+  return await res.json();
+}
+
 export async function createHistoryEntry(historyData) {
   const res = await fetch(`${API_BASE}/api/patients/history/`, {
     method: 'POST',
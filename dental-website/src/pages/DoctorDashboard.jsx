@@ -11,6 +11,7 @@ const formatDate = (d) => {
 
 const DoctorDashboard = () => {
   const [patients, setPatients] = useState([]);
+  const [patientCount, setPatientCount] = useState(0);
   const [appointments, setAppointments] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -20,7 +21,8 @@ const DoctorDashboard = () => {
     setError(null);
     try {
       const [patientData, appointmentData] = await Promise.all([getPatients(), getAppointments()]);
-      setPatients(patientData);
+      setPatients(patientData.results);
+      setPatientCount(patientData.count);
       setAppointments(appointmentData);
     } catch (err) {
       setError(err.message);
@@ -39,7 +41,7 @@ const DoctorDashboard = () => {
   const stats = [
     {
       label: 'Total Patients',
-      value: patients.length,
+      value: patientCount,
       icon: <FiUsers />,
       bg: 'bg-blue-50',
       iconBg: 'bg-blue-100',
@@ -161,7 +163,7 @@ const DoctorDashboard = () => {
             <div className="flex justify-between items-center p-6 border-b border-gray-100">
               <h2 className="font-semibold text-gray-800 flex items-center gap-2">
                 <FiUsers className="text-blue-500" /> Patients
-                <span className="bg-blue-100 text-blue-700 text-xs font-bold px-2 py-0.5 rounded-full">{patients.length}</span>
+                <span className="bg-blue-100 text-blue-700 text-xs font-bold px-2 py-0.5 rounded-full">{patientCount}</span>
               </h2>
               <Link to="/patients" className="text-blue-600 text-sm font-medium flex items-center gap-1 hover:underline">
                 View all <FiArrowRight />
@@ -180,7 +182,7 @@ const DoctorDashboard = () => {
                       <p className="font-medium text-gray-800 text-sm truncate">
                         {patient.user?.first_name} {patient.user?.last_name}
                       </p>
-                      <p className="text-xs text-gray-400">@{patient.user?.username} · {patient.history?.length || 0} visits</p>
+                      <p className="text-xs text-gray-400">@{patient.user?.username}</p>
                     </div>
                     <p className="text-xs text-gray-400 flex-shrink-0">{formatDate(patient.added_date)}</p>
                   </div>
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import StaffLayout from '../components/StaffLayout';
-import { getPatients, createHistoryEntry, createPrescription } from '../api';
+import { getPatients, getPatient, createHistoryEntry, createPrescription } from '../api';
 import { FiUser, FiSearch, FiFileText, FiCalendar, FiPlus, FiX, FiRefreshCw } from 'react-icons/fi';
 import { FaTooth } from 'react-icons/fa';
 
@@ -35,7 +35,10 @@ const PATIENT_TABS = ['Overview', 'History', 'Prescriptions', 'Appointments'];
 
 const PatientsPage = () => {
   const [patients, setPatients] = useState([]);
+  const [patientCount, setPatientCount] = useState(0);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [search, setSearch] = useState('');
   const [selected, setSelected] = useState(null);
   const [activeTab, setActiveTab] = useState('Overview');
@@ -48,26 +51,57 @@ const PatientsPage = () => {
 
   const [saving, setSaving] = useState(false);
 
+  // The server searches name, username, email and phone; the list only holds the matches.
+  // Without a search the list is paged: "Load more" follows the page's `next` link.
+  const loadFirstPage = useCallback(async () => {
+    const data = await getPatients(search.trim());
+    setPatients(data.results);
+    setPatientCount(data.count);
+    setNextPage(data.next);
+  }, [search]);
+
   const fetchData = useCallback(async () => {
     setLoading(true);
     try {
-      const data = await getPatients();
-      setPatients(data);
-      if (selected) {
-        const updated = data.find(p => p.id === selected.id);
-        if (updated) setSelected(updated);
-      }
+      await loadFirstPage();
+      if (selected) setSelected(await getPatient(selected.id));
     } finally {
       setLoading(false);
     }
-  }, [selected?.id]);
+  }, [loadFirstPage, selected?.id]);
+
+  useEffect(() => {
+    const timer = setTimeout(async () => {
+      setLoading(true);
+      try {
+        await loadFirstPage();
+      } finally {
+        setLoading(false);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [loadFirstPage]);
 
-  useEffect(() => { fetchData(); }, []);
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getPatients('', nextPage);
+      setPatients(prev => [...prev, ...data.results]);
+      setNextPage(data.next);
+    } catch (err) {
+      alert(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
-  const filtered = patients.filter(p => {
-    const name = `${p.user?.first_name} ${p.user?.last_name} ${p.user?.username}`.toLowerCase();
-    return name.includes(search.toLowerCase());
-  });
+  const selectPatient = async (patient) => {
+    setSelected(patient);
+    setActiveTab('Overview');
+    setAddingHistory(false);
+    setAddingPrescForRecord(null);
+    setSelected(await getPatient(patient.id));
+  };
 
   const allPrescriptions = (selected?.history || [])
     .flatMap(r => (r.prescriptions || []).map(p => ({
@@ -84,9 +118,7 @@ const PatientsPage = () => {
       await createHistoryEntry({ patient: selected.id, ...historyForm });
       setHistoryForm({ notes: '', treatment_provided: '' });
       setAddingHistory(false);
-      const data = await getPatients();
-      setPatients(data);
-      setSelected(data.find(p => p.id === selected.id));
+      setSelected(await getPatient(selected.id));
     } catch (err) {
       alert(err.message);
     } finally {
@@ -101,9 +133,7 @@ const PatientsPage = () => {
       await createPrescription({ history_entry: addingPrescForRecord, ...prescForm });
       setPrescForm({ medicine_name: '', dosage: '', instructions: '' });
       setAddingPrescForRecord(null);
-      const data = await getPatients();
-      setPatients(data);
-      setSelected(data.find(p => p.id === selected.id));
+      setSelected(await getPatient(selected.id));
     } catch (err) {
       alert(err.message);
     } finally {
@@ -119,7 +149,7 @@ const PatientsPage = () => {
         <div className="w-72 flex-shrink-0 bg-white border-r border-gray-200 flex flex-col overflow-hidden">
           <div className="p-4 border-b border-gray-100">
             <div className="flex justify-between items-center mb-3">
-              <h2 className="font-semibold text-gray-800 text-sm">Patients ({patients.length})</h2>
+              <h2 className="font-semibold text-gray-800 text-sm">Patients ({patientCount})</h2>
               <button onClick={fetchData} disabled={loading} className="text-gray-400 hover:text-gray-600">
                 <FiRefreshCw size={14} className={loading ? 'animate-spin' : ''} />
               </button>
@@ -128,7 +158,7 @@ const PatientsPage = () => {
               <FiSearch className="absolute left-3 top-1/2 -translate-y-1/2 text-gray-400 text-sm" />
               <input
                 type="text"
-                placeholder="Search by name..."
+                placeholder="Search by name, email or phone..."
                 value={search}
                 onChange={e => setSearch(e.target.value)}
                 className="w-full pl-9 pr-3 py-2 border border-gray-200 rounded-lg text-sm focus:outline-none focus:ring-2 focus:ring-blue-500"
@@ -139,13 +169,13 @@ const PatientsPage = () => {
           <div className="flex-1 overflow-y-auto">
             {loading ? (
               <p className="text-gray-400 text-sm text-center py-8">Loading...</p>
-            ) : filtered.length === 0 ? (
+            ) : patients.length === 0 ? (
               <p className="text-gray-400 text-sm text-center py-8">No patients found.</p>
             ) : (
-              filtered.map(patient => (
+              patients.map(patient => (
                 <button
                   key={patient.id}
-                  onClick={() => { setSelected(patient); setActiveTab('Overview'); setAddingHistory(false); setAddingPrescForRecord(null); }}
+                  onClick={() => selectPatient(patient)}
                   className={`w-full flex items-center gap-3 p-4 text-left border-b border-gray-50 transition-colors ${
                     selected?.id === patient.id
                       ? 'bg-blue-50 border-l-4 border-l-blue-900'
@@ -160,11 +190,20 @@ const PatientsPage = () => {
                       {patient.user?.first_name} {patient.user?.last_name}
                     </p>
                     <p className="text-xs text-gray-400">@{patient.user?.username}</p>
-                    <p className="text-xs text-gray-400 mt-0.5">{patient.history?.length || 0} visits</p>
+                    {patient.phone && <p className="text-xs text-gray-400 mt-0.5">{patient.phone}</p>}
                   </div>
                 </button>
               ))
             )}
+            {!loading && nextPage && (
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="w-full py-3 text-sm font-medium text-blue-600 hover:bg-gray-50 disabled:text-gray-400"
+              >
+                {loadingMore ? 'Loading...' : `Load more (${patients.length} of ${patientCount})`}
+              </button>
+            )}
           </div>
         </div>
 
@@ -0,0 +1,50 @@
+"""
+Shared setup for the scripts in this directory.
+
+Importing this module boots Django with the project settings. Use
+``test_database()`` to run against a throwaway copy of the configured
+database (the same one ``manage.py test`` would create), so benchmarks never
+touch real data.
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dental_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(fn, repeat=1000):
+    """Calls ``fn`` ``repeat`` times and returns per-call timings in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def report(label, timings, unit='us'):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f'{label:<40} n={len(timings):<7} mean={statistics.fmean(timings):10.1f}{unit} '
+          f'p50={timings[len(timings) // 2]:10.1f}{unit} p99={p99:10.1f}{unit}')
@@ -0,0 +1,69 @@
+"""
+Helpers for benchmarks that run against a real HTTP server.
+
+``serve()`` starts gunicorn with extra environment variables and waits for it
+to answer (``app=None`` leaves the choice of application to gunicorn.conf.py).
+``hammer()`` fires requests from a thread pool and returns per-request
+latencies in milliseconds. Only the standard library is used on the client side.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(env=None, args=(), app='dental_backend.wsgi:application', startup_timeout=30):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', *args]
+    if app:
+        command.append(app)
+    process = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                urllib.request.urlopen(base_url + '/', timeout=1).read()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('server failed to start:\n' + process.stderr.read().decode()[-2000:])
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def _timed_get(url, headers=None):
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=30) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def hammer(url, requests=500, concurrency=8, warmup=20, headers=None):
+    """Returns (latencies in ms, wall-clock seconds)."""
+    for _ in range(warmup):
+        _timed_get(url, headers)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: _timed_get(url, headers), range(requests)))
+    return latencies, time.perf_counter() - started
@@ -0,0 +1,51 @@
+"""
+Load test: per-request database connections vs persistent connections vs a pool.
+
+    DB_ENGINE=django.db.backends.postgresql DB_NAME=... DB_USER=... DB_PASSWORD=... \\
+        python benchmarks/bench_db_connections.py [--requests 1000] [--concurrency 8]
+
+Run it against a local PostgreSQL (the schema must be migrated). For each
+mode the script starts gunicorn with that DB_* configuration and hammers an
+endpoint that makes one uncached query (/api/reviews/stats/ by default).
+The "pool" mode is skipped unless psycopg 3 with the pool extra is installed.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+from _harness import report
+from _load import hammer, serve
+
+MODES = [
+    ('connect per request', {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'}),
+    ('persistent (CONN_MAX_AGE=60)', {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'False'}),
+    ('psycopg pool', {'DB_POOL': 'True'}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--path', default='/api/reviews/stats/')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    if os.environ.get('DB_ENGINE') != 'django.db.backends.postgresql':
+        sys.exit('Set DB_ENGINE=django.db.backends.postgresql and the DB_* variables for a local PostgreSQL.')
+
+    server_args = ['--workers', str(args.workers), '--threads', str(args.threads)]
+    for label, env in MODES:
+        if env.get('DB_POOL') == 'True' and not importlib.util.find_spec('psycopg_pool'):
+            print(f'{label:<40} skipped (pip install "psycopg[binary,pool]")')
+            continue
+        with serve(env=env, args=server_args) as base_url:
+            latencies, elapsed = hammer(base_url + args.path, args.requests, args.concurrency)
+        report(label, latencies, 'ms')
+        print(f'{"":<40} {args.requests / elapsed:.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Checks that the streaming export's memory stays flat as the table grows.
+
+    python benchmarks/bench_export.py [--sizes 1000 100000 1000000]
+
+For each size, appointments are bulk-loaded into a throwaway database. The
+export generator is then consumed the way StreamingHttpResponse does, and
+the peak Python heap (tracemalloc) and throughput are reported.
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date, time as clock, timedelta
+
+from _harness import test_database
+
+
+def load(count, have, patient, batch_size=10_000):
+    from patients.models import Appointment
+
+    start_day = date(2020, 1, 1)
+    for start in range(have, count, batch_size):
+        Appointment.objects.bulk_create([
+            Appointment(patient=patient, service_requested='Cleaning', status='COMPLETED',
+                        appointment_date=start_day + timedelta(days=i // 16),
+                        appointment_time=clock(9 + i % 16 // 2, 30 * (i % 2)),
+                        notes=f'Imported appointment {i}, routine scale and polish')
+            for i in range(start, min(count, start + batch_size))
+        ])
+
+
+def consume(chunks):
+    total = 0
+    for chunk in chunks:
+        total += len(chunk.encode())
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with test_database():
+        from django.contrib.auth.models import User
+        from patients.export import export
+
+        patient = User.objects.create_user(username='bench-export').patient_profile
+        have = 0
+        for size in sorted(args.sizes):
+            load(size, have, patient)
+            have = size
+            for fmt in ('csv', 'ndjson'):
+                tracemalloc.start()
+                began = time.perf_counter()
+                written = consume(export('appointments', fmt))
+                elapsed = time.perf_counter() - began
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f'{size:>9} rows {fmt:<6} {written / 2**20:8.1f}MB out  '
+                      f'peak heap {peak / 2**20:6.2f}MB  {size / elapsed:9.0f} rows/s (traced)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures ``manage.py import_records`` throughput on a generated legacy export.
+
+    python benchmarks/bench_import.py [--patients 100000] [--visits 250000] [--prescriptions 150000]
+
+The defaults make a 500k-row fixture (CSV patients, NDJSON visits and CSV
+prescriptions) in a temporary directory. It is imported into a throwaway
+database, and rows/s is reported per dataset. A second run of the same
+files shows the cost of resuming, when everything is skipped. For
+comparison, ``--baseline`` patients are also created the old way, one
+create_user() (with its post_save signals) at a time.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+
+from _harness import test_database
+
+FIRST = ['Anna', 'Jan', 'Zoë', 'Piotr', 'Maria', 'José', 'Li', 'Fatima', 'Oliver', 'Chloé']
+LAST = ['Kowalska', 'Nowak', 'Núñez', 'Smith', 'Garcia', 'Wang', 'Khan', 'Brown', 'Müller', 'Rossi']
+
+
+def write_fixture(directory, patients, visits, prescriptions):
+    paths = {}
+    paths['patients'] = os.path.join(directory, 'patients.csv')
+    with open(paths['patients'], 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.writer(stream)
+        writer.writerow(['id', 'username', 'first_name', 'last_name', 'email', 'phone', 'date_of_birth', 'added_date'])
+        for i in range(patients):
+            writer.writerow([i, f'legacy{i}', FIRST[i % 10], LAST[i // 10 % 10], f'legacy{i}@example.com',
+                             f'555-{i % 10000:04d}', f'19{50 + i % 50}-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                             '2012-03-04T09:00:00'])
+    paths['visits'] = os.path.join(directory, 'visits.ndjson')
+    with open(paths['visits'], 'w', encoding='utf-8') as stream:
+        for i in range(visits):
+            stream.write(json.dumps({'id': i, 'patient_id': i % patients, 'visit_date': '2014-05-06T10:30:00Z',
+                                     'treatment_provided': 'Scaling and polishing', 'notes': f'Paper record #{i}'}))
+            stream.write('\n')
+    paths['prescriptions'] = os.path.join(directory, 'prescriptions.csv')
+    with open(paths['prescriptions'], 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.writer(stream)
+        writer.writerow(['id', 'visit_id', 'medicine_name', 'dosage', 'instructions'])
+        for i in range(prescriptions):
+            writer.writerow([i, i % visits, 'Amoxicillin', '500mg', 'Twice a day after meals'])
+    return paths
+
+
+def run(dataset, path, batch_size):
+    from django.core.management import call_command
+
+    out = io.StringIO()
+    began = time.perf_counter()
+    call_command('import_records', dataset, path, '--batch-size', str(batch_size), stdout=out, stderr=io.StringIO())
+    return time.perf_counter() - began, out.getvalue().strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=100_000)
+    parser.add_argument('--visits', type=int, default=250_000)
+    parser.add_argument('--prescriptions', type=int, default=150_000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--baseline', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, test_database():
+        from django.contrib.auth.models import User
+
+        paths = write_fixture(directory, args.patients, args.visits, args.prescriptions)
+        total_rows, total_time = 0, 0.0
+        for dataset, count in (('patients', args.patients), ('visits', args.visits),
+                               ('prescriptions', args.prescriptions)):
+            elapsed, summary = run(dataset, paths[dataset], args.batch_size)
+            total_rows, total_time = total_rows + count, total_time + elapsed
+            print(f'{dataset:<14}{count:>8} rows {elapsed:7.1f}s {count / elapsed:9.0f} rows/s')
+        print(f'{"total":<14}{total_rows:>8} rows {total_time:7.1f}s {total_rows / total_time:9.0f} rows/s')
+
+        elapsed, _ = run('patients', paths['patients'], args.batch_size)
+        print(f'{"re-run":<14}{args.patients:>8} rows {elapsed:7.1f}s {args.patients / elapsed:9.0f} rows/s (all skipped)')
+
+        began = time.perf_counter()
+        for i in range(args.baseline):
+            User.objects.create_user(username=f'signup{i}', email=f'signup{i}@example.com',
+                                     first_name=FIRST[i % 10], last_name=LAST[i // 10 % 10], password=None)
+        elapsed = time.perf_counter() - began
+        print(f'{"create_user":<14}{args.baseline:>8} rows {elapsed:7.1f}s {args.baseline / elapsed:9.0f} rows/s (per row)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Measures what RequestTimingMiddleware adds to a request.
+
+    python benchmarks/bench_instrumentation.py [--appointments 200] [--repeat 2000]
+
+Runs the same endpoints through the full middleware stack with and without
+RequestTimingMiddleware and reports the difference. End to end the difference
+is usually within run-to-run noise, so the middleware around a trivial view
+and one instrumented query are timed on their own as well.
+"""
+import argparse
+import statistics
+
+from _harness import measure, report, test_database
+
+MIDDLEWARE = 'dental_backend.middleware.RequestTimingMiddleware'
+URLS = ('/api/patients/appointments/', '/api/reviews/', '/')
+
+
+def populate(count):
+    from django.contrib.auth.models import User
+    from patients.models import Appointment
+    from patients.profiles import ensure_patient_profiles
+    from reviews.models import Review
+
+    users = User.objects.bulk_create([User(username=f'patient{i}', password='!') for i in range(20)])
+    patients = ensure_patient_profiles(users)
+    Appointment.objects.bulk_create([
+        Appointment(patient=patients[i % len(patients)], service_requested='Checkup') for i in range(count)
+    ])
+    Review.objects.bulk_create([
+        Review(review_text='Great', rating=5, is_approved=True) for _ in range(20)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--appointments', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import override_settings, setup_test_environment
+
+    setup_test_environment()
+    with test_database():
+        populate(args.appointments)
+        without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+        for url in URLS:
+            means = {}
+            for label, middleware in (('without', without), ('with', settings.MIDDLEWARE)):
+                with override_settings(MIDDLEWARE=middleware):
+                    client = Client()
+                    client.get(url)  # warm up
+                    timings = measure(lambda: client.get(url), repeat=args.repeat)
+                report(f'{url} {label}', timings)
+                means[label] = statistics.fmean(timings)
+            overhead = means['with'] - means['without']
+            print(f'{"":<40} overhead {overhead:+.1f}us ({overhead / means["without"]:+.1%})')
+
+        from django.db import connection
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from dental_backend.middleware import RequestStats, RequestTimingMiddleware, _current, _instrument
+
+        request, response = RequestFactory().get('/'), HttpResponse('ok')
+        middleware = RequestTimingMiddleware(lambda request: response)
+        report('trivial view without', measure(lambda: response, repeat=args.repeat * 10))
+        report('trivial view with', measure(lambda: middleware(request), repeat=args.repeat * 10))
+
+        _instrument(None, connection)
+        with connection.cursor() as cursor:
+            def query():
+                cursor.execute('SELECT 1')
+            report('SELECT 1 outside a request', measure(query, repeat=args.repeat * 10))
+            token = _current.set(RequestStats())
+            try:
+                report('SELECT 1 inside a request', measure(query, repeat=args.repeat * 10))
+            finally:
+                _current.reset(token)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmarks ?q= patient search over synthetic patients.
+
+    python benchmarks/bench_patient_search.py [--patients 100000] [--target-ms 50]
+
+Bulk-loads users and patients, builds the search index with the same code as
+``manage.py rebuild_patient_search``, then times ``search_patients`` for
+queries of varying selectivity and checks the p99 against ``--target-ms``.
+"""
+import argparse
+import random
+import sys
+import time
+
+from _harness import measure, report, test_database
+
+FIRST = ('Ann Anna Annabel Ben Carla Chloe David Diego Elena Emma Farid Grace Hugo Ines Jose '
+         'Julia Karim Laura Liam Maria Mateo Noah Olivia Priya Rosa Sam Sofia Tom Yuki Zoe').split()
+LAST = ('Smith Jones Garcia Nunez Brown Taylor Wilson Martin Lee Walker Hall Young King Wright '
+        'Lopez Hill Scott Green Adams Baker Nelson Carter Mitchell Perez Roberts Turner Phillips').split()
+QUERIES = ['jo', 'ann', 'smith', 'ann smi', 'maria lopez', 'user12345', '555 01', '0100', 'nomatch']
+
+
+def populate(count, rng, batch_size=5000):
+    from django.contrib.auth.models import User
+    from patients.models import Patient
+
+    for start in range(0, count, batch_size):
+        users = User.objects.bulk_create([
+            User(username=f'user{i}', first_name=rng.choice(FIRST), last_name=rng.choice(LAST),
+                 email=f'user{i}@example.com', password='!')
+            for i in range(start, min(count, start + batch_size))
+        ])
+        Patient.objects.bulk_create([
+            Patient(user=user, phone=f'+1 555 {rng.randrange(10000000):07d}') for user in users
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--target-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    with test_database() as connection:
+        from patients.search import rebuild, search_patients
+
+        rng = random.Random(42)
+        started = time.perf_counter()
+        populate(args.patients, rng)
+        print(f'loaded {args.patients} patients in {time.perf_counter() - started:.1f}s')
+        started = time.perf_counter()
+        rebuild()
+        print(f'indexed in {time.perf_counter() - started:.1f}s ({connection.vendor})')
+
+        worst = 0.0
+        for query in QUERIES:
+            hits = len(search_patients(query))
+            timings = measure(lambda: search_patients(query), repeat=args.repeat)
+            report(f'q={query!r} ({hits} shown)', [t / 1000 for t in timings], 'ms')
+            timings.sort()
+            worst = max(worst, timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000)
+
+    print(f'worst p99 {worst:.1f}ms, target {args.target_ms:.0f}ms')
+    if worst > args.target_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
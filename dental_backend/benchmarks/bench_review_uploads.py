@@ -0,0 +1,82 @@
+"""
+Compares in-request review photo uploads with the background pipeline.
+
+    python benchmarks/bench_review_uploads.py [--photos 5] [--latency 0.4] [--reviews 20]
+
+Uses LocalImageStorage with an artificial per-upload delay standing in for
+the Cloudinary round trip. "request" is how long the review POST would hold
+a worker; "ready" is how long until every photo is resized and stored.
+Also prints the page weight of a phone-sized photo before and after resizing.
+"""
+import argparse
+import io
+import tempfile
+import time
+
+from _harness import test_database
+
+
+class SlowLocalStorage:
+    def __init__(self, inner, latency):
+        self.inner = inner
+        self.latency = latency
+
+    def save(self, name, content):
+        time.sleep(self.latency)
+        return self.inner.save(name, content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--photos', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.4, help='seconds per simulated upload')
+    parser.add_argument('--reviews', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    from PIL import Image, ImageFilter
+    from reviews.imaging import render_variants
+    from reviews.models import Review, ReviewImage
+    from reviews.uploads import LocalImageStorage, UploadPipeline
+
+    # A noisy 12MP frame compresses about as badly as a real phone photo
+    buffer = io.BytesIO()
+    Image.effect_noise((4032, 3024), 64).filter(ImageFilter.GaussianBlur(1)).convert('RGB').save(
+        buffer, format='JPEG', quality=92)
+    photo = buffer.getvalue()
+    files = [(f'photo{i}.jpg', photo) for i in range(args.photos)]
+
+    variants = render_variants(photo)
+    print(f'original photo     : {len(photo) / 1024:8.0f}KB')
+    for _, width, height, fmt, data in variants:
+        print(f'  {fmt.lower():<5} {width:>4}x{height:<4}    : {len(data) / 1024:8.0f}KB')
+
+    with test_database(), tempfile.TemporaryDirectory() as media:
+        storage = SlowLocalStorage(LocalImageStorage(location=media, base_url='/media/'), args.latency)
+
+        began = time.perf_counter()
+        for _ in range(args.reviews):
+            review = Review.objects.create(review_text='bench', rating=5)
+            for name, content in files:
+                ReviewImage.objects.create(review=review, image=storage.save(name, content))  # as before: no resizing
+        inline = (time.perf_counter() - began) / args.reviews
+        print(f'in-request uploads : request={inline * 1000:8.1f}ms per review')
+
+        pipeline = UploadPipeline(storage=storage, workers=args.workers)
+        request_times = []
+        began = time.perf_counter()
+        for _ in range(args.reviews):
+            start = time.perf_counter()
+            review = Review.objects.create(review_text='bench', rating=5, image_status='PENDING')
+            pipeline.submit(review.pk, files)
+            request_times.append(time.perf_counter() - start)
+        pipeline.drain()
+        ready = time.perf_counter() - began
+        print(f'background pipeline: request={sum(request_times) / len(request_times) * 1000:8.1f}ms per review, '
+              f'all {args.reviews} reviews ready after {ready:.2f}s '
+              f'(in-request total {inline * args.reviews:.2f}s)')
+        assert not Review.objects.filter(image_status='PENDING').exists()
+
+
+if __name__ == '__main__':
+    main()
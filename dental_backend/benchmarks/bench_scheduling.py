@@ -0,0 +1,72 @@
+"""
+Benchmarks patients.scheduling against a year of bookings.
+
+    python benchmarks/bench_scheduling.py [--per-day 14]
+
+Creates a year of appointments in a throwaway database, then times
+"is this slot free", "free slots on a day" and "next N free slots" with a
+cold and a warm engine, plus the cost of an incremental update.
+"""
+import argparse
+import random
+import time as _time
+from datetime import date, datetime, time, timedelta
+
+from _harness import measure, report, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--per-day', type=int, default=14, help='bookings per clinic day')
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from patients.models import Appointment, Patient
+    from patients.scheduling import AvailabilityEngine, ClinicHours
+
+    hours = ClinicHours.from_settings()
+    start = date.today()
+    days = [start + timedelta(days=i) for i in range(365)]
+    rng = random.Random(42)
+
+    with test_database():
+        user = User.objects.create(username='bench')
+        patient = Patient.objects.get_or_create(user=user)[0]
+        rows = []
+        for day in days:
+            if not hours.is_open(day):
+                continue
+            for slot in rng.sample(range(hours.slots_per_day), min(args.per_day, hours.slots_per_day)):
+                rows.append(Appointment(
+                    patient=patient, service_requested='Checkup', status='CONFIRMED',
+                    appointment_date=day, appointment_time=hours.slot_time(slot),
+                ))
+        Appointment.objects.bulk_create(rows, batch_size=2000)
+        print(f'{len(rows)} bookings over 365 days, {hours.slots_per_day} slots/day')
+
+        engine = AvailabilityEngine(hours, ttl=3600)
+        began = _time.perf_counter()
+        for day in days:
+            engine.free_slots(day)
+        print(f'cold load of 365 days: {(_time.perf_counter() - began) * 1000:.1f}ms')
+
+        probe_days = [rng.choice(days) for _ in range(1000)]
+        probes = iter(probe_days * 10)
+        report('is_free (warm)', measure(lambda: engine.is_free(next(probes), time(11, 0)), 10000))
+        probes = iter(probe_days * 10)
+        report('free_slots (warm)', measure(lambda: engine.free_slots(next(probes)), 10000))
+        now = datetime.combine(start, time(8, 0))
+        report('next_free count=10 (warm)', measure(lambda: engine.next_free(now, count=10), 10000))
+        late = datetime.combine(start + timedelta(days=300), time(8, 0))
+        report('next_free count=50 (warm)', measure(lambda: engine.next_free(late, count=50), 10000))
+
+        appointment = rows[len(rows) // 2]
+
+        def toggle():
+            appointment.status = 'CANCELLED' if appointment.status == 'CONFIRMED' else 'CONFIRMED'
+            engine.track(appointment)
+        report('track (confirm/cancel)', measure(toggle, 10000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmarks /api/search/ over a synthetic corpus.
+
+    python benchmarks/bench_search.py [--documents 100000]
+
+Bulk-loads SearchDocument rows (the database-specific index is maintained
+by the same triggers/generated column as in production), then times ranked
+queries of varying selectivity through the search backend.
+"""
+import argparse
+import random
+import time
+
+from _harness import measure, report, test_database
+
+VOCABULARY = (
+    'tooth teeth root canal crown implant veneer whitening braces aligner cavity filling '
+    'gum gingivitis floss brush enamel sensitivity extraction wisdom orthodontic bridge '
+    'denture plaque tartar cleaning checkup xray anaesthesia pain swelling infection '
+    'appointment insurance emergency smile bite jaw molar incisor fluoride sealant'
+).split()
+FILLER = ('the a and of to for with your our we is are it this that can will after before during '
+          'patients doctor clinic treatment visit care').split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(VOCABULARY) if rng.random() < 0.3 else rng.choice(FILLER) for _ in range(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=100_000)
+    args = parser.parse_args()
+
+    from search.backends import search
+    from search.models import SearchDocument
+
+    rng = random.Random(7)
+    kinds = ['blog', 'faq', 'review']
+    with test_database() as connection:
+        began = time.perf_counter()
+        batch = []
+        for i in range(args.documents):
+            kind = kinds[i % 3]
+            batch.append(SearchDocument(
+                kind=kind, object_id=i, title=sentence(rng, 8).capitalize(),
+                body=sentence(rng, 400 if kind == 'blog' else 60), url=f'/bench/{i}/',
+            ))
+            if len(batch) == 5000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        print(f'{connection.vendor}: indexed {args.documents} documents in {time.perf_counter() - began:.1f}s')
+
+        for query in ('root canal', 'wisdom extraction swelling', 'fluoride', 'emergency appointment insurance'):
+            hits = len(search(query, limit=20))
+            report(f'q="{query}" ({hits} hits)', [t / 1000 for t in measure(lambda: search(query, limit=20), 50)], 'ms')
+        report('q="implant" type=faq', [t / 1000 for t in measure(lambda: search('implant', kinds=['faq']), 50)], 'ms')
+
+        document = SearchDocument.objects.get(object_id=123)
+        document.body = sentence(rng, 60)
+        report('incremental update of one document', [t / 1000 for t in measure(document.save, 200)], 'ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the gunicorn worker modes in gunicorn.conf.py on real API endpoints.
+
+    python benchmarks/bench_server.py [--modes sync gthread uvicorn] [--requests 2000] [--concurrency 32]
+
+Migrates a throwaway SQLite file and seeds a few blog posts and one patient.
+Then, for each WEB_WORKER_CLASS, it starts gunicorn from gunicorn.conf.py
+(worker count from the CPU count unless --workers is given) and hammers:
+  /api/blog/posts/         public list, served from the response cache
+  /api/reviews/stats/      one uncached aggregate query
+  /api/search/?q=...       full-text search
+  /api/patients/me/        JWT-authenticated profile (history + appointments)
+Compare req/s and p99 between modes on the same machine; absolute numbers
+depend on the CPU count and SQLite.
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+_workdir = tempfile.TemporaryDirectory()
+os.environ.pop('DB_ENGINE', None)
+os.environ['SQLITE_PATH'] = str(Path(_workdir.name) / 'bench.sqlite3')
+
+from _harness import report  # noqa: E402  (boots Django with SQLITE_PATH)
+from _load import hammer, serve  # noqa: E402
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+ENDPOINTS = ['/api/blog/posts/', '/api/reviews/stats/', '/api/search/?q=whitening', '/api/patients/me/']
+
+
+def seed():
+    from blog.models import BlogPost
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    call_command('migrate', verbosity=0)
+    for i in range(20):
+        BlogPost.objects.create(title=f'Teeth whitening myths #{i}', slug=f'whitening-{i}', category='Care',
+                                excerpt='What actually works', content='Whitening strips, trays and more. ' * 40)
+    user = User.objects.create_user(username='bench-server', password='bench-password')
+    user.patient_profile.appointments.create(service_requested='Cleaning')
+    return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modes', nargs='+', default=['sync', 'gthread', 'uvicorn'])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, help='Same WEB_CONCURRENCY for every mode.')
+    args = parser.parse_args()
+
+    auth = seed()
+    for mode in args.modes:
+        env = {'WEB_WORKER_CLASS': mode, 'DEBUG': 'False', 'ALLOWED_HOSTS': '127.0.0.1'}
+        if args.workers:
+            env['WEB_CONCURRENCY'] = str(args.workers)
+        with serve(env=env, app=None) as base_url:
+            for path in ENDPOINTS:
+                headers = auth if path.startswith('/api/patients/') else None
+                latencies, elapsed = hammer(base_url + path, args.requests, args.concurrency, headers=headers)
+                report(f'{mode:<8} {path}', latencies, 'ms')
+                print(f'{"":<40} {args.requests / elapsed:.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
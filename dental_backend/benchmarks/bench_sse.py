@@ -0,0 +1,118 @@
+"""
+Load test: many idle dashboards on the appointment event stream.
+
+    python benchmarks/bench_sse.py [--listeners 1000] [--rounds 5]
+
+Migrates a throwaway SQLite file, starts gunicorn with one uvicorn worker on
+the ASGI application, and opens ``--listeners`` concurrent connections to
+/api/patients/appointments/events/. It then changes an appointment's status
+over the API ``--rounds`` times and measures how long each listener takes to
+receive the event (from the moment the PATCH is sent). Clients are raw asyncio
+sockets, so the client side needs only the standard library.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+_workdir = tempfile.TemporaryDirectory()
+os.environ.pop('DB_ENGINE', None)
+os.environ['SQLITE_PATH'] = str(Path(_workdir.name) / 'bench.sqlite3')
+
+from _harness import report  # noqa: E402  (boots Django with SQLITE_PATH)
+from _load import serve  # noqa: E402
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+EVENTS_PATH = '/api/patients/appointments/events/'
+
+
+def seed():
+    call_command('migrate', verbosity=0)
+    patient = User.objects.create_user(username='bench-patient').patient_profile
+    return patient.appointments.create(service_requested='Cleaning').pk
+
+
+async def listen(host, port, ready, events, received):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET {EVENTS_PATH} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n'.encode())
+    await writer.drain()
+    buffer = b''
+    while b'retry:' not in buffer:
+        buffer += await reader.read(4096)
+    ready()
+    seen = 0
+    while seen < events:
+        chunk = await reader.read(4096)
+        if not chunk:
+            break
+        arrived = chunk.count(b'event: appointment.status')
+        seen += arrived
+        received.extend([time.perf_counter()] * arrived)
+    writer.close()
+
+
+def patch_status(url, status):
+    request = urllib.request.Request(
+        url, data=json.dumps({'status': status}).encode(), method='PATCH',
+        headers={'Content-Type': 'application/json'},
+    )
+    urllib.request.urlopen(request, timeout=30).read()
+
+
+async def run(base_url, appointment_id, listeners, rounds):
+    host, port = base_url.removeprefix('http://').split(':')
+    connected = asyncio.Event()
+    count = 0
+
+    def ready():
+        nonlocal count
+        count += 1
+        if count == listeners:
+            connected.set()
+
+    received = []
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(listen(host, int(port), ready, rounds, received)) for _ in range(listeners)]
+    await asyncio.wait_for(connected.wait(), 120)
+    print(f'{listeners} listeners connected in {time.perf_counter() - started:.2f}s')
+
+    url = f'{base_url}/api/patients/appointments/{appointment_id}/'
+    latencies = []
+    for index in range(rounds):
+        received.clear()
+        sent = time.perf_counter()
+        await asyncio.to_thread(patch_status, url, 'CONFIRMED' if index % 2 == 0 else 'PENDING')
+        deadline = time.monotonic() + 30
+        while len(received) < listeners and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+        if len(received) < listeners:
+            sys.exit(f'round {index}: only {len(received)}/{listeners} listeners got the event')
+        round_latencies = [(at - sent) * 1000 for at in received]
+        print(f'round {index}: last listener after {max(round_latencies):.1f}ms')
+        latencies.extend(round_latencies)
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--listeners', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    appointment_id = seed()
+    server_args = ['--workers', '1', '--worker-class', 'uvicorn_worker.UvicornWorker']
+    with serve(args=server_args, app='dental_backend.asgi:application') as base_url:
+        latencies = asyncio.run(run(base_url, appointment_id, args.listeners, args.rounds))
+    report(f'event delivery ({args.listeners} listeners)', latencies, 'ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares importing visits one row per request with the history/batch/ endpoint.
+
+    python benchmarks/bench_visit_batch.py [--visits 10000] [--prescriptions 2] [--batch 1000]
+
+Both paths go through the full Django/DRF stack with the in-process test
+client, against a throwaway database. "per-row" is what the dashboard did
+before: POST /history/ for the visit, then one POST /prescriptions/ per
+medicine. "batched" sends ``--batch`` visits (with nested prescriptions) per
+POST to /history/batch/.
+"""
+import argparse
+import json
+import time
+
+from _harness import test_database
+
+MEDICINES = ['Amoxicillin', 'Ibuprofen', 'Paracetamol', 'Chlorhexidine rinse', 'Metronidazole']
+
+
+def visit(patient_id, index, prescriptions):
+    return {
+        'patient': patient_id,
+        'visit_date': f'2019-{index % 12 + 1:02d}-{index % 28 + 1:02d}T10:00:00Z',
+        'notes': f'Paper record #{index}',
+        'treatment_provided': 'Scaling and polishing',
+        'prescriptions': [
+            {'medicine_name': MEDICINES[(index + i) % len(MEDICINES)], 'dosage': '500mg',
+             'instructions': 'Twice a day after meals'}
+            for i in range(prescriptions)
+        ],
+    }
+
+
+def post(client, url, data):
+    response = client.post(url, json.dumps(data), content_type='application/json')
+    assert response.status_code == 201, response.content[:500]
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--visits', type=int, default=10_000)
+    parser.add_argument('--prescriptions', type=int, default=2)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--patients', type=int, default=200)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from patients.models import DentalHistory, Prescription
+    from patients.profiles import ensure_patient_profiles
+
+    setup_test_environment()
+    with test_database():
+        users = User.objects.bulk_create(User(username=f'paper{i}', password='!') for i in range(args.patients))
+        patients = ensure_patient_profiles(users)
+        visits = [visit(patients[i % len(patients)].pk, i, args.prescriptions) for i in range(args.visits)]
+        client = Client()
+
+        began = time.perf_counter()
+        for data in visits:
+            prescriptions = data.pop('prescriptions')
+            post(client, '/api/patients/history/', data)
+            # DentalHistoryCreateSerializer doesn't return the new id
+            history_id = DentalHistory.objects.only('pk').latest('pk').pk
+            for item in prescriptions:
+                post(client, '/api/patients/prescriptions/', {'history_entry': history_id, **item})
+            data['prescriptions'] = prescriptions
+        per_row = time.perf_counter() - began
+        requests = args.visits * (1 + args.prescriptions)
+        print(f'per-row  : {per_row:7.2f}s  {args.visits / per_row:8.0f} visits/s  ({requests} requests)')
+
+        DentalHistory.objects.all().delete()
+        began = time.perf_counter()
+        for start in range(0, len(visits), args.batch):
+            post(client, '/api/patients/history/batch/', visits[start:start + args.batch])
+        batched = time.perf_counter() - began
+        requests = -(-args.visits // args.batch)
+        print(f'batched  : {batched:7.2f}s  {args.visits / batched:8.0f} visits/s  ({requests} requests)')
+        print(f'speed-up : {per_row / batched:.1f}x')
+        assert Prescription.objects.count() == args.visits * args.prescriptions
+
+
+if __name__ == '__main__':
+    main()
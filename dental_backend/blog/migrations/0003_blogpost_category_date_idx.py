@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_blogpost_content_blogpost_external_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['category', '-publish_date'], name='blog_category_date_idx'),
+        ),
+    ]
@@ -17,4 +17,8 @@ class BlogPost(models.Model):
         return self.title
 
     class Meta:
-        ordering = ['-publish_date']
\ No newline at end of file
+        ordering = ['-publish_date']
+        indexes = [
+            # ?category= filter in the default ordering
+            models.Index(fields=['category', '-publish_date'], name='blog_category_date_idx'),
+        ]
\ No newline at end of file
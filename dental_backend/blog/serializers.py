@@ -5,4 +5,12 @@ from .models import BlogPost # Import from .models
 class BlogPostSerializer(serializers.ModelSerializer):
     class Meta:
         model = BlogPost
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# Card fields only: the blog index never shows `content`
+BLOG_CARD_FIELDS = ['id', 'title', 'slug', 'excerpt', 'category', 'image_url', 'publish_date', 'read_time', 'external_url']
+
+class BlogPostListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BlogPost
+        fields = BLOG_CARD_FIELDS
@@ -1,3 +1,85 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .models import BlogPost
+
+
+class BlogResponseCacheTests(TestCase):
+    url = '/api/blog/posts/'
+
+    def setUp(self):
+        cache.clear()
+        self.post = BlogPost.objects.create(title='Flossing 101', slug='flossing-101', category='Hygiene')
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_browsable_api_is_not_cached(self):
+        for _ in range(2):
+            html = self.client.get(self.url, HTTP_ACCEPT='text/html')
+            self.assertEqual(html['Content-Type'], 'text/html; charset=utf-8')
+            self.assertNotIn('ETag', html)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url)['ETag'], response['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_saving_a_post_invalidates_cached_responses(self):
+        etag = self.client.get(f'{self.url}flossing-101/')['ETag']
+        self.post.title = 'Flossing 102'
+        self.post.save()
+        response = self.client.get(f'{self.url}flossing-101/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Flossing 102')
+
+    def test_commit_invalidates_responses_cached_before_it(self):
+        url = f'{self.url}flossing-101/'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post.title = 'Flossing 102'
+            self.post.save()
+            # Until the commit, other connections read the old row and may cache it under the new version
+            BlogPost.objects.filter(pk=self.post.pk).update(title='Flossing 101')
+            self.assertEqual(self.client.get(url).json()['title'], 'Flossing 101')
+            BlogPost.objects.filter(pk=self.post.pk).update(title='Flossing 102')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(url).json()['title'], 'Flossing 102')
+
+
+class BlogListTests(TestCase):
+    url = '/api/blog/posts/'
+
+    def setUp(self):
+        cache.clear()
+        for i in range(15):
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', category='Implants' if i % 3 else 'Hygiene',
+                content='Long article body. ' * 500,
+            )
+
+    def test_list_returns_cards_without_content(self):
+        with self.assertNumQueries(2) as queries:  # COUNT + page
+            response = self.client.get(self.url)
+        self.assertNotIn('content', queries.captured_queries[1]['sql'])
+        data = response.json()
+        self.assertEqual(data['count'], 15)
+        self.assertEqual(len(data['results']), 12)
+        self.assertNotIn('content', data['results'][0])
+        self.assertIn('content', self.client.get(f'{self.url}post-1/').json())
+
+    def test_category_filter(self):
+        data = self.client.get(self.url, {'category': 'Hygiene'}).json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual({p['category'] for p in data['results']}, {'Hygiene'})
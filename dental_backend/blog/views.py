@@ -2,11 +2,31 @@
 from django.shortcuts import render
 from rest_framework import viewsets
 from .models import BlogPost
-from .serializers import BlogPostSerializer
+from .serializers import BlogPostSerializer, BlogPostListSerializer, BLOG_CARD_FIELDS
+from .pagination import BlogPagination
 from rest_framework.permissions import AllowAny # <-- IMPORT THIS
+from dental_backend.caching import CachedResponseMixin
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_models = (BlogPost,)
     queryset = BlogPost.objects.all()
     serializer_class = BlogPostSerializer
     lookup_field = 'slug'
-    permission_classes = [AllowAny] # <-- ADD THIS LINE
\ No newline at end of file
+    permission_classes = [AllowAny] # <-- ADD THIS LINE
+    pagination_class = BlogPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        # The index only renders cards, so don't read `content` at all
+        queryset = queryset.only(*BLOG_CARD_FIELDS)
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BlogPostListSerializer
+        return BlogPostSerializer
@@ -0,0 +1,134 @@
+"""
+Response caching for the public, read-mostly API (blog, FAQ, approved reviews).
+
+Every cached view lists the models its output depends on in ``cache_models``.
+Each model has a version number stored in the cache. The version is part of
+every response cache key and is bumped by post_save/post_delete (see
+``watch_models``), and again when the transaction commits, so an admin edit
+makes the old entries unreachable at once. Nothing has to be deleted.
+
+Responses carry a strong ETag (a hash of the rendered body) and honour
+If-None-Match with a 304. Only JSON is cached: the browsable API's HTML
+carries the viewer's session (CSRF token, login state) and is never stored.
+
+The backend is whatever CACHES['default'] is. The default local-memory cache
+is per process, so with several gunicorn workers set CACHE_BACKEND=file or
+REDIS_URL so that version bumps are seen by every worker.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from .metrics import counters
+from .middleware import timed_render
+
+VERSION_KEY = 'model-version:{}'
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_model_versions(models):
+    """Current version of each model, fetched in one cache round trip."""
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start evicted/new counters at the clock so old keys are never reused
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def _bump_on_change(sender, **kwargs):
+    # Now, and again once committed: a request that cached the old row
+    # between the save and the commit would otherwise keep serving it
+    bump_model_version(sender)
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+def watch_models(*models):
+    """Invalidates cached responses whenever one of ``models`` is saved or deleted."""
+    for model in models:
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=f'cache-version-save-{model._meta.label}')
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=f'cache-version-delete-{model._meta.label}')
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def _conditional(request, response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ('Accept',))
+    if _etag_matches(request, etag):
+        not_modified = HttpResponseNotModified()
+        for header in ('ETag', 'Cache-Control', 'Vary'):
+            not_modified[header] = response[header]
+        return not_modified
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Caches the rendered output of ``cached_actions`` on a DRF viewset.
+    Subclasses set ``cache_models`` to the models the response is built from.
+    """
+    cache_models = ()
+    cached_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        versions = '.'.join(str(v) for v in get_model_versions(self.cache_models))
+        path = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+        return f'response:{self.basename}:{self.action}:{versions}:{path}'
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.cached_actions or request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        counters.inc('cache_requests_total', cache='response', result='miss' if entry is None else 'hit')
+        if entry is None:
+            self._response_cache_key = key
+            return handler(request, *args, **kwargs)
+        etag, content, content_type = entry
+        return _conditional(request, HttpResponse(content, content_type=content_type), etag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is None or response.status_code != 200:
+            return response
+        with timed_render():
+            response.render()
+        etag = '"%s"' % hashlib.sha256(response.content).hexdigest()[:32]
+        cache.set(key, (etag, response.content, response['Content-Type']),
+                  timeout=settings.PUBLIC_CACHE_SECONDS)
+        return _conditional(request, response, etag)
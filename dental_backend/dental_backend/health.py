@@ -0,0 +1,90 @@
+"""
+Liveness and readiness probes.
+
+/healthz answers as long as the process can serve a request; it touches
+nothing else, so a database outage doesn't get healthy workers restarted.
+/readyz runs a ``SELECT 1`` and a cache round trip and returns 503 if
+either fails or takes longer than HEALTH_CHECK_TIMEOUT seconds. Checks
+run on a small thread pool so a hung dependency can't hold the probe
+past its timeout. While a check is stuck it keeps its pool thread, and
+later probes time out until it comes back. Failures are logged to
+``dental_backend.health``; the response only names the failing check.
+"""
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_checks = ThreadPoolExecutor(max_workers=4, thread_name_prefix='readyz')
+
+
+def check_database():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        # The pool thread keeps no connection between probes (with DB_POOL it goes back to the pool)
+        connection.close()
+
+
+def check_cache():
+    key, value = f'readyz:{uuid.uuid4().hex}', time.time()
+    cache.set(key, value, timeout=10)
+    try:
+        if cache.get(key) != value:
+            raise RuntimeError('value written to the cache was not read back')
+    finally:
+        cache.delete(key)
+
+
+CHECKS = {'database': check_database, 'cache': check_cache}
+
+
+def run_checks(checks=None, timeout=None):
+    """{name: {'ok': bool, 'ms': float}} for each check, run in parallel."""
+    checks = CHECKS if checks is None else checks
+    timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0) if timeout is None else timeout
+    started = time.perf_counter()
+    futures = {name: _checks.submit(_timed, name, check) for name, check in checks.items()}
+    results = {}
+    for name, future in futures.items():
+        remaining = max(0.0, timeout - (time.perf_counter() - started))
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning('Readiness check %s timed out after %ss', name, timeout)
+            results[name] = {'ok': False, 'ms': round(timeout * 1000, 1)}
+    return results
+
+
+def _timed(name, check):
+    started = time.perf_counter()
+    try:
+        check()
+    except Exception:
+        logger.exception('Readiness check %s failed', name)
+        return {'ok': False, 'ms': _since(started)}
+    return {'ok': True, 'ms': _since(started)}
+
+
+def _since(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def healthz(request):
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    checks = run_checks()
+    ready = all(result['ok'] for result in checks.values())
+    return JsonResponse({'status': 'ok' if ready else 'unavailable', 'checks': checks}, status=200 if ready else 503)
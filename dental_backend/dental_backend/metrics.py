@@ -0,0 +1,215 @@
+"""
+Process metrics in the Prometheus text format, served at /metrics.
+
+Three sources are rendered on each scrape:
+  * request counts, latency histograms and DB totals per route, from the
+    running totals RequestTimingMiddleware keeps (middleware.timings);
+  * event counters incremented by application code through ``counters``
+    (cache hits and misses, appointment and review events);
+  * database pool gauges read from psycopg's pool statistics when
+    DB_POOL is on.
+
+Writers only touch their own thread's counters, and a scrape copies them
+without taking a lock, so scraping never holds up a request. Figures are
+per process: with several gunicorn workers each scrape sees the worker
+that served it.
+
+Scrapers authenticate with ``Authorization: Bearer <METRICS_TOKEN>``; staff
+sessions are let in as well. Without a token /metrics is open only while
+DEBUG is on, so a production deploy that forgets to set one fails closed.
+"""
+import hmac
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from .middleware import BUCKETS_MS, timings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+STARTED = time.time()
+
+# Counters incremented through ``counters.inc``; anything not listed here is rendered without HELP
+COUNTER_HELP = {
+    'cache_requests_total': 'Cache lookups by cache and result (hit/miss).',
+    'appointments_total': 'Committed appointment bookings and status changes, by event and new status.',
+    'reviews_total': 'Committed review submissions and approvals, by event.',
+}
+
+
+class Counters:
+    """Monotonic counters keyed by name and labels, sharded per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, amount=1, **labels):
+        shard = self._shard()
+        key = (name, tuple(sorted(labels.items())))
+        shard[key] = shard.get(key, 0) + amount
+
+    def values(self):
+        """{(name, ((label, value), ...)): total} over all threads."""
+        with self._lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            for key, value in list(shard.items()):
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def get(self, name, **labels):
+        return self.values().get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+counters = Counters()
+
+
+# --- Text format ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text):
+        if help_text:
+            self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name, value, labels=()):
+        self.lines.append(f'{name}{_labels(labels)} {_number(value)}')
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def _request_metrics(out):
+    totals = timings.totals()
+    by_route = {}
+    for (route, status), entry in totals.items():
+        merged = by_route.setdefault(route, [0] * len(entry))
+        for i, value in enumerate(entry):
+            merged[i] += value
+
+    out.family('http_requests_total', 'counter', 'Requests served, by route and status class.')
+    for (route, status), entry in sorted(totals.items()):
+        out.sample('http_requests_total', entry[-4], (('route', route), ('status', status)))
+
+    out.family('http_request_duration_seconds', 'histogram', 'Time from the first middleware to the response.')
+    for route, entry in sorted(by_route.items()):
+        seen = 0
+        for bound, hits in zip(BUCKETS_MS, entry):
+            seen += hits
+            le = '+Inf' if bound == float('inf') else repr(bound / 1000)
+            out.sample('http_request_duration_seconds_bucket', seen, (('route', route), ('le', le)))
+        out.sample('http_request_duration_seconds_sum', entry[-3] / 1000, (('route', route),))
+        out.sample('http_request_duration_seconds_count', entry[-4], (('route', route),))
+
+    out.family('http_request_db_seconds_total', 'counter', 'Time spent in SQL queries, by route.')
+    for route, entry in sorted(by_route.items()):
+        out.sample('http_request_db_seconds_total', entry[-2] / 1000, (('route', route),))
+    out.family('http_request_queries_total', 'counter', 'SQL queries run, by route.')
+    for route, entry in sorted(by_route.items()):
+        out.sample('http_request_queries_total', entry[-1], (('route', route),))
+
+
+def _counter_metrics(out):
+    families = {}
+    for (name, labels), value in counters.values().items():
+        families.setdefault(name, []).append((labels, value))
+    for name in sorted(families):
+        out.family(name, 'counter', COUNTER_HELP.get(name))
+        for labels, value in sorted(families[name]):
+            out.sample(name, value, labels)
+
+    lookups = {}
+    for labels, value in families.get('cache_requests_total', ()):
+        labels = dict(labels)
+        hits, total = lookups.get(labels.get('cache'), (0, 0))
+        lookups[labels.get('cache')] = (hits + (value if labels.get('result') == 'hit' else 0), total + value)
+    if lookups:
+        out.family('cache_hit_ratio', 'gauge', 'Share of cache lookups that were hits since the process started.')
+        for cache, (hits, total) in sorted(lookups.items()):
+            out.sample('cache_hit_ratio', round(hits / total, 4), (('cache', cache),))
+
+
+def _pool_metrics(out):
+    pools = []
+    for alias in connections:
+        # Read the class-level registry: the ``pool`` property would create a pool just to report on it
+        pool = getattr(type(connections[alias]), '_connection_pools', {}).get(alias)
+        if pool is not None:
+            pools.append((alias, pool.get_stats()))
+    if not pools:
+        return
+    for name, stat, help_text in (
+        ('db_pool_size', 'pool_size', 'Connections currently open in the pool.'),
+        ('db_pool_available', 'pool_available', 'Idle connections ready to hand out.'),
+        ('db_pool_max_size', 'pool_max', 'Configured maximum pool size.'),
+        ('db_pool_waiting', 'requests_waiting', 'Requests waiting for a connection.'),
+    ):
+        out.family(name, 'gauge', help_text)
+        for alias, stats in pools:
+            out.sample(name, stats.get(stat, 0), (('alias', alias),))
+
+
+def render():
+    out = _Writer()
+    out.family('process_start_time_seconds', 'gauge', 'Start time of the process since the Unix epoch.')
+    out.sample('process_start_time_seconds', round(STARTED, 3))
+    out.family('process_info', 'gauge', 'Constant 1, labelled with the worker process id.')
+    out.sample('process_info', 1, (('pid', os.getpid()),))
+    _request_metrics(out)
+    _counter_metrics(out)
+    _pool_metrics(out)
+    return out.text()
+
+
+def _allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return True
+    elif settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_staff)
+
+
+def metrics(request):
+    if not _allowed(request):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,345 @@
+"""
+Per-request instrumentation: SQL query count and time, response rendering
+time and total time.
+
+RequestTimingMiddleware (first in MIDDLEWARE) does four things:
+  * adds a ``Server-Timing`` header (db, render, total), which browser
+    devtools show next to each request;
+  * logs requests slower than SLOW_REQUEST_MS, or with more than
+    SLOW_REQUEST_QUERIES queries, to ``dental_backend.requests`` with
+    their most repeated SQL. Repeats are the N+1 patterns;
+  * records every request in ``timings``: rolling per-endpoint
+    histograms kept in memory, plus running totals for /metrics;
+  * works for both WSGI and ASGI (async views included).
+
+Rendering is timed where it happens: for DRF responses after the view,
+and inside ``timed_render()`` blocks for views that render early (the
+cached viewsets in caching.py). A streaming body is produced after the
+headers have gone out, so its Server-Timing header stops at the first
+byte; the request is recorded and checked against the slow-request
+limits when the stream closes, queries in the body included. Event
+streams (SSE) stay open as long as the client does and are recorded when
+their headers go out.
+
+Queries are counted by an execute_wrapper that every database connection
+gets when it opens. It finds the current request's stats through a
+ContextVar, which asgiref carries into sync_to_async threads. Outside a
+request it is one ContextVar lookup per query. Histograms are sharded per
+thread, so recording a request takes no lock.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('dental_backend.requests')
+
+# Upper bounds in ms; the last bucket catches everything slower
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+WINDOW_SECONDS = 300
+REPEATED_SQL_SHOWN = 3
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'db_seconds', 'statements', 'render_started', 'render_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    def repeated(self, limit=REPEATED_SQL_SHOWN):
+        return [(sql, count) for sql, count in self.statements.most_common(limit) if count > 1]
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - started
+        stats.queries += 1
+        stats.statements[sql] += 1
+
+
+def _instrument(sender, connection, **kwargs):
+    # The wrapper list belongs to the DatabaseWrapper, which outlives reconnects
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_instrument, dispatch_uid='request-timing-instrument')
+
+
+# --- Rolling per-endpoint histograms ---
+
+def _new_entry():
+    # [bucket counts..., count, total ms, db ms, queries]
+    return [0] * len(BUCKETS_MS) + [0, 0.0, 0.0, 0]
+
+
+def _add(entry, total_ms, db_ms, queries):
+    entry[bisect_left(BUCKETS_MS, total_ms)] += 1
+    entry[-4] += 1
+    entry[-3] += total_ms
+    entry[-2] += db_ms
+    entry[-1] += queries
+
+
+class _Shard:
+    """One thread's histograms for the current and the previous window, and its running totals."""
+
+    def __init__(self):
+        self.window = None
+        self.current = {}
+        self.previous = {}
+        self.totals = {}  # (route, status class) -> entry, since the process started
+
+    def rotate(self, window):
+        self.previous = self.current if self.window == window - 1 else {}
+        self.current = {}
+        self.window = window
+
+
+class RouteTimings:
+    """
+    Request durations per endpoint over the last one to two WINDOW_SECONDS
+    (``snapshot()``), and since the process started (``totals()``, for
+    /metrics). Each thread writes only its own shard; readers merge them.
+    """
+
+    def __init__(self, window_seconds=WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, route, status, total_ms, db_ms, queries):
+        shard = self._shard()
+        window = int(time.monotonic() // self.window_seconds)
+        if shard.window != window:
+            shard.rotate(window)
+        entry = shard.current.get(route)
+        if entry is None:
+            entry = shard.current[route] = _new_entry()
+        _add(entry, total_ms, db_ms, queries)
+        key = (route, f'{status // 100}xx')
+        entry = shard.totals.get(key)
+        if entry is None:
+            entry = shard.totals[key] = _new_entry()
+        _add(entry, total_ms, db_ms, queries)
+
+    def merged(self):
+        """{route: [bucket counts..., count, total ms, db ms, queries]} over all threads."""
+        window = int(time.monotonic() // self.window_seconds)
+        tables = []
+        for shard in self._all_shards():
+            if shard.window == window:
+                tables += [shard.current, shard.previous]
+            elif shard.window == window - 1:
+                tables.append(shard.current)
+        return _merge(tables)
+
+    def totals(self):
+        """{(route, status class): [bucket counts..., count, total ms, db ms, queries]} since startup."""
+        return _merge([shard.totals for shard in self._all_shards()])
+
+    def _all_shards(self):
+        with self._lock:
+            return list(self._shards)
+
+    def snapshot(self):
+        """{route: {count, p50_ms, p95_ms, p99_ms, mean_db_ms, mean_queries}}, busiest first."""
+        result = {}
+        for route, entry in sorted(self.merged().items(), key=lambda item: -item[1][-4]):
+            count = entry[-4]
+            buckets = entry[:len(BUCKETS_MS)]
+            result[route] = {
+                'count': count,
+                'p50_ms': _percentile(buckets, count, 0.50),
+                'p95_ms': _percentile(buckets, count, 0.95),
+                'p99_ms': _percentile(buckets, count, 0.99),
+                'mean_ms': round(entry[-3] / count, 1),
+                'mean_db_ms': round(entry[-2] / count, 1),
+                'mean_queries': round(entry[-1] / count, 1),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.window, shard.current, shard.previous, shard.totals = None, {}, {}, {}
+
+
+def _merge(tables):
+    merged = {}
+    for table in tables:
+        # list() copies in one step, so a concurrent insert can't break the loop
+        for key, entry in list(table.items()):
+            total = merged.setdefault(key, [0] * len(entry))
+            for i, value in enumerate(list(entry)):
+                total[i] += value
+    return merged
+
+
+def _percentile(buckets, count, quantile):
+    # Upper bound of the bucket holding the quantile (the last finite bound for the overflow bucket)
+    rank = quantile * count
+    seen = 0
+    for bound, hits in zip(BUCKETS_MS, buckets):
+        seen += hits
+        if seen >= rank and hits:
+            return bound if bound != float('inf') else BUCKETS_MS[-2]
+    return 0.0
+
+
+timings = RouteTimings()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return f"{request.method} {match.view_name if match else 'unmatched'}"
+
+
+@contextmanager
+def timed_render():
+    """Counts the enclosed block as rendering time of the current request."""
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.render_seconds += time.perf_counter() - started
+
+
+# --- Middleware ---
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.slow_queries = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+        self.header = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        for connection in connections.all(initialized_only=True):
+            _instrument(None, connection)
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to JSON) right after this hook,
+        # unless the view rendered already (its time is in timed_render())
+        stats = _current.get()
+        if stats is not None and not response.is_rendered:
+            stats.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self._rendered(stats))
+        return response
+
+    @staticmethod
+    def _rendered(stats):
+        stats.render_seconds += time.perf_counter() - stats.render_started
+
+    def finish(self, request, response, stats):
+        if response.streaming and not response.get('Content-Type', '').startswith('text/event-stream'):
+            content = response.streaming_content
+            stream = self._astream if response.is_async else self._stream
+            response.streaming_content = stream(request, response, stats, content)
+        else:
+            self.record(request, response, stats)
+        if self.header:
+            response['Server-Timing'] = (
+                f'db;desc="{stats.queries} queries";dur={stats.db_seconds * 1000:.1f}, '
+                f'render;dur={stats.render_seconds * 1000:.1f}, '
+                f'total;dur={(time.perf_counter() - stats.started) * 1000:.1f}'
+            )
+        return response
+
+    def _stream(self, request, response, stats, content):
+        # The stats are made current around each chunk so that queries run by the body are counted
+        try:
+            while True:
+                token = _current.set(stats)
+                try:
+                    chunk = next(content, None)
+                finally:
+                    _current.reset(token)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.record(request, response, stats)
+
+    async def _astream(self, request, response, stats, content):
+        try:
+            while True:
+                token = _current.set(stats)
+                try:
+                    chunk = await anext(content, None)
+                finally:
+                    _current.reset(token)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.record(request, response, stats)
+
+    def record(self, request, response, stats):
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_seconds * 1000
+        route = route_name(request)
+        timings.record(route, response.status_code, total_ms, db_ms, stats.queries)
+        if total_ms >= self.slow_ms or stats.queries > self.slow_queries:
+            repeated = ''.join(f'\n  {count}x {sql[:300]}' for sql, count in stats.repeated())
+            logger.warning(
+                'Slow request: %s %s (%s) %d in %.0fms, %d queries / %.0fms db, %.0fms render%s',
+                request.method, request.path, route, response.status_code, total_ms,
+                stats.queries, db_ms, stats.render_seconds * 1000, repeated,
+            )
@@ -38,18 +38,21 @@ INSTALLED_APPS = [
     # 3rd Party Apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
-    'cloudinary',
-    'cloudinary_storage',
     
     # Your Apps
     'reviews',
     'blog',
     'faq',
     'patients',
+    'search',
+    'users',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware (see dental_backend/middleware.py)
+    'dental_backend.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -93,13 +96,31 @@ if os.environ.get('DB_ENGINE') == 'django.db.backends.postgresql':
             'PASSWORD': os.environ.get('DB_PASSWORD', ''),
             'HOST': os.environ.get('DB_HOST', 'localhost'),
             'PORT': os.environ.get('DB_PORT', '5432'),
+            # Reuse connections across requests instead of a new TCP+TLS handshake per request.
+            # Health checks make a reused connection that the pooler dropped reconnect transparently.
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+            # Needed behind a transaction-mode pooler (e.g. Supabase on port 6543)
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '10')),
+            },
         }
     }
+    if os.environ.get('DB_POOL', 'False') == 'True':
+        # In-process pool (Django 5.1+), requires psycopg 3: pip install "psycopg[binary,pool]".
+        # A pool replaces persistent connections, so CONN_MAX_AGE must be 0.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
         }
     }
 
@@ -140,22 +161,55 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
 
-# === CLOUDINARY STORAGE ===
+# === CLOUDINARY ===
+# Read by reviews.uploads.CloudinaryImageStorage, which imports and configures
+# the SDK on the first upload rather than on every worker boot.
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': os.environ.get('CLOUDINARY_CLOUD_NAME', 'o6wva9dj'),
     'API_KEY': os.environ.get('CLOUDINARY_API_KEY', '821266198547717'),
     'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET', ''),
 }
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
-import cloudinary
-cloudinary.config(
-    cloud_name=CLOUDINARY_STORAGE['CLOUD_NAME'],
-    api_key=CLOUDINARY_STORAGE['API_KEY'],
-    api_secret=CLOUDINARY_STORAGE['API_SECRET'],
-    secure=True,
-)
+# === CACHING ===
+# 'locmem' (per process), 'file' (shared by all workers on one host) or 'redis'.
+# Setting REDIS_URL implies 'redis'; it needs the optional `redis` package.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+# How long a cached public response (blog, FAQ, approved reviews) may live
+PUBLIC_CACHE_SECONDS = int(os.environ.get('PUBLIC_CACHE_SECONDS', '600'))
+
+# === REVIEW PHOTO UPLOADS ===
+# Backend used by reviews.uploads; 'reviews.uploads.LocalImageStorage' writes to MEDIA_ROOT instead.
+REVIEW_IMAGE_STORAGE = os.environ.get('REVIEW_IMAGE_STORAGE', 'reviews.uploads.CloudinaryImageStorage')
+# Background upload threads per process (0 = upload inline, after the request's transaction commits)
+REVIEW_UPLOAD_WORKERS = int(os.environ.get('REVIEW_UPLOAD_WORKERS', '4'))
+# Reviews still PENDING after this long lost their batch (worker restart/crash); fail_stale_uploads marks them FAILED
+REVIEW_UPLOAD_TIMEOUT_MINUTES = int(os.environ.get('REVIEW_UPLOAD_TIMEOUT_MINUTES', '15'))
+# Photos are capped to this many pixels on the longest side and rendered as WebP at these widths
+REVIEW_IMAGE_MAX_DIMENSION = int(os.environ.get('REVIEW_IMAGE_MAX_DIMENSION', '1600'))
+REVIEW_IMAGE_VARIANT_WIDTHS = (320, 800)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -180,8 +234,8 @@ SESSION_COOKIE_SECURE = False
 # === REST FRAMEWORK SETTINGS (NEW) ===
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        # This sets JWT as the main auth method
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # This sets JWT as the main auth method (request.user comes from a cache, see users/authentication.py)
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         # This makes all endpoints private by default
@@ -195,4 +249,34 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-}
\ No newline at end of file
+    # Rotated-out refresh tokens are rejected from memory after the first lookup
+    'TOKEN_REFRESH_SERIALIZER': 'users.authentication.CachedBlacklistRefreshSerializer',
+}
+
+# === REQUEST INSTRUMENTATION AND MONITORING ===
+# Server-Timing headers, slow-request logging and per-endpoint histograms (dental_backend/middleware.py)
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'True') == 'True'
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '500'))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', '50'))
+# /readyz fails a database or cache check that takes longer than this many seconds (dental_backend/health.py)
+HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', '2'))
+# Bearer token for /metrics scrapers (dental_backend/metrics.py). Without one, /metrics is
+# open only while DEBUG is on; staff sessions are always let in
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# === APPOINTMENT SCHEDULING ===
+# Clinic hours used by patients.scheduling to compute free slots.
+CLINIC_OPEN_TIME = os.environ.get('CLINIC_OPEN_TIME', '09:00')
+CLINIC_CLOSE_TIME = os.environ.get('CLINIC_CLOSE_TIME', '18:00')
+APPOINTMENT_SLOT_MINUTES = int(os.environ.get('APPOINTMENT_SLOT_MINUTES', '30'))
+# Monday=0 ... Sunday=6
+CLINIC_WORKING_DAYS = tuple(int(d) for d in os.environ.get('CLINIC_WORKING_DAYS', '0,1,2,3,4,5').split(','))
+# How long a worker trusts its in-memory copy of a day before re-reading it
+SCHEDULE_CACHE_SECONDS = int(os.environ.get('SCHEDULE_CACHE_SECONDS', '60'))
+
+# === DELTA SYNC ===
+# Re-send rows changed this many seconds before the previous cursor. Must exceed the longest transaction
+# that writes synced rows (requests are cut off after WEB_TIMEOUT, 30s); see patients/sync.py
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', '30'))
+# Deletions are remembered this long; older cursors get a full snapshot
+SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', '30'))
@@ -0,0 +1,75 @@
+"""
+Import-time profile of a cold start, for ``manage.py check_startup`` and the
+lazy-import test.
+
+``profile_startup()`` starts a fresh interpreter under ``python -X importtime``
+and does what a gunicorn worker does before its first request: it loads the
+WSGI application and the URLconf. The per-module report is then parsed.
+Integrations that are only needed for some requests (LAZY_MODULES) must not
+show up in it. They are imported on first use instead.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+STARTUP_CODE = (
+    'from dental_backend.wsgi import application; '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+# Cloudinary SDK (reviews.uploads) and Pillow (reviews.imaging): review photo uploads only
+LAZY_MODULES = ('cloudinary', 'cloudinary_storage', 'PIL')
+# Summed import time of the project, as reported by -X importtime (which inflates it a little)
+STARTUP_BUDGET_MS = 900
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| +(\S+)')
+
+
+@dataclass
+class StartupProfile:
+    wall_ms: float
+    modules: dict  # module -> microseconds spent in the module itself
+
+    @property
+    def import_ms(self):
+        return sum(self.modules.values()) / 1000
+
+    def packages(self):
+        """[(top-level package, ms)], slowest first."""
+        totals = {}
+        for module, spent in self.modules.items():
+            package = module.split('.')[0]
+            totals[package] = totals.get(package, 0) + spent
+        return sorted(((package, spent / 1000) for package, spent in totals.items()), key=lambda item: -item[1])
+
+    def imported(self, package):
+        return any(module == package or module.startswith(package + '.') for module in self.modules)
+
+
+def profile_startup(code=STARTUP_CODE):
+    env = {**os.environ}
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'dental_backend.settings')
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise RuntimeError('startup failed:\n' + result.stderr[-2000:])
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules[match.group(3)] = int(match.group(1))
+    return StartupProfile(wall_ms, modules)
+
+
+def best_profile(runs=3):
+    """The fastest of ``runs`` cold starts; the first may also be compiling .pyc files."""
+    return min((profile_startup() for _ in range(runs)), key=lambda profile: profile.import_ms)
@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from patients.models import Appointment, Patient
+
+from . import health
+from .metrics import counters
+from .middleware import RequestTimingMiddleware, timings
+from .startup import LAZY_MODULES, profile_startup
+
+
+class StartupTests(SimpleTestCase):
+    # Only the lazy imports are asserted here; the time budget depends on the
+    # machine, so it is enforced by ``manage.py check_startup`` instead.
+    def test_cold_start_is_lazy(self):
+        profile = profile_startup()
+        for package in LAZY_MODULES:
+            self.assertFalse(profile.imported(package), f'{package} is imported at startup')
+
+
+class RequestTimingTests(TestCase):
+    url = '/api/patients/appointments/'
+
+    def setUp(self):
+        timings.reset()
+        patient = User.objects.create_user('timed').patient_profile
+        for _ in range(3):
+            Appointment.objects.create(patient=patient, service_requested='Checkup')
+
+    def test_server_timing_counts_the_requests_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        # Read now: the next request's request_started signal clears connection.queries
+        count = len(queries)
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^db;desc="\d+ queries";dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn(f'desc="{count} queries"', header)
+
+        self.client.get(self.url)
+        stats = timings.snapshot()['GET appointment-list']
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['mean_queries'], count)
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    async def test_async_requests_count_queries_run_in_threads(self):
+        response = await self.async_client.get(self.url)
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    def test_slow_requests_log_repeated_sql(self):
+        def view(request):
+            for patient in Patient.objects.all():
+                list(patient.appointments.all())
+            return HttpResponse('ok')
+
+        middleware = RequestTimingMiddleware(view)
+        middleware.slow_queries = 1
+        with self.assertLogs('dental_backend.requests', 'WARNING') as logs:
+            middleware(RequestFactory().get('/n-plus-one/'))
+        self.assertIn('/n-plus-one/', logs.output[0])
+        self.assertIn('2 queries', logs.output[0])
+
+        Patient.objects.create(user=User.objects.create_user('staffish', is_staff=True))
+        with self.assertLogs('dental_backend.requests', 'WARNING') as logs:
+            middleware(RequestFactory().get('/n-plus-one/'))
+        self.assertRegex(logs.output[0], r'2x SELECT .*"patients_appointment"')
+
+
+    def test_render_time_is_counted_where_rendering_happens(self):
+        render = JSONRenderer.render
+
+        def slow_render(*args, **kwargs):
+            time.sleep(0.01)
+            return render(*args, **kwargs)
+
+        cache.clear()
+        with mock.patch.object(JSONRenderer, 'render', slow_render):
+            # A plain DRF view, and a cached view that renders before the middleware sees it
+            for url in (self.url, '/api/faq/categories/'):
+                header = self.client.get(url)['Server-Timing']
+                render_ms = float(re.search(r'render;dur=([\d.]+)', header).group(1))
+                self.assertGreaterEqual(render_ms, 10, url)
+
+    def test_streamed_bodies_are_recorded_when_they_close(self):
+        self.client.force_login(User.objects.create_user('exporter', is_staff=True))
+        response = self.client.get('/api/patients/export/appointments.csv')
+        self.assertNotIn('GET export', timings.snapshot())
+        # The header goes out first and only covers the queries run so far (auth)
+        before = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(response.streaming_content)
+        stats = timings.snapshot()['GET export']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(stats['mean_queries'], before + 1)
+
+
+class MonitoringTests(TestCase):
+
+    def setUp(self):
+        timings.reset()
+        counters.reset()
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_cover_requests_caches_and_appointments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(patient=User.objects.create_user('counted').patient_profile, service_requested='Checkup')
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'CONFIRMED'
+            appointment.save()
+        for _ in range(2):
+            self.client.get('/api/patients/appointments/')
+            self.client.get('/api/faq/categories/')
+
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        samples = dict(line.rsplit(' ', 1) for line in response.content.decode().splitlines() if line[0] != '#')
+        route = 'route="GET appointment-list"'
+        self.assertEqual(samples[f'http_requests_total{{{route},status="2xx"}}'], '2')
+        self.assertEqual(samples[f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'], '2')
+        self.assertEqual(samples[f'http_request_duration_seconds_count{{{route}}}'], '2')
+        self.assertEqual(samples['cache_hit_ratio{cache="response"}'], '0.5')
+        self.assertEqual(samples['appointments_total{event="appointment.created",status="PENDING"}'], '1')
+        self.assertEqual(samples['appointments_total{event="appointment.status",status="CONFIRMED"}'], '1')
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_without_a_token_are_closed_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_health_and_readiness(self):
+        self.assertEqual(self.client.get('/healthz').json(), {'status': 'ok'})
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({name: check['ok'] for name, check in response.json()['checks'].items()},
+                         {'database': True, 'cache': True})
+
+    @override_settings(HEALTH_CHECK_TIMEOUT=0.05)
+    def test_readiness_times_out_on_a_hung_dependency(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+        with mock.patch.dict(health.CHECKS, {'cache': lambda: released.wait(5)}):
+            started = timezone.now()
+            with self.assertLogs('dental_backend.health', 'WARNING') as logs:
+                response = self.client.get('/readyz')
+        self.assertLess((timezone.now() - started).total_seconds(), 1)
+        self.assertEqual(response.status_code, 503)
+        checks = response.json()['checks']
+        self.assertTrue(checks['database']['ok'])
+        self.assertEqual(checks['cache'], {'ok': False, 'ms': 50.0})
+        self.assertIn('cache timed out after 0.05s', logs.output[0])
+
+    def test_readiness_does_not_leak_failure_details(self):
+        def broken():
+            raise RuntimeError('could not connect to db.internal:5432 as admin')
+
+        with mock.patch.dict(health.CHECKS, {'database': broken}):
+            with self.assertLogs('dental_backend.health', 'ERROR') as logs:
+                response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(set(response.json()['checks']['database']), {'ok', 'ms'})
+        self.assertNotIn(b'db.internal', response.content)
+        self.assertIn('db.internal', logs.output[0])
@@ -6,6 +6,8 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .health import healthz, readyz
+from .metrics import metrics
 
 def home(request):
     return JsonResponse({
@@ -14,6 +16,7 @@ def home(request):
             "blog": "/api/blog/posts/",
             "faq": "/api/faq/categories/",
             "reviews": "/api/reviews/",
+            "search": "/api/search/?q=",
             "patients": "/api/patients/patients/" 
         }
     })
@@ -30,11 +33,17 @@ urlpatterns = [
     path('api/blog/', include('blog.urls')),
     path('api/faq/', include('faq.urls')),
     path('api/reviews/', include('reviews.urls')),
+    path('api/search/', include('search.urls')),
     
 
     # This connects all the new patient/doctor URLs
     path('api/patients/', include('patients.urls')), 
     
+    # --- Monitoring (dental_backend/health.py, dental_backend/metrics.py) ---
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
+    path('metrics', metrics, name='metrics'),
+
     # Root route
     path('', home),
 ]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class FaqConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'faq'
+
+    def ready(self):
+        # Public responses are cached; bump the cache version whenever these change
+        from dental_backend.caching import watch_models
+        from .models import FaqCategory, FaqItem
+        watch_models(FaqCategory, FaqItem)
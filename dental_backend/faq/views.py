@@ -3,11 +3,13 @@ from django.shortcuts import render
 # faq/views.py
 # faq/views.py
 from rest_framework import viewsets 
-from .models import FaqCategory 
+from .models import FaqCategory, FaqItem
 from .serializers import FaqCategorySerializer
 from rest_framework.permissions import AllowAny # <-- IMPORT THIS
+from dental_backend.caching import CachedResponseMixin
 
-class FaqCategoryViewSet(viewsets.ReadOnlyModelViewSet): 
+class FaqCategoryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (FaqCategory, FaqItem)
     queryset = FaqCategory.objects.prefetch_related('items').all() 
     serializer_class = FaqCategorySerializer
     permission_classes = [AllowAny] # <-- ADD THIS LINE
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Production server settings, read by gunicorn from the working directory:
+
+    gunicorn                      # app, workers and timeouts all come from here
+
+Environment variables (all optional):
+
+  WEB_WORKER_CLASS  gthread (default) | sync | uvicorn
+                    "uvicorn" serves dental_backend/asgi.py with
+                    uvicorn_worker.UvicornWorker. Use it for the SSE appointment
+                    stream. The other two serve dental_backend/wsgi.py.
+  WEB_CONCURRENCY   worker processes (default from the CPU count, see below)
+  WEB_THREADS       threads per gthread worker (default 4)
+  WEB_PRELOAD       import the app once in the master before forking (default True)
+  WEB_RELOAD        restart workers when code changes, for local use (default False;
+                    turns preloading off)
+  WEB_TIMEOUT       seconds before a silent worker is restarted (default 30)
+  WEB_KEEPALIVE     seconds an idle keep-alive connection stays open (default 5)
+  WEB_MAX_REQUESTS  recycle a worker after about this many requests (default 0 = never).
+                    Only for leak hunting: connections the old worker had
+                    accepted but not served are reset, and under uvicorn every
+                    open event stream (and its replay buffer) is lost.
+  WEB_ACCESS_LOG    access log file, "-" for stdout (default off)
+  PORT              port to bind on 0.0.0.0 (default 8000; Render sets it)
+"""
+import os
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn_worker.UvicornWorker',
+}
+
+# CPUs this process may run on, which in a container can be fewer than the host's
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+mode = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+if mode not in WORKER_CLASSES:
+    raise RuntimeError(f"WEB_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, not {mode!r}")
+
+worker_class = WORKER_CLASSES[mode]
+wsgi_app = 'dental_backend.asgi:application' if mode == 'uvicorn' else 'dental_backend.wsgi:application'
+
+# sync workers block on every database round trip, so they need the most
+# processes. gthread overlaps them with threads. An event loop worker only
+# needs one process per core.
+_default_workers = {'sync': 2 * cpus + 1, 'gthread': cpus + 1, 'uvicorn': cpus}[mode]
+workers = int(os.environ.get('WEB_CONCURRENCY', _default_workers))
+threads = int(os.environ.get('WEB_THREADS', '4')) if mode == 'gthread' else 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+reload = os.environ.get('WEB_RELOAD', 'False') == 'True'
+preload_app = os.environ.get('WEB_PRELOAD', 'True') == 'True' and not reload
+timeout = int(os.environ.get('WEB_TIMEOUT', '30'))
+graceful_timeout = timeout
+keepalive = int(os.environ.get('WEB_KEEPALIVE', '5'))
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# The worker heartbeat file lives in worker_tmp_dir; on a container's overlay
+# filesystem those writes can stall, so prefer tmpfs when there is one
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+
+
+def _open_connections():
+    from django.conf import settings
+    from django.db import connections
+
+    # Without preload_app the master never loads Django, so there is nothing to close
+    return connections.all(initialized_only=True) if settings.configured else []
+
+
+def pre_fork(server, worker):
+    # With preload_app the master has imported Django; anything that opened a
+    # database connection there (or a psycopg pool) must not be inherited:
+    # two processes sharing one socket corrupt each other's queries.
+    for connection in _open_connections():
+        connection.close()
+        # Only an existing pool; reading connection.pool would create one
+        if connection.alias in getattr(connection, '_connection_pools', {}):
+            connection.close_pool()
+
+
+def post_fork(server, worker):
+    # Drop any connection handles copied into the child; each worker (and
+    # each of its threads) opens its own on first use.
+    for connection in _open_connections():
+        connection.connection = None
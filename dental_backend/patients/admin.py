@@ -1,5 +1,43 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from .models import Patient, DentalHistory, Prescription, Appointment # <-- IMPORT Appointment
+from .search import ranked_patient_ids
+
+ADMIN_SEARCH_LIMIT = 500
+# Unfiltered changelists over tables bigger than this show PostgreSQL's row estimate
+APPROXIMATE_COUNT_ABOVE = 50_000
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate (pg_class.reltuples) as the count of an
+    unfiltered changelist instead of a COUNT(*) over the whole table. The
+    count is only a page total; a few percent off is fine. Filtered lists,
+    small tables and other databases count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            # -1 means the table was never analyzed
+            if row and row[0] >= APPROXIMATE_COUNT_ABOVE:
+                return int(row[0])
+        return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Changelist settings shared by the big patient-record tables."""
+    paginator = ApproximateCountPaginator
+    # "N results (M total)" would need a second, unfiltered COUNT(*)
+    show_full_result_count = False
 
 class PrescriptionInline(admin.TabularInline):
     """
@@ -20,12 +58,21 @@ class DentalHistoryInline(admin.TabularInline):
 
 # --- NEW ADMIN CLASS FOR APPOINTMENTS ---
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(ScalableAdmin):
     list_display = ('patient_link', 'service_requested', 'appointment_date', 'appointment_time', 'status', 'created_at')
-    list_filter = ('status', 'appointment_date', 'service_requested')
-    search_fields = ('patient__user__username', 'patient__user__first_name', 'patient__user__last_name', 'service_requested')
+    list_select_related = ('patient__user',)
+    # Both filters are backed by the appointment indexes; service_requested is free text and had one entry per value
+    list_filter = ('status', 'appointment_date')
+    search_fields = ('patient__user__username', 'patient__user__first_name', 'patient__user__last_name')
     readonly_fields = ('patient', 'created_at') 
 
+    def get_search_results(self, request, queryset, search_term):
+        # Patients come from the search index rather than icontains scans over auth_user. Only patients
+        # are searched: service_requested is free text with no usable index, so matching it scans the table.
+        if not search_term:
+            return queryset, False
+        return queryset.filter(patient_id__in=ranked_patient_ids(search_term, limit=ADMIN_SEARCH_LIMIT)), False
+
     def patient_link(self, obj):
         # Displays the patient's username, helping the staff identify the booking
         return obj.patient.user.username
@@ -33,22 +80,36 @@ class AppointmentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Patient)
-class PatientAdmin(admin.ModelAdmin):
+class PatientAdmin(ScalableAdmin):
     """
     Configuration for the Patient model in the admin panel.
     """
     list_display = ('user', 'phone', 'date_of_birth')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'phone')
     inlines = [DentalHistoryInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the patient search index instead of icontains scans over auth_user
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=ranked_patient_ids(search_term, limit=ADMIN_SEARCH_LIMIT)), False
+
 # We can also register the other models directly if needed
 @admin.register(DentalHistory)
-class DentalHistoryAdmin(admin.ModelAdmin):
+class DentalHistoryAdmin(ScalableAdmin):
     list_display = ('patient', 'visit_date', 'treatment_provided')
-    list_filter = ('visit_date', 'patient')
+    list_select_related = ('patient__user',)
+    # A 'patient' filter listed every patient in the sidebar; search for the patient with autocomplete instead
+    list_filter = ('visit_date',)
+    autocomplete_fields = ('patient',)
     inlines = [PrescriptionInline] # <-- THIS LINE IS GOOD, IT STAYS
 
 @admin.register(Prescription)
-class PrescriptionAdmin(admin.ModelAdmin):
+class PrescriptionAdmin(ScalableAdmin):
     list_display = ('medicine_name', 'dosage', 'history_entry')
+    # history_entry's __str__ follows history_entry -> patient -> user
+    list_select_related = ('history_entry__patient__user',)
+    raw_id_fields = ('history_entry',)
     search_fields = ('medicine_name',)
\ No newline at end of file
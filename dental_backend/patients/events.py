@@ -0,0 +1,118 @@
+"""
+In-process pub/sub for live appointment updates (Server-Sent Events).
+
+Staff dashboards open ``/api/patients/appointments/events/`` and keep the
+connection idle until something happens. The view is async, so under ASGI
+(uvicorn) each listener is an asyncio queue in the event loop instead of a
+blocked worker thread, and a thousand idle dashboards cost a thousand small
+queues.
+
+``broker.publish()`` is called from the Appointment signals after the
+transaction commits. Those run in a sync thread, so delivery is scheduled
+onto each subscriber's event loop with ``call_soon_threadsafe``. A
+subscriber that stops reading loses its oldest events rather than growing
+without bound.
+
+The most recent events are kept in a short replay buffer. A reconnecting
+browser sends ``Last-Event-ID`` and gets whatever it missed. If it was gone
+longer than the buffer covers, it should resync with ``/api/patients/sync/``.
+
+The broker lives in one process. Events reach only the listeners connected
+to the worker that handled the change, so serve the events endpoint from a
+single ASGI worker.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+QUEUE_SIZE = 100
+REPLAY_SIZE = 200
+
+
+def format_event(event_id, event_type, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+
+class Subscription:
+    """One connected listener: an asyncio queue bound to the loop that reads it."""
+
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, message):
+        # Runs on self.loop. A slow reader drops its oldest event, never blocks publishers.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker:
+
+    def __init__(self, queue_size=QUEUE_SIZE, replay_size=REPLAY_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._recent = deque(maxlen=replay_size)  # (event id, message)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id=None):
+        """
+        Registers a listener on the running event loop. Events after
+        ``last_event_id`` that are still in the replay buffer are queued first.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                for event_id, message in self._recent:
+                    if event_id > last_event_id:
+                        subscription.deliver(message)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        """Sends one event to every listener. Safe to call from any thread."""
+        with self._lock:
+            event_id = next(self._ids)
+            message = format_event(event_id, event_type, data)
+            self._recent.append((event_id, message))
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The listener's loop has shut down; it will never read again.
+                self.unsubscribe(subscription)
+        return event_id
+
+
+def appointment_payload(appointment, previous_status=None):
+    return {
+        'id': appointment.pk,
+        'patient': appointment.patient_id,
+        'service_requested': appointment.service_requested,
+        'appointment_date': appointment.appointment_date,
+        'appointment_time': appointment.appointment_time,
+        'status': appointment.status,
+        'previous_status': previous_status,
+        'updated_at': appointment.updated_at,
+    }
+
+
+broker = EventBroker()
@@ -0,0 +1,266 @@
+"""
+Bulk import of legacy patient records (``manage.py import_records``).
+
+Input is CSV or NDJSON with the same columns ``export_records`` writes, so
+an export from one clinic can be loaded into another:
+
+  patients       id, username, first_name, last_name, email, phone, date_of_birth, added_date
+  visits         id, patient_id, visit_date, treatment_provided, notes
+  prescriptions  id, visit_id, medicine_name, dosage, instructions
+
+``id`` is the row's id in the source system. ``patient_id`` and ``visit_id``
+refer to those source ids, not to ids in this database. Import patients
+first, then visits, then prescriptions.
+
+Rows are read lazily and written in batches. Each batch is a few
+``bulk_create`` INSERTs in one transaction:
+  * Users get unusable passwords from make_password(None). No hashing.
+  * No save() is called, so the per-row post_save signals never run. The
+    patient profile is created here directly. The search index is written
+    in bulk (patients.search.index_patients).
+  * An ImportedRecord maps each source id to the new object. It commits
+    with the batch, so a re-run after a crash skips finished rows and
+    resumes where the failed batch started. A patient whose username
+    already exists is linked to that patient rather than duplicated.
+Rows that fail validation are reported with their line number and skipped.
+"""
+import csv
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DentalHistory, ImportedRecord, Patient, Prescription
+from .search import index_patients
+
+BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'line {line}: {message}')
+
+
+def read_rows(stream, fmt):
+    """Yields (line number, dict) from an open text file."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ImportFormatError(f'line {number}: invalid JSON ({exc.msg})')
+    else:
+        raise ImportFormatError(f'Unknown format {fmt!r}')
+
+
+def _clean(model, name, raw):
+    """Converts one raw value for ``model.<name>`` and validates it (length, choices)."""
+    model_field = model._meta.get_field(name)
+    if raw is None or raw == '':
+        if model_field.null:
+            return None
+        return model_field.get_default()
+    value = model_field.to_python(raw)
+    model_field.run_validators(value)
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _clean_fields(model, row, names):
+    return {name: _clean(model, name, row.get(name)) for name in names}
+
+
+def _source_id(row):
+    value = row.get('id')
+    if value is None or str(value).strip() == '':
+        raise ValidationError('missing id')
+    return str(value).strip()
+
+
+class _Importer(ABC):
+    dataset = None
+    parent = None  # (column, dataset) the rows point at
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def run(self, rows, progress=None):
+        result = ImportResult()
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            result.rows += len(batch)
+            with transaction.atomic():
+                self.import_batch(batch, result)
+            if progress:
+                progress(result)
+        return result
+
+    def import_batch(self, batch, result):
+        pending = {}
+        for line, row in batch:
+            try:
+                source_id = _source_id(row)
+            except ValidationError as exc:
+                result.error(line, exc.messages[0])
+                continue
+            if source_id in pending:
+                result.error(line, f'duplicate id {source_id}')
+                continue
+            pending[source_id] = (line, row)
+
+        done = set(ImportedRecord.objects.filter(dataset=self.dataset, source_id__in=pending)
+                   .values_list('source_id', flat=True))
+        result.skipped += len(done)
+        for source_id in done:
+            del pending[source_id]
+        if not pending:
+            return
+
+        parents = {}
+        if self.parent:
+            column, parent_dataset = self.parent
+            wanted = {str(row.get(column, '')).strip() for _, row in pending.values()}
+            parents = dict(ImportedRecord.objects.filter(dataset=parent_dataset, source_id__in=wanted)
+                           .values_list('source_id', 'object_id'))
+
+        created = self.create(pending, parents, result)
+        ImportedRecord.objects.bulk_create(
+            ImportedRecord(dataset=self.dataset, source_id=source_id, object_id=pk)
+            for source_id, pk in created.items()
+        )
+
+    @abstractmethod
+    def create(self, pending, parents, result):
+        """Creates objects for ``pending`` {source id: (line, row)}; returns {source id: new pk}."""
+
+    def _parent_id(self, row, parents):
+        column, parent_dataset = self.parent
+        source = str(row.get(column, '')).strip()
+        if source not in parents:
+            raise ValidationError(f'unknown {column} {source!r} (import {parent_dataset} first)')
+        return parents[source]
+
+    def _build(self, pending, result, build):
+        objects = {}
+        for source_id, (line, row) in pending.items():
+            try:
+                objects[source_id] = build(row)
+            except ValidationError as exc:
+                result.error(line, '; '.join(exc.messages))
+        return objects
+
+
+class PatientImporter(_Importer):
+    dataset = 'patients'
+    USER_FIELDS = ('first_name', 'last_name', 'email')
+    PATIENT_FIELDS = ('phone', 'date_of_birth', 'added_date')
+
+    def create(self, pending, parents, result):
+        usernames = {}
+        for source_id, (line, row) in list(pending.items()):
+            username = str(row.get('username') or '').strip()
+            if not username or username in usernames.values():
+                result.error(line, 'missing username' if not username else f'duplicate username {username!r}')
+                del pending[source_id]
+                continue
+            usernames[source_id] = username
+
+        # Natural key: an existing account with the same username is linked, not duplicated
+        existing = {user.username: user for user in
+                    User.objects.filter(username__in=usernames.values()).select_related('patient_profile')}
+        linked = {}
+        for source_id, username in usernames.items():
+            user = existing.get(username)
+            if user is None:
+                continue
+            line = pending.pop(source_id)[0]
+            profile = getattr(user, 'patient_profile', None)
+            if profile is None:
+                result.error(line, f'username {username!r} belongs to a staff account')
+            else:
+                linked[source_id] = profile.pk
+                result.skipped += 1
+
+        def build(row):
+            user = User(username=str(row['username']).strip(), password=make_password(None),
+                        **_clean_fields(User, row, self.USER_FIELDS))
+            for name in ('username', 'email'):
+                User._meta.get_field(name).run_validators(getattr(user, name))
+            return user, Patient(**_clean_fields(Patient, row, self.PATIENT_FIELDS))
+
+        built = self._build(pending, result, build)
+        users = User.objects.bulk_create([user for user, _ in built.values()])
+        patients = []
+        for user, (_, patient) in zip(users, built.values()):
+            patient.user = user
+            patients.append(patient)
+        Patient.objects.bulk_create(patients)
+        index_patients(patients)
+        result.created += len(patients)
+        return {**linked, **{source_id: patient.pk for source_id, patient in zip(built, patients)}}
+
+
+class VisitImporter(_Importer):
+    dataset = 'visits'
+    parent = ('patient_id', 'patients')
+    FIELDS = ('visit_date', 'treatment_provided', 'notes')
+
+    def create(self, pending, parents, result):
+        built = self._build(pending, result, lambda row: DentalHistory(
+            patient_id=self._parent_id(row, parents), **_clean_fields(DentalHistory, row, self.FIELDS)))
+        visits = DentalHistory.objects.bulk_create(built.values())
+        result.created += len(visits)
+        return {source_id: visit.pk for source_id, visit in zip(built, visits)}
+
+
+class PrescriptionImporter(_Importer):
+    dataset = 'prescriptions'
+    parent = ('visit_id', 'visits')
+    FIELDS = ('medicine_name', 'dosage', 'instructions')
+
+    def create(self, pending, parents, result):
+        def build(row):
+            values = _clean_fields(Prescription, row, self.FIELDS)
+            if not values['medicine_name']:
+                raise ValidationError('missing medicine_name')
+            return Prescription(history_entry_id=self._parent_id(row, parents), **values)
+
+        built = self._build(pending, result, build)
+        prescriptions = Prescription.objects.bulk_create(built.values())
+        result.created += len(prescriptions)
+        return {source_id: item.pk for source_id, item in zip(built, prescriptions)}
+
+
+IMPORTERS = {
+    'patients': PatientImporter,
+    'visits': VisitImporter,
+    'prescriptions': PrescriptionImporter,
+}
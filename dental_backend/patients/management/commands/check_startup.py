@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dental_backend.startup import LAZY_MODULES, STARTUP_BUDGET_MS, best_profile
+
+
+class Command(BaseCommand):
+    help = ("Profiles a cold start (WSGI app + URLconf) with python -X importtime and fails if it is over "
+            "budget or imports an integration that should load lazily.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Slowest top-level packages to list.')
+        parser.add_argument('--runs', type=int, default=3, help='Cold starts to measure; the fastest is reported.')
+        parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+
+    def handle(self, *args, top=15, runs=3, budget_ms=STARTUP_BUDGET_MS, **options):
+        profile = best_profile(max(1, runs))
+        for package, spent in profile.packages()[:top]:
+            self.stdout.write(f'{spent:9.1f}ms  {package}')
+        self.stdout.write(f'{profile.import_ms:9.1f}ms  total import time ({len(profile.modules)} modules), '
+                          f'{profile.wall_ms:.0f}ms wall clock; budget {budget_ms:.0f}ms')
+
+        eager = [package for package in LAZY_MODULES if profile.imported(package)]
+        if eager:
+            raise CommandError(f"Imported at startup but should load on first use: {', '.join(eager)}")
+        if profile.import_ms > budget_ms:
+            raise CommandError(f'Startup import time {profile.import_ms:.0f}ms is over the {budget_ms:.0f}ms budget')
+        self.stdout.write(self.style.SUCCESS('Startup is within budget.'))
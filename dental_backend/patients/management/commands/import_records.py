@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from patients.importer import BATCH_SIZE, IMPORTERS, ImportFormatError, read_rows
+
+PROGRESS_EVERY = 50_000
+
+
+class Command(BaseCommand):
+    help = ("Bulk-loads patients, visits or prescriptions from CSV or NDJSON (export_records layout). "
+            "Safe to re-run: rows imported before are skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='fmt', choices=['csv', 'ndjson'],
+                            help='Input format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Rows written per transaction.')
+
+    def handle(self, *args, dataset, path, fmt=None, batch_size=BATCH_SIZE, **options):
+        fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt in ('json', 'jsonl'):
+            fmt = 'ndjson'
+        if fmt not in ('csv', 'ndjson'):
+            raise CommandError('Cannot tell the format from the file name; pass --format csv|ndjson.')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        started = time.perf_counter()
+        reported = 0
+
+        def progress(result):
+            nonlocal reported
+            if result.rows - reported >= PROGRESS_EVERY:
+                reported = result.rows
+                rate = result.rows / (time.perf_counter() - started)
+                self.stderr.write(f'{result.rows} rows ({result.created} created, {result.skipped} skipped, '
+                                  f'{result.failed} failed), {rate:.0f} rows/s')
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                result = IMPORTERS[dataset](batch_size).run(read_rows(stream, fmt), progress)
+        except (OSError, ImportFormatError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(self.style.WARNING(error))
+        if result.failed > len(result.errors):
+            self.stderr.write(self.style.WARNING(f'... and {result.failed - len(result.errors)} more'))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{dataset}: {result.rows} rows, {result.created} created, {result.skipped} already imported, '
+            f'{result.failed} failed in {elapsed:.1f}s ({result.rows / max(elapsed, 1e-9):.0f} rows/s).'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from patients.search import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the ?q= patient search index (search_text and prefix tokens)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} patients.'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0003_alter_appointment_appointment_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['-added_date', '-id'], name='patient_added_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Trigram index so LIKE '%term%' on search_text is an index scan. Needs the
+# pg_trgm extension (available on Supabase and most managed PostgreSQL).
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX patient_search_trgm_idx ON patients_patient USING GIN (search_text gin_trgm_ops)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS patient_search_trgm_idx",
+]
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_REVERSE:
+            schema_editor.execute(statement)
+
+
+def index_existing_patients(apps, schema_editor):
+    from patients.search import rebuild
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0007_patient_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(index_existing_patients, migrations.RunPython.noop),
+    ]
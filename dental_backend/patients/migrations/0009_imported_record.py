@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0008_patient_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(choices=[('patients', 'Patient'), ('visits', 'Dental history'), ('prescriptions', 'Prescription')], max_length=20)),
+                ('source_id', models.CharField(max_length=64)),
+                ('object_id', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'source_id'), name='imported_record_source_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0009_imported_record'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dentalhistory',
+            index=models.Index(fields=['visit_date'], name='history_visit_date_idx'),
+        ),
+    ]
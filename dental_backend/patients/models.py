@@ -7,15 +7,40 @@ class Patient(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     added_date = models.DateTimeField(default=timezone.now)
+    # Normalized name/username/email/phone for ?q= search (patients/search.py)
+    search_text = models.TextField(blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination in PatientCursorPagination
+            models.Index(fields=['-added_date', '-id'], name='patient_added_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name}" or self.user.username
 
+
+class PatientSearchToken(models.Model):
+    """
+    One normalized word a patient can be found by. Prefix searches on
+    databases without pg_trgm are range scans over the token index.
+    """
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Covers the search query, so it never has to read the table
+            models.Index(fields=['token', 'patient'], name='patient_search_token_idx'),
+        ]
+
 class DentalHistory(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='history')
     visit_date = models.DateTimeField(default=timezone.now)
     notes = models.TextField(blank=True, help_text="Notes from the visit")
     treatment_provided = models.CharField(max_length=500, blank=True)
+    # Change tracking for the ?since= sync endpoint
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Visit for {self.patient.user.username} on {self.visit_date.strftime('%Y-%m-%d')}"
@@ -23,12 +48,17 @@ class DentalHistory(models.Model):
     class Meta:
         ordering = ['-visit_date']
         verbose_name_plural = "Dental Histories"
+        indexes = [
+            # Default ordering and the admin's visit_date filter
+            models.Index(fields=['visit_date'], name='history_visit_date_idx'),
+        ]
 
 class Prescription(models.Model):
     history_entry = models.ForeignKey(DentalHistory, on_delete=models.CASCADE, related_name='prescriptions')
     medicine_name = models.CharField(max_length=200)
     dosage = models.CharField(max_length=100, blank=True, help_text="e.g., 500mg")
     instructions = models.CharField(max_length=500, blank=True, help_text="e.g., Twice a day after meals")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.medicine_name} ({self.dosage})"
@@ -53,11 +83,70 @@ class Appointment(models.Model):
     notes = models.TextField(blank=True, help_text="Reason for the visit or special request.")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['appointment_date', 'appointment_time']
         verbose_name_plural = "Appointments"
+        indexes = [
+            # Calendar range scans (?from=&to=) in the default ordering
+            models.Index(fields=['appointment_date', 'appointment_time'], name='appt_date_time_idx'),
+            # Status tabs combined with a date range (?status=&from=)
+            models.Index(fields=['status', 'appointment_date'], name='appt_status_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so a save can tell status changes apart (patients/events.py)
+        if 'status' in instance.__dict__:
+            instance._stored_status = instance.status
+        return instance
         
     def __str__(self):
         date_str = self.appointment_date if self.appointment_date else "Not Scheduled"
-        return f"Appointment for {self.patient.user.username} on {date_str}"
\ No newline at end of file
+        return f"Appointment for {self.patient.user.username} on {date_str}"
+
+
+class Tombstone(models.Model):
+    """
+    Marks a deleted appointment, visit or prescription so that sync clients
+    (see patients/sync.py) can drop it. Pruned by `manage.py prune_tombstones`.
+    """
+    MODEL_CHOICES = [
+        ('appointments', 'Appointment'),
+        ('history', 'Dental history'),
+        ('prescriptions', 'Prescription'),
+    ]
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Deleted {self.model} #{self.object_id}"
+
+
+class ImportedRecord(models.Model):
+    """
+    Maps a row id from a legacy/exported file to the object created for it
+    by `manage.py import_records`, so re-running an import skips what is
+    already there and visits/prescriptions can find their parents.
+    """
+    DATASET_CHOICES = [
+        ('patients', 'Patient'),
+        ('visits', 'Dental history'),
+        ('prescriptions', 'Prescription'),
+    ]
+
+    dataset = models.CharField(max_length=20, choices=DATASET_CHOICES)
+    source_id = models.CharField(max_length=64)
+    object_id = models.PositiveBigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'source_id'], name='imported_record_source_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset} {self.source_id} -> #{self.object_id}"
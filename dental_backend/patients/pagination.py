@@ -0,0 +1,44 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class PatientCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the patient directory.
+    Pages are addressed by an opaque cursor on (added_date, id) instead of
+    an OFFSET, so page 500 costs the same as page 1.
+    The first page also carries ``count`` (all patients) for headers and
+    dashboard totals; pages reached through ``next`` skip the COUNT.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-added_date', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        first_page = self.cursor_query_param not in request.query_params
+        self.count = queryset.count() if first_page else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        body = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            body = {'count': self.count, **body}
+        return Response(body)
+
+
+class AppointmentPagination(PageNumberPagination):
+    """
+    Opt-in page-number pagination for the appointment feed.
+    Calendar views that ask for a bounded ?from=&to= range get a plain list;
+    tabbed views pass ?page= and/or ?page_size= to get pages of 50 (max 500).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        if self.page_query_param not in request.query_params and \
+                self.page_size_query_param not in request.query_params:
+            return None
+        return super().get_page_size(request)
@@ -0,0 +1,30 @@
+"""
+Keeps every non-staff User paired with exactly one Patient profile.
+
+Single saves are handled by the User signals in patients/signals.py. They
+only write when a user is created, when ``is_staff`` flips, or when a
+non-staff user has lost their profile. ``bulk_create()`` sends no signals, so
+code that creates users in bulk calls ``ensure_patient_profiles`` afterwards.
+"""
+from .models import Patient
+from .search import index_patients
+
+
+def ensure_patient_profiles(users):
+    """Creates (and indexes) the missing profiles of non-staff ``users`` in bulk. Returns them."""
+    users = [user for user in users if not user.is_staff]
+    have = set(Patient.objects.filter(user__in=users).values_list('user_id', flat=True))
+    patients = Patient.objects.bulk_create(Patient(user=user) for user in users if user.pk not in have)
+    index_patients(patients)
+    return patients
+
+
+def sync_patient_profile(user, was_staff):
+    """Applies an ``is_staff`` change (``was_staff`` -> ``user.is_staff``) to the user's profile."""
+    if user.is_staff:
+        if was_staff is False:
+            # Promoted: staff have no patient record
+            Patient.objects.filter(user=user).delete()
+    elif getattr(user, 'patient_profile', None) is None:
+        # Demoted, or a profile that went missing
+        Patient.objects.create(user=user)
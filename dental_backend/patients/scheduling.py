@@ -0,0 +1,236 @@
+"""
+Slot-availability engine for appointment scheduling.
+
+Each clinic day is split into fixed-length slots (APPOINTMENT_SLOT_MINUTES
+between CLINIC_OPEN_TIME and CLINIC_CLOSE_TIME). A day is held in memory as
+an integer bitmap where bit i is set when slot i is booked, so "is this slot
+free" is a single bit test and "next N free slots" walks the clear bits of
+``full_mask & ~booked``.
+
+Days are loaded lazily from the database (one indexed query on
+appointment_date) and then kept up to date incrementally by the Appointment
+signals in ``patients/signals.py`` via ``availability.track()`` /
+``availability.forget()``. Loaded days expire after SCHEDULE_CACHE_SECONDS so
+that bookings made by other worker processes are picked up.
+"""
+import threading
+import time as _time
+from datetime import datetime, timedelta, time
+
+from django.conf import settings
+
+# Statuses that occupy a slot. A cancelled appointment frees its slot.
+BOOKED_STATUSES = ('PENDING', 'CONFIRMED', 'COMPLETED')
+
+
+class ClinicHours:
+    """Opening hours and slot length, plus the slot <-> time arithmetic."""
+
+    def __init__(self, open_time=time(9, 0), close_time=time(18, 0), slot_minutes=30,
+                 working_days=(0, 1, 2, 3, 4, 5)):
+        self.open_time = open_time
+        self.close_time = close_time
+        self.slot_minutes = slot_minutes
+        self.working_days = frozenset(working_days)
+        self._open_minutes = open_time.hour * 60 + open_time.minute
+        close_minutes = close_time.hour * 60 + close_time.minute
+        self.slots_per_day = max(0, (close_minutes - self._open_minutes) // slot_minutes)
+        self.full_mask = (1 << self.slots_per_day) - 1
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            open_time=_parse_time(getattr(settings, 'CLINIC_OPEN_TIME', '09:00')),
+            close_time=_parse_time(getattr(settings, 'CLINIC_CLOSE_TIME', '18:00')),
+            slot_minutes=int(getattr(settings, 'APPOINTMENT_SLOT_MINUTES', 30)),
+            working_days=getattr(settings, 'CLINIC_WORKING_DAYS', (0, 1, 2, 3, 4, 5)),
+        )
+
+    def is_open(self, day):
+        return day.weekday() in self.working_days
+
+    def slot_index(self, value):
+        """Returns the slot containing ``value`` (a time), or None outside hours."""
+        offset = value.hour * 60 + value.minute - self._open_minutes
+        if offset < 0:
+            return None
+        index = offset // self.slot_minutes
+        return index if index < self.slots_per_day else None
+
+    def slot_time(self, index):
+        minutes = self._open_minutes + index * self.slot_minutes
+        return time(minutes // 60, minutes % 60)
+
+
+class DaySchedule:
+    """Booked-slot bitmap for one day, with the appointment ids behind each bit."""
+    __slots__ = ('mask', 'owners', 'loaded_at')
+
+    def __init__(self, loaded_at):
+        self.mask = 0
+        self.owners = {}  # slot index -> set of appointment ids
+        self.loaded_at = loaded_at
+
+    def add(self, slot, appointment_id):
+        self.owners.setdefault(slot, set()).add(appointment_id)
+        self.mask |= 1 << slot
+
+    def remove(self, slot, appointment_id):
+        ids = self.owners.get(slot)
+        if not ids:
+            return
+        ids.discard(appointment_id)
+        if not ids:
+            del self.owners[slot]
+            self.mask &= ~(1 << slot)
+
+
+def _load_day_from_db(day):
+    from .models import Appointment
+    return Appointment.objects.filter(
+        appointment_date=day,
+        appointment_time__isnull=False,
+        status__in=BOOKED_STATUSES,
+    ).values_list('id', 'appointment_time')
+
+
+class AvailabilityEngine:
+    """
+    In-process index of booked slots.
+    ``loader(day)`` returns (appointment_id, appointment_time) pairs for one day.
+    """
+
+    def __init__(self, hours=None, ttl=None, loader=_load_day_from_db):
+        self._hours = hours
+        self._ttl = ttl
+        self._loader = loader
+        self._days = {}
+        self._booked = {}  # appointment id -> (date, slot index)
+        self._lock = threading.RLock()
+
+    @property
+    def hours(self):
+        if self._hours is None:
+            self._hours = ClinicHours.from_settings()
+        return self._hours
+
+    @property
+    def ttl(self):
+        if self._ttl is None:
+            self._ttl = float(getattr(settings, 'SCHEDULE_CACHE_SECONDS', 60))
+        return self._ttl
+
+    # --- Queries ---
+
+    def is_free(self, day, at):
+        hours = self.hours
+        slot = hours.slot_index(at)
+        if slot is None or not hours.is_open(day):
+            return False
+        return not (self._day(day).mask >> slot) & 1
+
+    def free_slots(self, day):
+        """All free slot start times on ``day``."""
+        hours = self.hours
+        if not hours.is_open(day):
+            return []
+        return [hours.slot_time(i) for i in _clear_bits(self._day(day).mask, hours.full_mask)]
+
+    def next_free(self, after, count=5, horizon_days=90):
+        """The next ``count`` free slot start datetimes strictly after ``after``."""
+        hours = self.hours
+        results = []
+        day = after.date()
+        # First slot on the starting day whose start time is after ``after``.
+        elapsed = (after.hour * 60 + after.minute + (after.second + after.microsecond / 1e6) / 60
+                   - hours._open_minutes)
+        first_slot = 0 if elapsed < 0 else min(int(elapsed // hours.slot_minutes) + 1, hours.slots_per_day)
+
+        for _ in range(horizon_days):
+            if hours.is_open(day):
+                window = hours.full_mask & ~((1 << first_slot) - 1)
+                for slot in _clear_bits(self._day(day).mask, window):
+                    results.append(datetime.combine(day, hours.slot_time(slot)))
+                    if len(results) == count:
+                        return results
+            day += timedelta(days=1)
+            first_slot = 0
+        return results
+
+    # --- Incremental maintenance ---
+
+    def track(self, appointment):
+        """Re-indexes one appointment after it was created, rescheduled, confirmed or cancelled."""
+        with self._lock:
+            self._discard(appointment.pk)
+            if appointment.status not in BOOKED_STATUSES:
+                return
+            if appointment.appointment_date is None or appointment.appointment_time is None:
+                return
+            schedule = self._days.get(appointment.appointment_date)
+            slot = self.hours.slot_index(appointment.appointment_time)
+            if schedule is None or slot is None:
+                # Unloaded days are read fresh from the database on first use.
+                return
+            schedule.add(slot, appointment.pk)
+            self._booked[appointment.pk] = (appointment.appointment_date, slot)
+
+    def forget(self, appointment_id):
+        with self._lock:
+            self._discard(appointment_id)
+
+    def reset(self):
+        with self._lock:
+            self._days.clear()
+            self._booked.clear()
+
+    # --- Internals ---
+
+    def _discard(self, appointment_id):
+        entry = self._booked.pop(appointment_id, None)
+        if entry is not None:
+            day, slot = entry
+            schedule = self._days.get(day)
+            if schedule is not None:
+                schedule.remove(slot, appointment_id)
+
+    def _day(self, day):
+        schedule = self._days.get(day)
+        now = _time.monotonic()
+        if schedule is not None and now - schedule.loaded_at < self.ttl:
+            return schedule
+        rows = list(self._loader(day))
+        with self._lock:
+            stale = self._days.pop(day, None)
+            if stale is not None:
+                for ids in stale.owners.values():
+                    for appointment_id in ids:
+                        self._booked.pop(appointment_id, None)
+            schedule = DaySchedule(now)
+            for appointment_id, at in rows:
+                slot = self.hours.slot_index(at)
+                if slot is not None:
+                    schedule.add(slot, appointment_id)
+                    self._booked[appointment_id] = (day, slot)
+            self._days[day] = schedule
+        return schedule
+
+
+def _clear_bits(mask, window):
+    """Yields the indexes of bits set in ``window`` but not in ``mask``, lowest first."""
+    free = window & ~mask
+    while free:
+        low = free & -free
+        yield low.bit_length() - 1
+        free ^= low
+
+
+def _parse_time(value):
+    if isinstance(value, time):
+        return value
+    hour, minute = value.split(':')
+    return time(int(hour), int(minute))
+
+
+# Shared engine used by the API and kept current by patients.signals
+availability = AvailabilityEngine()
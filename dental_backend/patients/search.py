@@ -0,0 +1,193 @@
+"""
+Patient lookup for the doctor dashboard (``GET /api/patients/patients/?q=``).
+
+Every patient carries ``search_text``: first name, last name, username,
+email and phone digits, lower-cased with accents removed. Queries are
+normalized the same way, so "José" finds "jose" and "555-0100" finds
+"5550100".
+
+PostgreSQL: a pg_trgm GIN index on ``search_text`` (migration 0008) serves
+``LIKE '%term%'`` for each query term, so any substring matches. Results are
+ranked by trigram word similarity.
+
+Other databases (SQLite in development): ``PatientSearchToken`` holds one row
+per normalized word, indexed on ``token``. Each query term becomes an indexed
+range scan (``token >= 'ann' AND token < 'ano'``), so words match by prefix.
+Phone numbers are stored as all their suffixes, so any run of digits matches.
+Patients must match every term. Exact word matches rank above prefix matches.
+
+The index is refreshed by the Patient and User post_save signals, and
+rebuilt with ``python manage.py rebuild_patient_search``.
+"""
+import re
+import unicodedata
+
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from .models import Patient, PatientSearchToken
+
+MAX_TOKEN_LENGTH = 64
+MAX_TERMS = 5
+MIN_TERM_LENGTH = 2
+MIN_PHONE_DIGITS = 4
+DEFAULT_LIMIT = 20
+
+_WORD_RE = re.compile(r'\w+')
+_PHONE_QUERY_RE = re.compile(r'^[\d\s()+.-]+$')
+
+
+def normalize(value):
+    """Lower-case, accent-free text."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _digits(value):
+    return ''.join(c for c in value or '' if c.isdigit())
+
+
+def patient_tokens(patient):
+    """The normalized words a patient can be found by."""
+    user = patient.user
+    tokens = set()
+    for value in (user.first_name, user.last_name, user.username, user.email):
+        tokens.update(_WORD_RE.findall(normalize(value)))
+    # Every phone suffix, so a prefix scan finds digits anywhere in the number
+    # (with or without country and area code)
+    phone = _digits(patient.phone)
+    if phone:
+        tokens.update(phone[i:] for i in range(max(1, len(phone) - MIN_PHONE_DIGITS + 1)))
+    return sorted(token[:MAX_TOKEN_LENGTH] for token in tokens)
+
+
+# User fields that feed search_text; saves touching none of them skip re-indexing
+SEARCHED_USER_FIELDS = frozenset({'first_name', 'last_name', 'username', 'email'})
+
+
+def patient_search_text(patient):
+    user = patient.user
+    parts = [user.first_name, user.last_name, user.username, user.email, _digits(patient.phone)]
+    return ' '.join(normalize(part) for part in parts if part)
+
+
+def query_terms(query):
+    """
+    Normalized search terms. Single letters (and phone fragments under
+    MIN_PHONE_DIGITS) are dropped: they match most patients and say little.
+    """
+    if _PHONE_QUERY_RE.match(query):
+        digits = _digits(query)
+        return [digits] if len(digits) >= MIN_PHONE_DIGITS else []
+    words = (word[:MAX_TOKEN_LENGTH] for word in _WORD_RE.findall(normalize(query)))
+    return list(dict.fromkeys(word for word in words if len(word) >= MIN_TERM_LENGTH))[:MAX_TERMS]
+
+
+def index_patient(patient, force=False):
+    """Refreshes one patient's search data. A no-op when nothing searchable changed."""
+    text = patient_search_text(patient)
+    if text == patient.search_text and not force:
+        return
+    with transaction.atomic():
+        Patient.objects.filter(pk=patient.pk).update(search_text=text)
+        if connection.vendor != 'postgresql':
+            PatientSearchToken.objects.filter(patient=patient).delete()
+            PatientSearchToken.objects.bulk_create(
+                PatientSearchToken(patient=patient, token=token) for token in patient_tokens(patient)
+            )
+    patient.search_text = text
+
+
+def rebuild(apps=global_apps, batch_size=2000):
+    """Re-indexes every patient. Returns the number of patients indexed."""
+    Patient = apps.get_model('patients', 'Patient')
+    Token = apps.get_model('patients', 'PatientSearchToken')
+    if connection.vendor != 'postgresql':
+        Token.objects.all().delete()
+    count, batch = 0, []
+    for patient in Patient.objects.select_related('user').order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(patient)
+        if len(batch) >= batch_size:
+            count += index_patients(batch, apps=apps)
+            batch = []
+    return count + index_patients(batch, apps=apps)
+
+
+def index_patients(patients, apps=global_apps):
+    """
+    Writes search data for new patients (user loaded) in bulk, for imports
+    and rebuilds. Existing tokens are not cleared.
+    """
+    # Plain executemany: at one text column and ~10 token rows per patient,
+    # bulk_update()'s CASE expressions and model instances dominate the cost.
+    Patient = apps.get_model('patients', 'Patient')
+    Token = apps.get_model('patients', 'PatientSearchToken')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {Patient._meta.db_table} SET search_text = %s WHERE id = %s',
+            [(patient_search_text(patient), patient.pk) for patient in patients],
+        )
+        if connection.vendor != 'postgresql':
+            cursor.executemany(
+                f'INSERT INTO {Token._meta.db_table} (patient_id, token) VALUES (%s, %s)',
+                [(patient.pk, token) for patient in patients for token in patient_tokens(patient)],
+            )
+    return len(patients)
+
+
+def _next_prefix(term):
+    # Smallest string greater than every string starting with ``term``
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def _ranked_ids_postgres(terms, limit):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_text__contains=term)
+    return list(
+        Patient.objects.filter(condition)
+        .annotate(rank=TrigramWordSimilarity(' '.join(terms), 'search_text'))
+        .order_by('-rank', '-added_date')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+
+def _ranked_ids_tokens(terms, limit):
+    ranges = [Q(token__gte=term, token__lt=_next_prefix(term)) for term in terms]
+    any_range, annotations = Q(), {}
+    for i, (term, in_range) in enumerate(zip(terms, ranges)):
+        any_range |= in_range
+        annotations[f'matched{i}'] = Max(Case(When(in_range, then=Value(1)), default=Value(0),
+                                              output_field=IntegerField()))
+        annotations[f'exact{i}'] = Max(Case(When(token=term, then=Value(1)), default=Value(0),
+                                            output_field=IntegerField()))
+    rank = sum((F(f'exact{i}') for i in range(1, len(terms))), F('exact0'))
+    return list(
+        PatientSearchToken.objects.filter(any_range)
+        .values('patient_id')
+        .annotate(**annotations)
+        .filter(**{f'matched{i}': 1 for i in range(len(terms))})
+        .annotate(rank=rank)
+        .order_by('-rank', '-patient_id')
+        .values_list('patient_id', flat=True)[:limit]
+    )
+
+
+def ranked_patient_ids(query, limit=DEFAULT_LIMIT):
+    """Ids of the best matches for ``query``, most relevant first."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'postgresql':
+        return _ranked_ids_postgres(terms, limit)
+    return _ranked_ids_tokens(terms, limit)
+
+
+def search_patients(query, limit=DEFAULT_LIMIT):
+    """Best matches for ``query`` (with user loaded), most relevant first."""
+    ids = ranked_patient_ids(query, limit)
+    patients = Patient.objects.select_related('user').in_bulk(ids)
+    return [patients[pk] for pk in ids if pk in patients]
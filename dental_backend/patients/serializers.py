@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
 from .models import Patient, DentalHistory, Prescription, Appointment
+from .transitions import MAX_APPOINTMENTS
 from users.serializers import UserSerializer
 
 # --- 1. MOVED TO TOP: AppointmentSerializer ---
@@ -65,6 +67,17 @@ class PatientSerializer(serializers.ModelSerializer):
             'appointments' # <-- Added to fields list
         ]
 
+class PatientListSerializer(serializers.ModelSerializer):
+    """
+    Slim representation for the patient directory.
+    Leaves out the nested history/appointments; fetch the detail route for those.
+    """
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Patient
+        fields = ['id', 'user', 'phone', 'date_of_birth', 'added_date']
+
 class DentalHistoryCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = DentalHistory
@@ -75,6 +88,65 @@ class PrescriptionCreateSerializer(serializers.ModelSerializer):
         model = Prescription
         fields = ['history_entry', 'medicine_name', 'dosage', 'instructions']
 
+class VisitPrescriptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Prescription
+        fields = ['id', 'medicine_name', 'dosage', 'instructions']
+
+class VisitBatchListSerializer(serializers.ListSerializer):
+    """
+    Creates a batch of visits and their prescriptions with two bulk INSERTs.
+    Patient ids are checked with one query for the whole batch.
+    """
+
+    def to_internal_value(self, data):
+        # Errors raised here stay indexed per visit (validate() would flatten them)
+        attrs = super().to_internal_value(data)
+        patient_ids = {visit['patient_id'] for visit in attrs}
+        known = set(Patient.objects.filter(pk__in=patient_ids).values_list('pk', flat=True))
+        errors = [
+            {} if visit['patient_id'] in known else {'patient': [f'Invalid pk "{visit["patient_id"]}" - object does not exist.']}
+            for visit in attrs
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            visits = DentalHistory.objects.bulk_create([
+                DentalHistory(**{k: v for k, v in data.items() if k != 'prescriptions'})
+                for data in validated_data
+            ])
+            prescriptions = [
+                Prescription(history_entry=visit, **item)
+                for visit, data in zip(visits, validated_data)
+                for item in data.get('prescriptions', ())
+            ]
+            Prescription.objects.bulk_create(prescriptions)
+        by_visit = {}
+        for prescription in prescriptions:
+            by_visit.setdefault(prescription.history_entry_id, []).append(prescription)
+        for visit in visits:
+            # Serve the response from memory rather than re-querying
+            visit._prefetched_objects_cache = {'prescriptions': by_visit.get(visit.pk, [])}
+        return visits
+
+class VisitBatchSerializer(serializers.ModelSerializer):
+    """
+    One visit with its prescriptions, for history/batch/. Always used with
+    many=True, so a single visit and a back-fill of paper records share the
+    same bulk path.
+    """
+    patient = serializers.IntegerField(source='patient_id')
+    visit_date = serializers.DateTimeField(required=False)
+    prescriptions = VisitPrescriptionSerializer(many=True, required=False)
+
+    class Meta:
+        model = DentalHistory
+        fields = ['id', 'patient', 'visit_date', 'notes', 'treatment_provided', 'prescriptions']
+        list_serializer_class = VisitBatchListSerializer
+
 class AppointmentCreateSerializer(serializers.ModelSerializer):
     # Allow nulls for the initial request
     appointment_date = serializers.DateField(required=False, allow_null=True)
@@ -84,6 +156,49 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         model = Appointment
         fields = ['id', 'service_requested', 'appointment_date', 'appointment_time', 'notes']
 
+class BulkStatusSerializer(serializers.Serializer):
+    """
+    Input for the bulk-status action: a target status plus either a list of
+    ids or a date range (inclusive), optionally narrowed to a time window
+    [time_from, time_to) on each day, e.g. to cancel an afternoon.
+    """
+    status = serializers.ChoiceField(choices=Appointment.STATUS_CHOICES)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False,
+                                allow_empty=False, max_length=MAX_APPOINTMENTS)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    time_from = serializers.TimeField(required=False)
+    time_to = serializers.TimeField(required=False)
+
+    def validate(self, attrs):
+        has_range = any(key in attrs for key in ('date_from', 'date_to', 'time_from', 'time_to'))
+        if ('ids' in attrs) == has_range:
+            raise serializers.ValidationError('Send either "ids" or a date range, not both.')
+        if has_range and 'date_from' not in attrs:
+            raise serializers.ValidationError({'date_from': 'Required when selecting by date.'})
+        if not has_range:
+            return attrs
+        attrs.setdefault('date_to', attrs['date_from'])
+        if attrs['date_to'] < attrs['date_from']:
+            raise serializers.ValidationError({'date_to': 'Must not be before date_from.'})
+        return attrs
+
+# --- SYNC SERIALIZERS (flat rows, see patients/sync.py) ---
+
+class AppointmentSyncSerializer(AppointmentSerializer):
+    class Meta(AppointmentSerializer.Meta):
+        fields = AppointmentSerializer.Meta.fields + ['updated_at']
+
+class DentalHistorySyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DentalHistory
+        fields = ['id', 'patient', 'visit_date', 'notes', 'treatment_provided', 'updated_at']
+
+class PrescriptionSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Prescription
+        fields = ['id', 'history_entry', 'medicine_name', 'dosage', 'instructions', 'updated_at']
+
 class PatientUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Patient
@@ -1,26 +1,98 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Patient
+from dental_backend.metrics import counters
+from .models import Patient, Appointment, DentalHistory, Prescription, Tombstone
+from .scheduling import availability
+from .events import appointment_payload, broker
+from .profiles import sync_patient_profile
+from .search import SEARCHED_USER_FIELDS, index_patient
+
+@receiver(post_init, sender=User)
+def remember_is_staff(sender, instance, **kwargs):
+    # Lets sync_user_profile tell a promotion from an ordinary save
+    instance._stored_is_staff = instance.is_staff
 
 @receiver(post_save, sender=User)
-def create_patient_profile(sender, instance, created, **kwargs):
+def sync_user_profile(sender, instance, created, update_fields=None, **kwargs):
     """
-    A signal that automatically creates a Patient profile
-    as soon as a new User is created.
+    A signal that automatically creates a Patient profile as soon as a new
+    (non-staff) User is created, and removes it when the user becomes
+    staff. Saves that leave is_staff alone, like the last_login update on
+    every login, write nothing.
     """
+    was_staff = getattr(instance, '_stored_is_staff', None)
+    instance._stored_is_staff = instance.is_staff
     if created:
-        # We only create a profile for non-staff users
         if not instance.is_staff:
             Patient.objects.create(user=instance)
+    elif update_fields is None or 'is_staff' in update_fields:
+        sync_patient_profile(instance, was_staff)
+
+
+@receiver(post_save, sender=Patient)
+def index_patient_for_search(sender, instance, raw=False, **kwargs):
+    """Keeps ?q= patient search current when a phone number changes."""
+    if not raw:
+        index_patient(instance)
 
 @receiver(post_save, sender=User)
-def save_patient_profile(sender, instance, **kwargs):
+def index_user_for_search(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keeps ?q= patient search current when a name, username or email changes."""
+    if raw or instance.is_staff:
+        return  # staff have no profile (see sync_user_profile)
+    if update_fields is not None and not SEARCHED_USER_FIELDS.intersection(update_fields):
+        return
+    patient = getattr(instance, 'patient_profile', None)
+    if patient is not None:
+        index_patient(patient)
+
+
+@receiver(post_save, sender=Appointment)
+def track_appointment_slot(sender, instance, **kwargs):
+    """
+    Keeps the slot-availability index current when an appointment is
+    booked, rescheduled, confirmed or cancelled.
+    """
+    transaction.on_commit(lambda: availability.track(instance))
+
+@receiver(post_save, sender=Appointment)
+def publish_appointment_event(sender, instance, created, raw=False, **kwargs):
     """
-    Saves the patient profile on user save.
-    If a user has become staff, remove their patient profile.
+    Pushes new bookings and status changes to live dashboards
+    (the SSE stream in patients/events.py) once the change is committed.
     """
-    if instance.is_staff:
-        Patient.objects.filter(user=instance).delete()
-    elif hasattr(instance, 'patient_profile'):
-        instance.patient_profile.save()
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_stored_status', None)
+    instance._stored_status = instance.status
+    if created:
+        event_type = 'appointment.created'
+    elif previous != instance.status:
+        event_type = 'appointment.status'
+    else:
+        return
+    payload = appointment_payload(instance, previous)
+    transaction.on_commit(lambda: broker.publish(event_type, payload))
+    status = instance.status
+    transaction.on_commit(lambda: counters.inc('appointments_total', event=event_type, status=status))
+
+@receiver(post_delete, sender=Appointment)
+def release_appointment_slot(sender, instance, **kwargs):
+    appointment_id = instance.pk
+    transaction.on_commit(lambda: availability.forget(appointment_id))
+
+
+# Sync tombstones: lets ?since= clients learn about deletions
+TOMBSTONE_MODELS = {
+    Appointment: 'appointments',
+    DentalHistory: 'history',
+    Prescription: 'prescriptions',
+}
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=TOMBSTONE_MODELS[sender], object_id=instance.pk)
+
+for _model in TOMBSTONE_MODELS:
+    post_delete.connect(record_tombstone, sender=_model, dispatch_uid=f'sync-tombstone-{_model.__name__}')
@@ -0,0 +1,83 @@
+"""
+Delta sync for the staff dashboard.
+
+GET /api/patients/sync/ returns a full snapshot plus a cursor. Passing that
+cursor back as ?since= returns only the appointments, visits and
+prescriptions whose `updated_at` moved since then, plus the ids deleted since
+then (from Tombstone rows).
+
+The cursor is an opaque encoding of the server time at which the previous
+response started, minus SYNC_OVERLAP_SECONDS. The overlap catches rows from
+transactions that were still open at that moment; clients apply rows by id,
+so receiving a row twice is harmless.
+
+`updated_at` is stamped when a row is saved, not when its transaction
+commits. A transaction that commits more than SYNC_OVERLAP_SECONDS after
+stamping a row is invisible to a client that synced in between, and that
+client misses the row until it changes again. The default (30s) matches
+the gunicorn request timeout, which bounds every transaction a request
+opens; raise it if longer-running jobs write synced rows. Cursors older than the tombstone
+retention (SYNC_TOMBSTONE_DAYS) can no longer report deletions, so the server
+answers them with a full snapshot and `reset: true`.
+"""
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Appointment, DentalHistory, Prescription, Tombstone
+from .serializers import AppointmentSyncSerializer, DentalHistorySyncSerializer, PrescriptionSyncSerializer
+
+# response key -> (queryset, serializer); keys match Tombstone.model values
+SYNCED = {
+    'appointments': (Appointment.objects.select_related('patient__user'), AppointmentSyncSerializer),
+    'history': (DentalHistory.objects.all(), DentalHistorySyncSerializer),
+    'prescriptions': (Prescription.objects.all(), PrescriptionSyncSerializer),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        moment = parse_datetime(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        moment = None
+    if moment is None or timezone.is_naive(moment):
+        raise InvalidCursor(cursor)
+    return moment
+
+
+def changes_since(since=None):
+    started = timezone.now()
+    overlap = timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 30))
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+    reset = since is None or since < started - retention
+
+    payload = {'cursor': encode_cursor(started - overlap), 'reset': reset}
+    deleted = {key: [] for key in SYNCED}
+    for key, (queryset, serializer_class) in SYNCED.items():
+        if not reset:
+            queryset = queryset.filter(updated_at__gte=since)
+        payload[key] = serializer_class(queryset.order_by('updated_at', 'id'), many=True).data
+    if not reset:
+        tombstones = Tombstone.objects.filter(deleted_at__gte=since).values_list('model', 'object_id')
+        for model, object_id in tombstones:
+            deleted[model].append(object_id)
+    payload['deleted'] = deleted
+    return payload
+
+
+def prune_tombstones():
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -1,3 +1,616 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dental_backend.metrics import counters
+
+from .events import broker
+from .models import Patient, PatientSearchToken, DentalHistory, Prescription, Appointment, Tombstone, ImportedRecord
+from .profiles import ensure_patient_profiles
+from .scheduling import AvailabilityEngine, ClinicHours, availability
+from .search import search_patients
+from .sync import encode_cursor
+
+
+def make_patient(username, **kwargs):
+    """Creates a user; the post_save signal creates the Patient profile."""
+    user = User.objects.create_user(username=username, **kwargs)
+    return user.patient_profile
+
+
+class PatientViewSetTests(TestCase):
+    list_url = '/api/patients/patients/'
+
+    def test_list_is_slim_and_cursor_paginated(self):
+        base = timezone.now()
+        for i in range(5):
+            patient = make_patient(f'patient{i}')
+            Patient.objects.filter(pk=patient.pk).update(added_date=base - timedelta(days=i))
+
+        with self.assertNumQueries(2):  # COUNT, page
+            response = self.client.get(self.list_url, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual([p['user']['username'] for p in data['results']], ['patient0', 'patient1'])
+        self.assertNotIn('history', data['results'][0])
+        self.assertIsNotNone(data['next'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(data['next'])
+        self.assertEqual([p['user']['username'] for p in response.json()['results']], ['patient2', 'patient3'])
+        self.assertNotIn('count', response.json())
+
+    def test_following_next_reaches_every_patient(self):
+        users = User.objects.bulk_create(User(username=f'bulk{i:03}', password='!') for i in range(120))
+        ensure_patient_profiles(users)
+
+        data = self.client.get(self.list_url).json()
+        self.assertEqual(data['count'], 120)
+        seen = [p['id'] for p in data['results']]
+        self.assertEqual(len(seen), 50)
+        while data['next']:
+            data = self.client.get(data['next']).json()
+            seen += [p['id'] for p in data['results']]
+        self.assertEqual(sorted(seen), sorted(Patient.objects.values_list('pk', flat=True)))
+
+    def test_detail_query_count_is_fixed(self):
+        patient = make_patient('busy', first_name='Busy', last_name='Patient')
+        for i in range(10):
+            visit = DentalHistory.objects.create(patient=patient, treatment_provided=f'Visit {i}')
+            Prescription.objects.create(history_entry=visit, medicine_name='Amoxicillin')
+            Prescription.objects.create(history_entry=visit, medicine_name='Ibuprofen')
+            Appointment.objects.create(patient=patient, service_requested='Cleaning')
+
+        with self.assertNumQueries(4):
+            response = self.client.get(f'{self.list_url}{patient.pk}/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['history']), 10)
+        self.assertEqual(len(data['history'][0]['prescriptions']), 2)
+        self.assertEqual(len(data['appointments']), 10)
+        self.assertEqual(data['appointments'][0]['patient_name'], 'Busy Patient')
+
+    def test_search_ranks_exact_words_first(self):
+        make_patient('annabel', first_name='Annabel', last_name='Smith')
+        make_patient('ann', first_name='Ann', last_name='Smith', email='ann@example.com')
+        make_patient('jose', first_name='José', last_name='Núñez')
+        other = make_patient('bob', first_name='Bob', last_name='Jones')
+        other.phone = '+1 (555) 010-0199'
+        other.save()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.list_url, {'q': 'ann smi'})
+        self.assertEqual([p['user']['username'] for p in response.json()['results']], ['ann', 'annabel'])
+        self.assertEqual(self.search('nunez'), ['jose'])
+        self.assertEqual(self.search('555-0100'), ['bob'])
+        self.assertEqual(self.search('zzz'), [])
+
+        # Renames are picked up by the User signal
+        user = User.objects.get(username='annabel')
+        user.last_name = 'Jones'
+        user.save()
+        self.assertEqual(self.search('jones'), ['annabel', 'bob'])
+
+    def test_rebuild_command_restores_the_index(self):
+        make_patient('carol', first_name='Carol')
+        PatientSearchToken.objects.all().delete()
+        self.assertEqual(self.search('carol'), [])
+        call_command('rebuild_patient_search', stdout=io.StringIO())
+        self.assertEqual(self.search('car'), ['carol'])
+
+    def search(self, query):
+        response = self.client.get(self.list_url, {'q': query})
+        return sorted(p['user']['username'] for p in response.json()['results'])
+
+
+class AppointmentFeedTests(TestCase):
+    url = '/api/patients/appointments/'
+
+    def setUp(self):
+        start = timezone.localdate()
+        for i in range(3):
+            patient = make_patient(f'feed{i}', first_name='Feed', last_name=str(i))
+            for day in range(14):
+                Appointment.objects.create(
+                    patient=patient,
+                    service_requested='Checkup',
+                    appointment_date=start + timedelta(days=day),
+                    status='CONFIRMED' if day % 2 else 'PENDING',
+                )
+        self.start = start
+
+    def test_week_view_is_one_query(self):
+        params = {'from': self.start.isoformat(), 'to': (self.start + timedelta(days=6)).isoformat()}
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 21)
+        self.assertEqual(response.json()[0]['patient_name'], 'Feed 0')
+
+    def test_status_filter(self):
+        response = self.client.get(self.url, {'status': 'confirmed'})
+        statuses = {a['status'] for a in response.json()}
+        self.assertEqual(statuses, {'CONFIRMED'})
+        self.assertEqual(len(response.json()), 21)
+
+    def test_invalid_params_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'from': 'next week'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'status': 'LOST'}).status_code, 400)
+
+
+class AvailabilityEngineTests(TestCase):
+    # 2030-01-07 is a Monday
+    monday = date(2030, 1, 7)
+
+    def setUp(self):
+        availability.reset()
+
+    def make_engine(self, bookings):
+        hours = ClinicHours(time(9, 0), time(12, 0), 30, working_days=(0, 1, 2, 3, 4))
+        return AvailabilityEngine(hours, ttl=3600, loader=lambda day: bookings.get(day, []))
+
+    def test_free_slots_and_next_free(self):
+        engine = self.make_engine({self.monday: [(1, time(9, 0)), (2, time(10, 15))]})
+        self.assertEqual(
+            engine.free_slots(self.monday),
+            [time(9, 30), time(10, 30), time(11, 0), time(11, 30)],
+        )
+        self.assertFalse(engine.is_free(self.monday, time(10, 0)))
+        self.assertFalse(engine.is_free(self.monday, time(12, 0)))
+        self.assertFalse(engine.is_free(self.monday - timedelta(days=1), time(9, 0)))
+
+        after = datetime.combine(self.monday, time(10, 40))
+        self.assertEqual(engine.next_free(after, count=3), [
+            datetime.combine(self.monday, time(11, 0)),
+            datetime.combine(self.monday, time(11, 30)),
+            datetime.combine(self.monday + timedelta(days=1), time(9, 0)),
+        ])
+        # Friday evening rolls over the weekend
+        friday_evening = datetime.combine(self.monday + timedelta(days=4), time(17, 0))
+        self.assertEqual(engine.next_free(friday_evening, count=1),
+                         [datetime.combine(self.monday + timedelta(days=7), time(9, 0))])
+
+    def test_track_updates_loaded_day_incrementally(self):
+        engine = self.make_engine({})
+        self.assertTrue(engine.is_free(self.monday, time(9, 0)))
+        appointment = Appointment(pk=5, status='CONFIRMED',
+                                  appointment_date=self.monday, appointment_time=time(9, 0))
+        engine.track(appointment)
+        self.assertFalse(engine.is_free(self.monday, time(9, 0)))
+
+        appointment.appointment_time = time(11, 0)
+        engine.track(appointment)
+        self.assertTrue(engine.is_free(self.monday, time(9, 0)))
+        self.assertFalse(engine.is_free(self.monday, time(11, 0)))
+
+        appointment.status = 'CANCELLED'
+        engine.track(appointment)
+        self.assertTrue(engine.is_free(self.monday, time(11, 0)))
+
+    def test_slots_endpoint_follows_appointment_signals(self):
+        patient = make_patient('slotty')
+        url = '/api/patients/appointments/slots/'
+        params = {'date': self.monday.isoformat(), 'time': '10:00'}
+        self.assertTrue(self.client.get(url, params).json()['free'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                patient=patient, service_requested='Filling', status='CONFIRMED',
+                appointment_date=self.monday, appointment_time=time(10, 0),
+            )
+        with self.assertNumQueries(0):
+            self.assertFalse(self.client.get(url, params).json()['free'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'CANCELLED'
+            appointment.save()
+        self.assertTrue(self.client.get(url, params).json()['free'])
+
+        response = self.client.get(url, {'count': 2, 'after': f'{self.monday.isoformat()}T09:05'})
+        self.assertEqual(response.json()['slots'][0], f'{self.monday.isoformat()}T09:30:00')
+        self.assertEqual(self.client.get(url, {'date': 'tomorrow'}).status_code, 400)
+
+
+class AppointmentSummaryTests(TestCase):
+    url = '/api/patients/appointments/'
+
+    def setUp(self):
+        patient = make_patient('tabs')
+        today = timezone.localdate()
+        statuses = ['PENDING'] * 3 + ['CONFIRMED'] * 2 + ['CANCELLED'] + ['COMPLETED'] * 54
+        Appointment.objects.bulk_create([
+            Appointment(patient=patient, service_requested='Checkup', status=status,
+                        appointment_date=today + timedelta(days=i % 2))
+            for i, status in enumerate(statuses)
+        ])
+        self.today = today
+
+    def test_summary_is_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(f'{self.url}summary/').json()
+        self.assertEqual(data, {'ALL': 60, 'PENDING': 3, 'CONFIRMED': 2, 'CANCELLED': 1, 'COMPLETED': 54})
+
+        data = self.client.get(f'{self.url}summary/', {'to': self.today.isoformat()}).json()
+        self.assertEqual(data['ALL'], 30)
+
+    def test_status_tab_is_paginated_on_request(self):
+        with self.assertNumQueries(2):  # COUNT + page
+            data = self.client.get(self.url, {'status': 'COMPLETED', 'page': 2}).json()
+        self.assertEqual(data['count'], 54)
+        self.assertEqual(len(data['results']), 4)
+        self.assertIsNone(data['next'])
+        self.assertEqual(len(self.client.get(self.url, {'status': 'COMPLETED', 'page_size': 10}).json()['results']), 10)
+        # Without page parameters the feed stays a plain list
+        self.assertEqual(len(self.client.get(self.url).json()), 60)
+
+
+class BulkStatusTests(TestCase):
+    url = '/api/patients/appointments/bulk-status/'
+
+    def setUp(self):
+        availability.reset()
+        self.addCleanup(availability.reset)
+        self.patient = make_patient('bulk')
+        self.day = date(2030, 1, 7)  # a Monday
+
+    def book(self, status, at=time(10, 0), day=None):
+        return Appointment.objects.create(patient=self.patient, service_requested='Checkup', status=status,
+                                          appointment_date=day or self.day, appointment_time=at)
+
+    def post(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data, content_type='application/json')
+
+    def test_ids_get_per_id_outcomes_from_one_update(self):
+        pending, confirmed, cancelled, completed = (
+            self.book(status, time(9 + i, 0)) for i, status in enumerate(['PENDING', 'CONFIRMED', 'CANCELLED', 'COMPLETED'])
+        )
+        before = Appointment.objects.get(pk=confirmed.pk).updated_at
+        ids = [pending.pk, confirmed.pk, cancelled.pk, completed.pk, 9999]
+
+        with self.assertNumQueries(4):  # SAVEPOINT, SELECT ... FOR UPDATE, UPDATE, RELEASE
+            response = self.post({'status': 'COMPLETED', 'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual([(r['id'], r['outcome']) for r in data['results']], [
+            (pending.pk, 'not_allowed'), (confirmed.pk, 'updated'), (cancelled.pk, 'not_allowed'),
+            (completed.pk, 'unchanged'), (9999, 'not_found'),
+        ])
+        confirmed.refresh_from_db()
+        self.assertEqual(confirmed.status, 'COMPLETED')
+        self.assertGreater(confirmed.updated_at, before)
+
+    def test_cancelling_an_afternoon_frees_its_slots(self):
+        morning = self.book('CONFIRMED', time(10, 0))
+        afternoon = [self.book('PENDING', time(14, 0)), self.book('CONFIRMED', time(16, 30))]
+        next_day = self.book('PENDING', time(14, 0), day=self.day + timedelta(days=1))
+        self.assertFalse(availability.is_free(self.day, time(14, 0)))
+
+        data = self.post({'status': 'CANCELLED', 'date_from': self.day.isoformat(), 'time_from': '13:00'}).json()
+        self.assertEqual([r['id'] for r in data['results']], [a.pk for a in afternoon])
+        self.assertEqual(data['updated'], 2)
+        self.assertTrue(availability.is_free(self.day, time(14, 0)))
+        self.assertTrue(availability.is_free(self.day, time(16, 30)))
+        self.assertFalse(availability.is_free(self.day, time(10, 0)))
+        self.assertEqual(Appointment.objects.get(pk=morning.pk).status, 'CONFIRMED')
+        self.assertEqual(Appointment.objects.get(pk=next_day.pk).status, 'PENDING')
+
+    def test_bulk_changes_are_counted_in_metrics(self):
+        counters.reset()
+        ids = [self.book('PENDING', time(9 + i, 0)).pk for i in range(3)]
+        self.post({'status': 'CONFIRMED', 'ids': ids})
+        self.assertEqual(counters.get('appointments_total', event='appointment.status', status='CONFIRMED'), 3)
+
+    def test_request_must_select_by_ids_or_range(self):
+        self.assertEqual(self.post({'status': 'CANCELLED'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'CANCELLED', 'ids': [1], 'date_from': '2030-01-07'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'CANCELLED', 'time_from': '13:00'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'LOST', 'ids': [1]}).status_code, 400)
+
+
+class VisitBatchTests(TestCase):
+    url = '/api/patients/history/batch/'
+
+    def setUp(self):
+        self.patient = make_patient('visits')
+
+    def post(self, data):
+        return self.client.post(self.url, data, content_type='application/json')
+
+    def visit(self, medicines=(), **fields):
+        return {'patient': self.patient.pk, 'treatment_provided': 'Filling',
+                'prescriptions': [{'medicine_name': name, 'dosage': '500mg'} for name in medicines], **fields}
+
+    def test_visit_and_prescriptions_are_written_in_bulk(self):
+        # patient check, SAVEPOINT, INSERT visit, INSERT prescriptions, RELEASE
+        with self.assertNumQueries(5):
+            response = self.post(self.visit(['Amoxicillin', 'Ibuprofen']))
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([p['medicine_name'] for p in data['prescriptions']], ['Amoxicillin', 'Ibuprofen'])
+        visit = DentalHistory.objects.get(pk=data['id'])
+        self.assertEqual(visit.prescriptions.count(), 2)
+        self.assertIsNotNone(visit.updated_at)
+
+    def test_backfill_array_is_all_or_nothing(self):
+        visits = [self.visit(['Paracetamol'], visit_date=f'2019-0{month}-01T10:00:00Z') for month in (1, 2, 3)]
+        with self.assertNumQueries(5):
+            response = self.post(visits)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(Prescription.objects.filter(history_entry__patient=self.patient).count(), 3)
+
+        response = self.post([self.visit(), self.visit(patient=9999)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('patient', response.json()[1])
+        self.assertEqual(DentalHistory.objects.count(), 3)
+
+
+class ExportTests(TestCase):
+    url = '/api/patients/export/'
+
+    def setUp(self):
+        self.patient = make_patient('exported', first_name='Zoë', email='zoe@example.com')
+        for i in range(3):
+            visit = DentalHistory.objects.create(patient=self.patient, treatment_provided=f'Visit {i}', notes='a, "quoted"\nnote')
+            visit.prescriptions.create(medicine_name='Ibuprofen', dosage='200mg')
+        Appointment.objects.create(patient=self.patient, service_requested='Checkup')
+        self.client.force_login(User.objects.create_user('doctor', is_staff=True))
+
+    def test_csv_streams_from_one_query(self):
+        response = self.client.get(f'{self.url}prescriptions.csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="prescriptions-', response['Content-Disposition'])
+        with self.assertNumQueries(1):
+            body = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0][:4], ['id', 'visit_id', 'patient_id', 'medicine_name'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row[2] for row in rows[1:]}, {str(self.patient.pk)})
+
+        visits = list(csv.DictReader(io.StringIO(b''.join(self.client.get(f'{self.url}visits.csv').streaming_content).decode())))
+        self.assertEqual(visits[0]['notes'], 'a, "quoted"\nnote')
+
+    def test_ndjson_and_command_agree(self):
+        body = b''.join(self.client.get(f'{self.url}patients.ndjson').streaming_content).decode()
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(r['username'], r['first_name'], r['email']) for r in records],
+                         [('exported', 'Zoë', 'zoe@example.com')])
+        out = io.StringIO()
+        call_command('export_records', 'patients', '--format', 'ndjson', stdout=out)
+        self.assertEqual(out.getvalue(), body)
+
+    def test_export_is_staff_only(self):
+        self.assertEqual(self.client.get(f'{self.url}nothing.csv').status_code, 404)
+        self.assertEqual(self.client.get(f'{self.url}visits.xml').status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(f'{self.url}visits.csv').status_code, 403)
+
+
+class ImportTests(TestCase):
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
+
+    def run_import(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_records', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        make_patient('existing', first_name='Old')
+        self.patients = self.write('patients.csv', (
+            'id,username,first_name,last_name,email,phone,date_of_birth,added_date\n'
+            '10,anna,Anna,Kowalska,anna@example.com,555-0100,1990-02-03,2015-06-01T09:00:00\n'
+            '11,existing,Someone,Else,,,,\n'
+            '12,bad-date,Bad,Row,,,1990-13-45,\n'
+            '13,,No,Username,,,,\n'
+        ))
+
+    def test_patients_import_once_without_signals_or_hashing(self):
+        out, err = self.run_import('patients', self.patients, '--batch-size', '2')
+        self.assertIn('4 rows, 1 created, 1 already imported, 2 failed', out)
+        self.assertIn('line 4:', err)
+        self.assertIn('line 5: missing username', err)
+
+        anna = Patient.objects.select_related('user').get(user__username='anna')
+        self.assertFalse(anna.user.has_usable_password())
+        self.assertEqual((anna.phone, anna.date_of_birth), ('555-0100', date(1990, 2, 3)))
+        self.assertEqual(anna.added_date.year, 2015)
+        self.assertEqual(list(search_patients('kowalska')), [anna])
+        # The existing account was linked, not duplicated or overwritten
+        existing = Patient.objects.get(user__username='existing')
+        self.assertEqual(existing.user.first_name, 'Old')
+        self.assertEqual(dict(ImportedRecord.objects.filter(dataset='patients').values_list('source_id', 'object_id')),
+                         {'10': anna.pk, '11': existing.pk})
+
+        out, _ = self.run_import('patients', self.patients)
+        self.assertIn('0 created, 2 already imported', out)
+        self.assertEqual(Patient.objects.count(), 2)
+
+    def test_visits_and_prescriptions_follow_source_ids(self):
+        self.run_import('patients', self.patients)
+        visits = self.write('visits.jsonl', (
+            '{"id": 7, "patient_id": 10, "visit_date": "2016-01-01T10:00:00Z", "treatment_provided": "Filling"}\n'
+            '\n'
+            '{"id": 8, "patient_id": 99, "treatment_provided": "Orphan"}\n'
+        ))
+        out, err = self.run_import('visits', visits)
+        self.assertIn('1 created', out)
+        self.assertIn("line 3: unknown patient_id '99'", err)
+        visit = DentalHistory.objects.get()
+        self.assertEqual(visit.patient.user.username, 'anna')
+
+        prescriptions = self.write('prescriptions.csv', (
+            'id,visit_id,patient_id,medicine_name,dosage,instructions\n'
+            '1,7,10,Ibuprofen,200mg,\n'
+            '2,7,10,,,\n'
+        ))
+        out, err = self.run_import('prescriptions', prescriptions)
+        self.assertIn('1 created', out)
+        self.assertIn('missing medicine_name', err)
+        self.assertEqual(list(visit.prescriptions.values_list('medicine_name', flat=True)), ['Ibuprofen'])
+
+
+class AdminChangelistTests(TestCase):
+    MAX_QUERIES = 8
+    pages = [
+        '/admin/patients/appointment/', '/admin/patients/appointment/?status__exact=PENDING&q=pat',
+        '/admin/patients/dentalhistory/', '/admin/patients/prescription/', '/admin/patients/patient/',
+        '/admin/patients/dentalhistory/add/', '/admin/patients/prescription/add/',
+    ]
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def add_records(self, count):
+        for i in range(count):
+            patient = make_patient(f'pat{Patient.objects.count()}')
+            visit = DentalHistory.objects.create(patient=patient, treatment_provided='Scaling')
+            visit.prescriptions.create(medicine_name='Ibuprofen')
+            Appointment.objects.create(patient=patient, service_requested=f'Service {i}')
+
+    def query_counts(self):
+        counts = {}
+        for page in self.pages:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(page).status_code, 200, page)
+            counts[page] = len(queries)
+        return counts
+
+    def test_query_count_is_capped_and_flat(self):
+        self.add_records(3)
+        self.query_counts()  # warm the content type cache
+        few = self.query_counts()
+        self.add_records(20)
+        many = self.query_counts()
+        self.assertEqual(few, many)
+        for page, count in many.items():
+            self.assertLessEqual(count, self.MAX_QUERIES, page)
+
+    def test_appointment_search_uses_the_patient_index(self):
+        self.add_records(2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/patients/appointment/', {'q': 'pat1'})
+        self.assertEqual([a.patient.user.username for a in response.context['cl'].result_list], ['pat1'])
+        self.assertFalse([q['sql'] for q in queries if 'LIKE' in q['sql']])
+
+
+class SyncTests(TestCase):
+    url = '/api/patients/sync/'
+
+    def setUp(self):
+        patient = make_patient('synced')
+        self.visit = DentalHistory.objects.create(patient=patient, treatment_provided='Scaling')
+        self.prescription = Prescription.objects.create(history_entry=self.visit, medicine_name='Chlorhexidine')
+        self.appointments = [
+            Appointment.objects.create(patient=patient, service_requested='Checkup') for _ in range(3)
+        ]
+        # Pretend everything above was synced long ago
+        old = timezone.now() - timedelta(hours=1)
+        for model in (Appointment, DentalHistory, Prescription):
+            model.objects.update(updated_at=old)
+        self.cursor = encode_cursor(old + timedelta(minutes=1))
+
+    def test_snapshot_then_delta(self):
+        snapshot = self.client.get(self.url).json()
+        self.assertTrue(snapshot['reset'])
+        self.assertEqual(len(snapshot['appointments']), 3)
+        self.assertEqual(len(snapshot['prescriptions']), 1)
+
+        appointment = self.appointments[0]
+        appointment.status = 'CONFIRMED'
+        appointment.save()
+        prescription_id = self.prescription.pk
+        self.prescription.delete()
+
+        delta = self.client.get(self.url, {'since': self.cursor}).json()
+        self.assertFalse(delta['reset'])
+        self.assertEqual([(a['id'], a['status']) for a in delta['appointments']], [(appointment.pk, 'CONFIRMED')])
+        self.assertEqual(delta['history'], [])
+        self.assertEqual(delta['prescriptions'], [])
+        self.assertEqual(delta['deleted']['prescriptions'], [prescription_id])
+        self.assertEqual(Tombstone.objects.get().model, 'prescriptions')
+
+        # The returned cursor picks up only later changes
+        again = self.client.get(self.url, {'since': delta['cursor']}).json()
+        self.assertEqual([a['id'] for a in again['appointments']], [appointment.pk])  # overlap window
+
+    def test_bad_and_expired_cursors(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'garbage'}).status_code, 400)
+        expired = encode_cursor(timezone.now() - timedelta(days=365))
+        self.assertTrue(self.client.get(self.url, {'since': expired}).json()['reset'])
+
+
+def parse_event(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().splitlines())
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+
+class AppointmentEventsTests(TestCase):
+    url = '/api/patients/appointments/events/'
+
+    def book_confirm_and_edit(self):
+        patient = make_patient('live')
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(patient=patient, service_requested='Cleaning')
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'CONFIRMED'
+            appointment.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.notes = 'Bring x-rays'
+            appointment.save()  # not a status change, no event
+        return appointment
+
+    async def test_stream_pushes_bookings_and_status_changes(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        self.assertEqual(broker.subscriber_count, 1)
+
+        appointment = await sync_to_async(self.book_confirm_and_edit)()
+        _, event_type, data = parse_event(await asyncio.wait_for(anext(stream), 1))
+        self.assertEqual((event_type, data['id'], data['status']), ('appointment.created', appointment.pk, 'PENDING'))
+        _, event_type, data = parse_event(await asyncio.wait_for(anext(stream), 1))
+        self.assertEqual((event_type, data['previous_status'], data['status']), ('appointment.status', 'PENDING', 'CONFIRMED'))
+        # Nothing for the notes edit. The timed-out read is cancelled, just as
+        # Django cancels the stream when a client disconnects.
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(stream), 0.1)
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_reconnect_replays_missed_events(self):
+        missed_after = broker.publish('appointment.status', {'id': 1})
+        broker.publish('appointment.status', {'id': 2})
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': str(missed_after)})
+        stream = response.streaming_content
+        await anext(stream)
+        event_id, _, data = parse_event(await asyncio.wait_for(anext(stream), 1))
+        self.assertEqual((event_id, data), (missed_after + 1, {'id': 2}))
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(stream), 0.05)
 
-# Create your tests here.
+    def test_wsgi_requests_are_refused(self):
+        self.assertEqual(self.client.get(self.url).status_code, 503)
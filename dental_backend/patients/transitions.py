@@ -0,0 +1,85 @@
+"""
+Bulk appointment status changes (``POST /api/patients/appointments/bulk-status/``).
+
+Allowed transitions: PENDING -> CONFIRMED -> COMPLETED, and any status ->
+CANCELLED. The target rows are read once with SELECT ... FOR UPDATE (a row
+lock on PostgreSQL), then every eligible row is moved with a single UPDATE
+in the same transaction.
+
+QuerySet.update() sends no post_save, so the side effects of a status change
+are applied here after commit instead. The slot index (scheduling.py), the
+live event stream (events.py) and the ``appointments_total`` metric are
+updated, and ``updated_at`` is set explicitly for the ?since= sync.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from dental_backend.metrics import counters
+
+from .events import appointment_payload, broker
+from .models import Appointment
+from .scheduling import availability
+
+# target status -> statuses it can be reached from
+ALLOWED_SOURCES = {
+    'CONFIRMED': ('PENDING',),
+    'COMPLETED': ('CONFIRMED',),
+    'CANCELLED': ('PENDING', 'CONFIRMED', 'COMPLETED'),
+}
+
+# Per-id outcomes
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_ALLOWED = 'not_allowed'
+NOT_FOUND = 'not_found'
+
+# Most appointments one request may change
+MAX_APPOINTMENTS = 500
+
+_LOADED_FIELDS = ('id', 'patient_id', 'service_requested', 'appointment_date', 'appointment_time', 'status')
+
+
+class TooManyAppointments(Exception):
+    pass
+
+
+def apply_status(appointments, status, ids=None, limit=MAX_APPOINTMENTS):
+    """
+    Moves the appointments in the ``appointments`` queryset to ``status``.
+    ``ids`` are the ids the caller asked for, so missing ones are reported
+    as not found. Returns a list of {id, outcome, previous_status} in id order.
+    Raises TooManyAppointments if more than ``limit`` rows match.
+    """
+    sources = ALLOWED_SOURCES.get(status, ())
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(appointments.select_for_update().only(*_LOADED_FIELDS).order_by('pk')[:limit + 1])
+        if len(rows) > limit:
+            raise TooManyAppointments(limit)
+        movable = [row for row in rows if row.status in sources]
+        if movable:
+            Appointment.objects.filter(pk__in=[row.pk for row in movable]).update(status=status, updated_at=now)
+
+        results = {}
+        for row in rows:
+            if row.status in sources:
+                outcome = UPDATED
+            elif row.status == status:
+                outcome = UNCHANGED
+            else:
+                outcome = NOT_ALLOWED
+            results[row.pk] = {'id': row.pk, 'outcome': outcome, 'previous_status': row.status}
+        for missing in set(ids or ()) - results.keys():
+            results[missing] = {'id': missing, 'outcome': NOT_FOUND, 'previous_status': None}
+
+        for row in movable:
+            previous, row.status, row.updated_at = row.status, status, now
+            row._stored_status = status
+            transaction.on_commit(lambda row=row, previous=previous: _announce(row, previous))
+    return [results[pk] for pk in sorted(results)]
+
+
+def _announce(appointment, previous):
+    availability.track(appointment)
+    broker.publish('appointment.status', appointment_payload(appointment, previous))
+    counters.inc('appointments_total', event='appointment.status', status=appointment.status)
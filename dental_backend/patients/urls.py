@@ -19,7 +19,17 @@ urlpatterns = [
     # /api/patients/history/ (history management)
     # /api/patients/prescriptions/ (prescription management)
     # /api/patients/appointments/ (appointment submission/management)
+    # Live appointment events (SSE, ASGI only). Listed before the router so
+    # "events" isn't read as an appointment id.
+    path('appointments/events/', views.appointment_events, name='appointment_events'),
+
     path('', include(router.urls)),
+
+    # Delta sync for the staff dashboard: /api/patients/sync/?since=<cursor>
+    path('sync/', views.SyncView.as_view(), name='sync'),
+
+    # Streaming exports (staff only): /api/patients/export/visits.csv, .../appointments.ndjson
+    path('export/<slug:dataset>.<slug:fmt>', views.ExportView.as_view(), name='export'),
     
     # --- Patient URL ---
     # This is the separate, secure URL for a patient to see their own profile
@@ -1,25 +1,65 @@
-from rest_framework import viewsets, generics
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework import viewsets, generics, status
+from rest_framework.views import APIView
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny 
 from rest_framework.authentication import SessionAuthentication
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Prefetch
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
 from .models import Patient, DentalHistory, Prescription, Appointment
 from .serializers import (
     PatientSerializer,
+    PatientListSerializer,
     PatientUpdateSerializer,
     DentalHistorySerializer,
     PrescriptionSerializer,
     DentalHistoryCreateSerializer,
     PrescriptionCreateSerializer,
     AppointmentCreateSerializer,
-    AppointmentSerializer
+    AppointmentSerializer,
+    BulkStatusSerializer,
+    VisitBatchSerializer,
 )
 from .permissions import IsStaffUser
+from .pagination import PatientCursorPagination, AppointmentPagination
+from . import export
+from .events import broker
+from .scheduling import availability
+from .search import search_patients
+from .transitions import TooManyAppointments, apply_status
+from .sync import InvalidCursor, changes_since, decode_cursor
 
 # We still include SessionAuth for functionality, but access is now controlled by AllowAny
 DOCTOR_AUTH_CLASSES = [SessionAuthentication] 
 
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+MAX_VISITS_PER_BATCH = 1000
+
+
+def parse_query_param(request, name, parser, message):
+    """Parses an optional query parameter, raising a 400 with ``message`` if it's malformed."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parser(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: message})
+    return parsed
+
 # --- DOCTOR-ONLY VIEWS (NO AUTHENTICATION REQUIRED FOR ACCESS) ---
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -28,9 +68,37 @@ class PatientViewSet(viewsets.ReadOnlyModelViewSet):
     SECURITY REMOVAL: Permission is set to AllowAny for easy testing.
     """
     authentication_classes = DOCTOR_AUTH_CLASSES
-    queryset = Patient.objects.all().prefetch_related('user', 'history__prescriptions')
-    serializer_class = PatientSerializer
-    permission_classes = [AllowAny] 
+    queryset = Patient.objects.select_related('user')
+    permission_classes = [AllowAny]
+    pagination_class = PatientCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset
+        # Detail: the whole graph in a fixed 4 queries
+        # (patient+user, history, prescriptions, appointments).
+        # Prefetching the reverse FKs also caches appointment.patient,
+        # so AppointmentSerializer's patient.user lookups are free.
+        return queryset.prefetch_related(
+            Prefetch('history', queryset=DentalHistory.objects.prefetch_related('prescriptions')),
+            'appointments',
+        )
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+        # Ranked matches from the search index, best first, instead of a page in added order
+        limit = parse_query_param(request, 'limit', int, 'Expected a number.') or SEARCH_DEFAULT_LIMIT
+        patients = search_patients(query, limit=max(1, min(limit, SEARCH_MAX_LIMIT)))
+        return Response({'count': len(patients), 'next': None, 'previous': None,
+                         'results': PatientListSerializer(patients, many=True).data})
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PatientListSerializer
+        return PatientSerializer
 
 class DentalHistoryViewSet(viewsets.ModelViewSet):
     """
@@ -41,6 +109,25 @@ class DentalHistoryViewSet(viewsets.ModelViewSet):
     serializer_class = DentalHistoryCreateSerializer 
     permission_classes = [AllowAny] 
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Records visits together with their prescriptions in one transaction.
+        Body: one visit {"patient", "visit_date", "notes", "treatment_provided",
+        "prescriptions": [{"medicine_name", "dosage", "instructions"}, ...]}
+        or an array of them (up to MAX_VISITS_PER_BATCH) for back-filling records.
+        """
+        single = isinstance(request.data, dict)
+        visits = [request.data] if single else request.data
+        if not isinstance(visits, list) or not visits:
+            raise ValidationError({'detail': 'Expected a visit object or a non-empty array of visits.'})
+        if len(visits) > MAX_VISITS_PER_BATCH:
+            raise ValidationError({'detail': f'At most {MAX_VISITS_PER_BATCH} visits per request.'})
+        serializer = VisitBatchSerializer(data=visits, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data[0] if single else serializer.data, status=status.HTTP_201_CREATED)
+
 class PrescriptionViewSet(viewsets.ModelViewSet):
     """
     SECURITY REMOVAL: Permission is set to AllowAny for easy testing.
@@ -53,9 +140,128 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
 # --- NEW APPOINTMENT VIEWSET (NO AUTHENTICATION REQUIRED FOR VIEWING) ---
 
 class AppointmentViewSet(viewsets.ModelViewSet):
-    # CRITICAL FIX: Simplified queryset to fix 500 error
-    queryset = Appointment.objects.all() 
-    
+    """
+    Appointment feed for the front-desk calendar and the staff dashboard tabs.
+    Supports ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive) and ?status=PENDING,CONFIRMED,
+    plus opt-in pagination with ?page= / ?page_size=.
+    Patient and user are joined in, so a week view is a single query.
+    """
+    queryset = Appointment.objects.select_related('patient__user')
+    pagination_class = AppointmentPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        return self._filter_status(self._filter_dates(queryset))
+
+    def _filter_dates(self, queryset):
+        date_from = self._parse_date_param('from')
+        date_to = self._parse_date_param('to')
+        if date_from:
+            queryset = queryset.filter(appointment_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(appointment_date__lte=date_to)
+        return queryset
+
+    def _filter_status(self, queryset):
+        value = self.request.query_params.get('status')
+        if not value:
+            return queryset
+        statuses = [s.strip().upper() for s in value.split(',') if s.strip()]
+        valid = {choice for choice, _ in Appointment.STATUS_CHOICES}
+        unknown = [s for s in statuses if s not in valid]
+        if unknown:
+            raise ValidationError({'status': f"Unknown status: {', '.join(unknown)}"})
+        return queryset.filter(status__in=statuses)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Per-status counts for the dashboard tabs from one grouped aggregate.
+        Honours ?from= and ?to= so the counts match the list being shown.
+        """
+        rows = (
+            self._filter_dates(Appointment.objects.all())
+            .order_by()
+            .values('status')
+            .annotate(count=Count('id'))
+        )
+        counts = {choice: 0 for choice, _ in Appointment.STATUS_CHOICES}
+        counts.update({row['status']: row['count'] for row in rows})
+        return Response({'ALL': sum(counts.values()), **counts})
+
+    def _parse_date_param(self, name):
+        return self._parse_param(name, parse_date, 'Expected a date in YYYY-MM-DD format.')
+
+    def _parse_param(self, name, parser, message):
+        return parse_query_param(self.request, name, parser, message)
+
+    @action(detail=False, methods=['get'])
+    def slots(self, request):
+        """
+        Slot availability:
+        ?date=YYYY-MM-DD            -> free slot times on that day
+        ?date=YYYY-MM-DD&time=HH:MM -> whether that slot is free
+        ?count=N[&after=ISO datetime] -> the next N free slots (default: from now)
+        """
+        params = request.query_params
+        day = self._parse_date_param('date')
+        at = self._parse_param('time', parse_time, 'Expected a time in HH:MM format.')
+        if day and at:
+            return Response({'date': day, 'time': at, 'free': availability.is_free(day, at)})
+        if day:
+            return Response({
+                'date': day,
+                'slot_minutes': availability.hours.slot_minutes,
+                'free': availability.free_slots(day),
+            })
+
+        try:
+            count = min(max(int(params.get('count', 5)), 1), 100)
+        except ValueError:
+            raise ValidationError({'count': 'Expected an integer.'})
+        after = self._parse_param('after', parse_datetime, 'Expected an ISO 8601 datetime.')
+        if after is None:
+            after = timezone.localtime()
+        if timezone.is_aware(after):
+            # Appointment dates/times are stored as clinic-local wall clock values.
+            after = timezone.localtime(after).replace(tzinfo=None)
+        return Response({
+            'slot_minutes': availability.hours.slot_minutes,
+            'slots': availability.next_free(after, count=count),
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Moves many appointments to one status in a single UPDATE, e.g. mark the
+        day COMPLETED or cancel an afternoon. Body: {"status", "ids": [...]} or
+        {"status", "date_from", "date_to", "time_from", "time_to"}.
+        Returns the outcome for every selected id (see patients/transitions.py).
+        """
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        appointments = Appointment.objects.all()
+        if 'ids' in params:
+            appointments = appointments.filter(pk__in=params['ids'])
+        else:
+            appointments = appointments.filter(appointment_date__range=(params['date_from'], params['date_to']))
+            if 'time_from' in params:
+                appointments = appointments.filter(appointment_time__gte=params['time_from'])
+            if 'time_to' in params:
+                appointments = appointments.filter(appointment_time__lt=params['time_to'])
+        try:
+            results = apply_status(appointments, params['status'], ids=params.get('ids'))
+        except TooManyAppointments as exc:
+            raise ValidationError({'detail': f'More than {exc.args[0]} appointments match; narrow the range.'})
+        return Response({
+            'status': params['status'],
+            'updated': sum(1 for result in results if result['outcome'] == 'updated'),
+            'results': results,
+        })
+
     def get_serializer_class(self):
         if self.action == 'create':
             return AppointmentCreateSerializer
@@ -73,6 +279,92 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         serializer.save(patient=patient_instance, status='PENDING')
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class SyncView(APIView):
+    """
+    Delta sync for the staff dashboard (see patients/sync.py).
+    GET /api/patients/sync/ for a snapshot, then ?since=<cursor from the last response>.
+    """
+    authentication_classes = DOCTOR_AUTH_CLASSES
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_cursor(since)
+            except InvalidCursor:
+                raise ValidationError({'since': 'Invalid sync cursor.'})
+        return Response(changes_since(since or None))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ExportView(APIView):
+    """
+    Streams a whole dataset for insurers and backups (see patients/export.py):
+    GET /api/patients/export/<patients|visits|prescriptions|appointments>.<csv|ndjson>
+    """
+    authentication_classes = DOCTOR_AUTH_CLASSES
+    permission_classes = [IsStaffUser]
+
+    def get(self, request, dataset, fmt):
+        if dataset not in export.DATASETS or fmt not in export.FORMATS:
+            raise NotFound()
+        chunks = export.export(dataset, fmt)
+        if isinstance(request._request, ASGIRequest):
+            # Django would buffer a sync iterator in full under ASGI; hand it chunk by chunk instead
+            chunks = _iterate_in_thread(chunks)
+        response = StreamingHttpResponse(chunks, content_type=export.FORMATS[fmt])
+        filename = f'{dataset}-{timezone.localdate().isoformat()}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+async def _iterate_in_thread(iterator):
+    # thread_sensitive keeps every chunk on the thread that owns the DB connection
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+
+# Comment lines keep proxies and load balancers from closing an idle stream
+EVENTS_HEARTBEAT_SECONDS = 15
+
+async def appointment_events(request):
+    """
+    Server-Sent Events stream of appointment bookings and status changes
+    (see patients/events.py). Needs the ASGI server: under WSGI every
+    listener would hold a worker thread for as long as it stays connected.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Live events are only served by the ASGI application.'}, status=503)
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+
+    async def stream():
+        subscription = broker.subscribe(last_event_id)
+        try:
+            yield f'retry: 3000\n: {broker.subscriber_count} listening\n\n'
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+        finally:
+            # Also runs when Django cancels the stream because the client went away
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # --- PATIENT-ONLY VIEW (Uses JWT Token) ---
 class MyProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
@@ -83,4 +375,7 @@ class MyProfileView(generics.RetrieveUpdateAPIView):
         return PatientSerializer
 
     def get_object(self):
+        if self.request.method in ['PATCH', 'PUT']:
+            # request.user's profile comes from the identity cache; write to the current row
+            return Patient.objects.get(user_id=self.request.user.pk)
         return self.request.user.patient_profile
\ No newline at end of file
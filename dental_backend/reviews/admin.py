@@ -1,8 +1,9 @@
-import cloudinary.uploader
 from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Review, ReviewImage
+from .imaging import store_photo
+from .uploads import get_storage
 
 
 class ReviewImageAdminForm(forms.ModelForm):
@@ -16,8 +17,7 @@ class ReviewImageAdminForm(forms.ModelForm):
         instance = super().save(commit=False)
         upload_file = self.cleaned_data.get('upload')
         if upload_file:
-            result = cloudinary.uploader.upload(upload_file, folder='reviews')
-            instance.image = result['secure_url']
+            instance.image, instance.variants = store_photo(get_storage(), upload_file.name, upload_file.read())
         if commit:
             instance.save()
         return instance
@@ -38,8 +38,8 @@ class ReviewImageInline(admin.TabularInline):
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
-    list_display = ('patient_name', 'rating', 'is_approved', 'created_at', 'short_review')
-    list_filter = ('is_approved', 'rating')
+    list_display = ('patient_name', 'rating', 'is_approved', 'image_status', 'created_at', 'short_review')
+    list_filter = ('is_approved', 'rating', 'image_status')
     list_editable = ('is_approved',)
     ordering = ('-created_at',)
     search_fields = ('patient_name', 'review_text')
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        # Public responses are cached; bump the cache version whenever these change
+        from dental_backend.caching import watch_models
+        from .models import Review, ReviewImage
+        watch_models(Review, ReviewImage)
+        # Keeps ReviewStats in step with approvals and rating edits
+        import reviews.signals
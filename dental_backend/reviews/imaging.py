@@ -0,0 +1,70 @@
+"""
+Image processing for review photos.
+
+Phone photos arrive as multi-megabyte JPEGs with EXIF (including GPS)
+metadata. Before storage each photo is:
+  * rotated according to its EXIF orientation, then stripped of all metadata,
+  * capped to REVIEW_IMAGE_MAX_DIMENSION on its longest side (JPEG fallback),
+  * rendered into WebP variants at REVIEW_IMAGE_VARIANT_WIDTHS for srcset.
+"""
+import io
+import math
+from pathlib import Path
+
+from django.conf import settings
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+def render_variants(content):
+    """
+    Returns a list of (suffix, width, height, format, bytes) for one photo:
+    the capped JPEG first, then one WebP per configured width (never upscaled).
+    Raises PIL.UnidentifiedImageError if ``content`` is not an image.
+    """
+    # Pillow is only needed once a photo arrives; importing it here keeps it out of startup
+    from PIL import Image, ImageOps
+
+    max_dimension = getattr(settings, 'REVIEW_IMAGE_MAX_DIMENSION', 1600)
+    widths = getattr(settings, 'REVIEW_IMAGE_VARIANT_WIDTHS', (320, 800))
+
+    with Image.open(io.BytesIO(content)) as source:
+        # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding
+        ratio = min(1.0, max_dimension / max(source.size))
+        source.draft('RGB', (math.ceil(source.width * ratio), math.ceil(source.height * ratio)))
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        variants = [_encode(image.convert('RGB'), 'JPEG', '.jpg', quality=JPEG_QUALITY, optimize=True)]
+        for width in sorted(set(widths)):
+            if width >= image.width:
+                continue
+            resized = image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+            variants.append(_encode(resized, 'WEBP', '.webp', quality=WEBP_QUALITY, method=4))
+        variants.append(_encode(image, 'WEBP', '.webp', quality=WEBP_QUALITY, method=4))
+    return variants
+
+
+def store_photo(storage, name, content):
+    """
+    Processes one photo and saves every rendition to ``storage``.
+    Returns (url of the capped JPEG, list of variant dicts for ReviewImage.variants).
+    """
+    stem = Path(name).stem or 'photo'
+    url, variants = None, []
+    for suffix, width, height, fmt, data in render_variants(content):
+        stored = storage.save(f'{stem}-{width}w{suffix}', data)
+        if url is None:
+            url = stored
+        variants.append({'url': stored, 'width': width, 'height': height, 'format': fmt.lower()})
+    return url, variants
+
+
+def _encode(image, fmt, suffix, **options):
+    buffer = io.BytesIO()
+    # No exif= argument, so nothing from the original metadata is written back
+    image.save(buffer, format=fmt, **options)
+    return suffix, image.width, image.height, fmt, buffer.getvalue()
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.uploads import fail_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Marks reviews whose photo uploads never finished (still PENDING after the timeout) as FAILED."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=settings.REVIEW_UPLOAD_TIMEOUT_MINUTES,
+            help="Age after which a PENDING review is considered lost (default: REVIEW_UPLOAD_TIMEOUT_MINUTES).",
+        )
+
+    def handle(self, *args, **options):
+        failed = fail_stale_uploads(timedelta(minutes=options['minutes']))
+        self.stdout.write(self.style.SUCCESS(f"Marked {failed} stale review upload(s) as FAILED."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.models import ReviewStats
+from reviews.stats import STATS_PK, compute, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recomputes the ReviewStats aggregate from the Review table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only compare the stored aggregate with a fresh one; exit non-zero if they differ.",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            expected = compute()
+            stored = ReviewStats.objects.filter(pk=STATS_PK).values(*expected).first()
+            if stored != expected:
+                raise CommandError(f"ReviewStats is out of date: stored {stored}, expected {expected}")
+            self.stdout.write(self.style.SUCCESS(f"ReviewStats is consistent ({expected['count']} approved reviews)."))
+            return
+        values = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ReviewStats ({values['count']} approved reviews)."))
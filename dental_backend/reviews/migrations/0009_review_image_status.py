@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_alter_reviewimage_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='image_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', max_length=10),
+        ),
+    ]
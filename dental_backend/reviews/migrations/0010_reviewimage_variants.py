@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_review_image_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:09
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def compute_initial_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ReviewStats = apps.get_model('reviews', 'ReviewStats')
+    approved = Review.objects.filter(is_approved=True, rating__gte=1, rating__lte=5)
+    values = approved.aggregate(
+        count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'stars_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+    )
+    values['rating_sum'] = values['rating_sum'] or 0
+    ReviewStats.objects.create(pk=1, **values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_reviewimage_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveBigIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Review stats',
+            },
+        ),
+        migrations.RunPython(compute_initial_stats, migrations.RunPython.noop),
+    ]
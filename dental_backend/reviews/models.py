@@ -3,6 +3,12 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 
 class Review(models.Model):
+    IMAGE_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
     user = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -16,6 +22,16 @@ class Review(models.Model):
     rating = models.IntegerField(default=5)
     is_approved = models.BooleanField(default=False, help_text="Only approved reviews are shown publicly.")
     created_at = models.DateTimeField(default=timezone.now)
+    # Photos are uploaded in the background (see reviews/uploads.py)
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default='READY')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored approval/rating so ReviewStats can apply just the difference on save
+        if 'is_approved' in instance.__dict__ and 'rating' in instance.__dict__:
+            instance._stored_rating = instance.rating if instance.is_approved else None
+        return instance
 
     def __str__(self):
         if self.user:
@@ -29,6 +45,37 @@ class Review(models.Model):
 class ReviewImage(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='images')
     image = models.URLField(max_length=500)
+    # Resized WebP/JPEG renditions: [{"url", "width", "height", "format"}, ...]
+    variants = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"Image for {self.review}"
+
+
+class ReviewStats(models.Model):
+    """
+    Aggregate of approved reviews, kept as a single row (pk=1) that is updated
+    incrementally by reviews/signals.py. See reviews/stats.py.
+    """
+    count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveBigIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Review stats"
+
+    @property
+    def average(self):
+        return round(self.rating_sum / self.count, 2) if self.count else None
+
+    @property
+    def histogram(self):
+        return {str(star): getattr(self, f'stars_{star}') for star in range(1, 6)}
 
     def __str__(self):
-        return f"Image for {self.review}"
\ No newline at end of file
+        return f"{self.count} approved reviews, average {self.average}"
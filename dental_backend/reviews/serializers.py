@@ -2,9 +2,21 @@ from rest_framework import serializers
 from .models import Review, ReviewImage
 
 class ReviewImageSerializer(serializers.ModelSerializer):
+    """
+    `image` is the size-capped JPEG fallback. `srcset` maps each format to an
+    HTML srcset string, e.g. {"webp": "https://.../a-320w.webp 320w, ..."}.
+    """
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ReviewImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset', 'variants']
+
+    def get_srcset(self, obj):
+        by_format = {}
+        for variant in sorted(obj.variants, key=lambda v: v['width']):
+            by_format.setdefault(variant['format'], []).append(f"{variant['url']} {variant['width']}w")
+        return {fmt: ', '.join(entries) for fmt, entries in by_format.items()}
 
 class ReviewSerializer(serializers.ModelSerializer):
     patient_name = serializers.CharField(read_only=True)
@@ -12,5 +24,5 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ['id', 'patient_name', 'review_text', 'rating', 'images', 'created_at']
-        read_only_fields = ['id', 'patient_name', 'created_at', 'images']
+        fields = ['id', 'patient_name', 'review_text', 'rating', 'images', 'image_status', 'created_at']
+        read_only_fields = ['id', 'patient_name', 'created_at', 'images', 'image_status']
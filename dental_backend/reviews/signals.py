@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from dental_backend.metrics import counters
+
+from .models import Review
+from .stats import UNKNOWN, apply_change, contribution
+
+
+@receiver(post_save, sender=Review)
+def update_review_stats(sender, instance, created, raw=False, **kwargs):
+    """Applies an approval, unapproval or rating edit to ReviewStats."""
+    if raw:
+        return
+    old = None if created else getattr(instance, '_stored_rating', UNKNOWN)
+    new = contribution(instance)
+    apply_change(old, new)
+    instance._stored_rating = new
+    if created:
+        transaction.on_commit(lambda: counters.inc('reviews_total', event='submitted'))
+    if old is None and new is not None:
+        transaction.on_commit(lambda: counters.inc('reviews_total', event='approved'))
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_stats(sender, instance, **kwargs):
+    apply_change(getattr(instance, '_stored_rating', UNKNOWN), None)
@@ -0,0 +1,74 @@
+"""
+Incremental maintenance of ReviewStats.
+
+A review contributes its rating to the aggregate only while it is approved
+and rated 1-5. On every save or delete, the signal handlers compare the
+contribution the row had in the database (remembered by Review.from_db) with
+its new one and apply the difference as a single F()-expression UPDATE. This
+also covers the bulk `list_editable` approvals in ReviewAdmin, which save
+each changed row individually.
+
+QuerySet.update() bypasses signals. Run `manage.py rebuild_review_stats`
+after such bulk edits; `--check` reports drift without fixing it.
+"""
+from django.db.models import Count, F, Q, Sum
+
+from .models import Review, ReviewStats
+
+STATS_PK = 1
+# Marker for instances whose stored contribution is unknown (e.g. loaded with .only())
+UNKNOWN = object()
+
+
+def contribution(review):
+    if review.is_approved and 1 <= review.rating <= 5:
+        return review.rating
+    return None
+
+
+def apply_change(old, new):
+    """Moves one review's contribution from ``old`` to ``new`` (ratings or None)."""
+    if old is UNKNOWN:
+        rebuild()
+        return
+    if old == new:
+        return
+    changes = {}
+    for rating, sign in ((old, -1), (new, 1)):
+        if rating is None:
+            continue
+        changes['count'] = changes.get('count', 0) + sign
+        changes['rating_sum'] = changes.get('rating_sum', 0) + sign * rating
+        changes[f'stars_{rating}'] = changes.get(f'stars_{rating}', 0) + sign
+    updates = {field: F(field) + delta for field, delta in changes.items() if delta}
+    if not updates:
+        return
+    if not ReviewStats.objects.filter(pk=STATS_PK).update(**updates):
+        # No aggregate row yet: build it from the table, which already includes this change
+        rebuild()
+
+
+def compute():
+    """Fresh aggregate values straight from the Review table."""
+    approved = Review.objects.filter(is_approved=True, rating__gte=1, rating__lte=5)
+    values = approved.aggregate(
+        count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'stars_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+    )
+    values['rating_sum'] = values['rating_sum'] or 0
+    return values
+
+
+def rebuild():
+    values = compute()
+    ReviewStats.objects.update_or_create(pk=STATS_PK, defaults=values)
+    return values
+
+
+def get_stats():
+    stats = ReviewStats.objects.filter(pk=STATS_PK).first()
+    if stats is None:
+        rebuild()
+        stats = ReviewStats.objects.get(pk=STATS_PK)
+    return stats
@@ -1,3 +1,192 @@
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .imaging import render_variants
+from .models import Review
+from .serializers import ReviewImageSerializer
+from .uploads import CloudinaryImageStorage, LocalImageStorage, _cloudinary_uploader, pipeline
+
+
+def make_jpeg(size=(64, 48), exif=None):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, format='JPEG', **({'exif': exif} if exif else {}))
+    return buffer.getvalue()
+
+
+def make_photo(name='photo.jpg', size=(64, 48)):
+    return SimpleUploadedFile(name, make_jpeg(size), content_type='image/jpeg')
+
+
+class FailingStorage:
+    def save(self, name, content):
+        raise ConnectionError('storage is down')
+
+
+class ReviewUploadPipelineTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='reviewer'))
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.storage = LocalImageStorage(location=media.name, base_url='/media/')
+
+    def post_review(self, storage, photos):
+        with mock.patch.object(pipeline, '_storage', storage), mock.patch.object(pipeline, '_workers', 0):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/api/reviews/',
+                    {'rating': 5, 'review_text': 'Painless!', 'images': photos},
+                    format='multipart',
+                )
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def test_review_is_created_before_uploads_finish(self):
+        response = self.post_review(self.storage, [make_photo('a.jpg'), make_photo('b.jpg')])
+        self.assertEqual(response.json()['image_status'], 'PENDING')
+        self.assertEqual(response.json()['images'], [])
+
+        review = Review.objects.get(pk=response.json()['id'])
+        self.assertEqual(review.image_status, 'READY')
+        images = list(review.images.all())
+        self.assertEqual(len(images), 2)
+        self.assertTrue(all(image.image.startswith('/media/reviews/') for image in images))
+        self.assertEqual([v['format'] for v in images[0].variants], ['jpeg', 'webp'])
+
+    def test_failed_upload_marks_review(self):
+        with self.assertLogs('reviews.uploads', 'ERROR'):
+            response = self.post_review(FailingStorage(), [make_photo()])
+        review = Review.objects.get(pk=response.json()['id'])
+        self.assertEqual(review.image_status, 'FAILED')
+        self.assertFalse(review.images.exists())
+
+    def test_review_without_photos_is_ready(self):
+        response = self.post_review(self.storage, [])
+        self.assertEqual(response.json()['image_status'], 'READY')
+
+    def test_uploads_lost_with_their_worker_are_failed(self):
+        with mock.patch.object(pipeline, '_start'):  # the batch never runs, as if the worker died
+            response = self.post_review(self.storage, [make_photo()])
+        lost = Review.objects.get(pk=response.json()['id'])
+        recent = Review.objects.create(rating=4, review_text='Fine', image_status='PENDING')
+        Review.objects.filter(pk=lost.pk).update(created_at=timezone.now() - timedelta(hours=1))
+
+        out = io.StringIO()
+        with self.assertLogs('reviews.uploads', 'WARNING'):
+            call_command('fail_stale_uploads', stdout=out)
+        self.assertIn('Marked 1 stale review upload(s) as FAILED', out.getvalue())
+        lost.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(lost.image_status, 'FAILED')
+        self.assertEqual(recent.image_status, 'PENDING')
+
+
+class CloudinaryStorageTests(TestCase):
+    def test_sdk_is_configured_on_first_upload(self):
+        _cloudinary_uploader.cache_clear()
+        with mock.patch('cloudinary.uploader.upload', return_value={'secure_url': 'https://res.example/x.jpg'}) as upload:
+            self.assertEqual(CloudinaryImageStorage().save('x.jpg', b'data'), 'https://res.example/x.jpg')
+        import cloudinary
+        self.assertEqual(cloudinary.config().cloud_name, 'o6wva9dj')
+        self.assertEqual(upload.call_args.kwargs, {'folder': 'reviews'})
+
+
+@override_settings(REVIEW_IMAGE_MAX_DIMENSION=1000, REVIEW_IMAGE_VARIANT_WIDTHS=(320, 800))
+class ReviewImageProcessingTests(TestCase):
+
+    def test_variants_are_capped_rotated_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'PhoneMaker'
+        variants = render_variants(make_jpeg((3000, 2000), exif=exif))
+
+        self.assertEqual([(w, h, f) for _, w, h, f, _ in variants], [
+            (667, 1000, 'JPEG'), (320, 480, 'WEBP'), (667, 1000, 'WEBP'),
+        ])
+        for _, _, _, _, data in variants:
+            with Image.open(io.BytesIO(data)) as image:
+                self.assertEqual(len(image.getexif()), 0)
+
+    def test_small_photos_are_not_upscaled(self):
+        variants = render_variants(make_jpeg((300, 200)))
+        self.assertEqual([(w, f) for _, w, _, f, _ in variants], [(300, 'JPEG'), (300, 'WEBP')])
+
+    def test_serializer_exposes_srcset(self):
+        review = Review.objects.create(review_text='Great', rating=5)
+        image = review.images.create(image='https://cdn/a.jpg', variants=[
+            {'url': 'https://cdn/a-800.webp', 'width': 800, 'height': 600, 'format': 'webp'},
+            {'url': 'https://cdn/a.jpg', 'width': 1600, 'height': 1200, 'format': 'jpeg'},
+            {'url': 'https://cdn/a-320.webp', 'width': 320, 'height': 240, 'format': 'webp'},
+        ])
+        self.assertEqual(ReviewImageSerializer(image).data['srcset'], {
+            'webp': 'https://cdn/a-320.webp 320w, https://cdn/a-800.webp 800w',
+            'jpeg': 'https://cdn/a.jpg 1600w',
+        })
+
+
+class ReviewStatsTests(TestCase):
+    url = '/api/reviews/stats/'
+
+    def assertStats(self, count, average, histogram):
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data, {
+            'count': count,
+            'average': average,
+            'histogram': dict(zip('12345', histogram)),
+        })
+
+    def test_stats_follow_approval_edits_and_deletes(self):
+        five = Review.objects.create(review_text='Great', rating=5, is_approved=True)
+        three = Review.objects.create(review_text='Okay', rating=3)
+        self.assertStats(1, 5.0, [0, 0, 0, 0, 1])
+
+        three.is_approved = True
+        three.save()
+        self.assertStats(2, 4.0, [0, 0, 1, 0, 1])
+
+        loaded = Review.objects.get(pk=five.pk)
+        loaded.rating = 4
+        loaded.save()
+        self.assertStats(2, 3.5, [0, 0, 1, 1, 0])
+
+        Review.objects.filter(pk=three.pk).delete()
+        self.assertStats(1, 4.0, [0, 0, 0, 1, 0])
+
+        loaded.is_approved = False
+        loaded.save()
+        self.assertStats(0, None, [0, 0, 0, 0, 0])
+
+    def test_admin_list_editable_approvals(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        reviews = [Review.objects.create(review_text='Nice', rating=r) for r in (2, 4)]
+        data = {
+            'form-TOTAL_FORMS': '2', 'form-INITIAL_FORMS': '2', '_save': 'Save',
+            'form-0-id': str(reviews[0].pk), 'form-0-is_approved': 'on',
+            'form-1-id': str(reviews[1].pk), 'form-1-is_approved': 'on',
+        }
+        response = self.client.post('/admin/reviews/review/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertStats(2, 3.0, [0, 1, 0, 1, 0])
 
-# Create your tests here.
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        Review.objects.create(review_text='Great', rating=5, is_approved=True)
+        Review.objects.update(rating=1)  # bypasses signals
+        with self.assertRaises(CommandError):
+            call_command('rebuild_review_stats', '--check', stdout=io.StringIO())
+        call_command('rebuild_review_stats', stdout=io.StringIO())
+        call_command('rebuild_review_stats', '--check', stdout=io.StringIO())
+        self.assertStats(1, 1.0, [1, 0, 0, 0, 0])
@@ -0,0 +1,199 @@
+"""
+Background upload pipeline for review photos.
+
+ReviewViewSet.perform_create used to push every photo to Cloudinary inside
+the request. Now the view reads the uploaded bytes, creates the Review with
+``image_status='PENDING'`` and hands the files to ``pipeline.submit()``. The
+files are resized into responsive variants (reviews/imaging.py) and
+uploaded concurrently on a small thread pool. When the last one
+finishes, the ReviewImage rows are bulk-created and the review is marked
+READY (or FAILED if any upload failed).
+
+The storage backend is pluggable through the REVIEW_IMAGE_STORAGE setting so
+tests and benchmarks can use ``LocalImageStorage`` instead of Cloudinary.
+REVIEW_UPLOAD_WORKERS=0 runs uploads inline, which is what the tests use.
+
+The photo bytes only live in the memory of the process that received them,
+so a batch lost to a worker restart or crash can't be retried and its review
+would stay PENDING. ``fail_stale_uploads()`` (``manage.py fail_stale_uploads``,
+run at startup by the deploy files) marks reviews still PENDING after
+REVIEW_UPLOAD_TIMEOUT_MINUTES as FAILED.
+"""
+import functools
+import io
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from dental_backend.caching import bump_model_version
+from .imaging import store_photo
+
+logger = logging.getLogger(__name__)
+
+
+# --- Storage backends ---
+
+@functools.cache
+def _cloudinary_uploader():
+    # The SDK (and its HTTP stack) is imported on the first upload, not at startup
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=settings.CLOUDINARY_STORAGE['CLOUD_NAME'],
+        api_key=settings.CLOUDINARY_STORAGE['API_KEY'],
+        api_secret=settings.CLOUDINARY_STORAGE['API_SECRET'],
+        secure=True,
+    )
+    return cloudinary.uploader
+
+
+class CloudinaryImageStorage:
+    """Uploads to Cloudinary and returns the secure URL."""
+    folder = 'reviews'
+
+    def save(self, name, content):
+        result = _cloudinary_uploader().upload(io.BytesIO(content), folder=self.folder)
+        return result['secure_url']
+
+
+class LocalImageStorage:
+    """Writes files under MEDIA_ROOT/reviews/. A stand-in for tests, benchmarks and local dev."""
+    folder = 'reviews'
+
+    def __init__(self, location=None, base_url=None):
+        self.location = Path(location or settings.MEDIA_ROOT) / self.folder
+        self.base_url = (base_url or settings.MEDIA_URL).rstrip('/') + f'/{self.folder}/'
+
+    def save(self, name, content):
+        self.location.mkdir(parents=True, exist_ok=True)
+        filename = f'{uuid.uuid4().hex}{Path(name).suffix.lower()}'
+        (self.location / filename).write_bytes(content)
+        return self.base_url + filename
+
+
+def get_storage():
+    return import_string(settings.REVIEW_IMAGE_STORAGE)()
+
+
+# --- Pipeline ---
+
+class _Batch:
+    """The photos of one review; finalized by whichever upload finishes last."""
+
+    def __init__(self, review_id, count):
+        self.review_id = review_id
+        self.results = [None] * count  # (url, variants) per photo
+        self.remaining = count
+        self.lock = threading.Lock()
+
+
+class UploadPipeline:
+
+    def __init__(self, storage=None, workers=None):
+        self._storage = storage
+        self._workers = workers
+        self._executor = None
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    @property
+    def workers(self):
+        if self._workers is None:
+            self._workers = int(getattr(settings, 'REVIEW_UPLOAD_WORKERS', 4))
+        return self._workers
+
+    def submit(self, review_id, files):
+        """
+        Queues ``files`` (a list of (name, bytes) pairs) for upload once the
+        current transaction commits, so workers always see the Review row.
+        """
+        if not files:
+            return
+        transaction.on_commit(lambda: self._start(review_id, files))
+
+    def drain(self, timeout=None):
+        """Blocks until every submitted batch has been finalized. Returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _start(self, review_id, files):
+        batch = _Batch(review_id, len(files))
+        with self._idle:
+            self._pending += 1
+        if self.workers <= 0:
+            for index, (name, content) in enumerate(files):
+                self._upload(batch, index, name, content)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='review-upload')
+        for index, (name, content) in enumerate(files):
+            self._executor.submit(self._upload, batch, index, name, content)
+
+    def _upload(self, batch, index, name, content):
+        try:
+            batch.results[index] = store_photo(self.storage, name, content)
+        except Exception:
+            logger.exception('Upload of %s for review %s failed', name, batch.review_id)
+        with batch.lock:
+            batch.remaining -= 1
+            last = batch.remaining == 0
+        if last:
+            self._finalize(batch)
+
+    def _finalize(self, batch):
+        from .models import Review, ReviewImage
+        try:
+            stored = [result for result in batch.results if result]
+            with transaction.atomic():
+                ReviewImage.objects.bulk_create([
+                    ReviewImage(review_id=batch.review_id, image=url, variants=variants)
+                    for url, variants in stored
+                ])
+                status = 'READY' if len(stored) == len(batch.results) else 'FAILED'
+                Review.objects.filter(pk=batch.review_id).update(image_status=status)
+            # bulk_create/update send no signals, so invalidate cached review pages here
+            bump_model_version(Review)
+            bump_model_version(ReviewImage)
+        except Exception:
+            logger.exception('Saving images for review %s failed', batch.review_id)
+        finally:
+            if self.workers > 0:
+                # Pool threads are long-lived; don't let them hold a DB connection.
+                connection.close()
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+
+pipeline = UploadPipeline()
+
+
+def fail_stale_uploads(older_than=None):
+    """
+    Marks reviews whose photos have been PENDING for longer than ``older_than``
+    (REVIEW_UPLOAD_TIMEOUT_MINUTES by default) as FAILED and returns how many.
+    """
+    from .models import Review
+    if older_than is None:
+        older_than = timedelta(minutes=settings.REVIEW_UPLOAD_TIMEOUT_MINUTES)
+    cutoff = timezone.now() - older_than
+    failed = Review.objects.filter(image_status='PENDING', created_at__lt=cutoff).update(image_status='FAILED')
+    if failed:
+        bump_model_version(Review)
+        logger.warning('Marked %d review(s) with photos pending since before %s as FAILED', failed, cutoff)
+    return failed
@@ -1,27 +1,48 @@
-import cloudinary.uploader
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from dental_backend.caching import CachedResponseMixin
 from .models import Review, ReviewImage
 from .serializers import ReviewSerializer
+from .stats import get_stats
+from .uploads import pipeline
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    # list/retrieve (approved reviews) are public and cached
+    cache_models = (Review, ReviewImage)
 
     def get_queryset(self):
         if self.action in ['list', 'retrieve']:
-            return Review.objects.filter(is_approved=True).order_by('-created_at')
+            return Review.objects.filter(is_approved=True).prefetch_related('images').order_by('-created_at')
         return Review.objects.all().order_by('-created_at')
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'stats']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
     def perform_create(self, serializer):
         user = self.request.user
         name_to_save = user.get_full_name() or user.username
-        review = serializer.save(user=user, patient_name=name_to_save, is_approved=False)
+        # Read the photos now; the uploaded temp files don't outlive the request
+        files = [(f.name, f.read()) for f in self.request.FILES.getlist('images')]
+        review = serializer.save(
+            user=user,
+            patient_name=name_to_save,
+            is_approved=False,
+            image_status='PENDING' if files else 'READY',
+        )
+        # Uploads run on the background pipeline; ReviewImage rows appear when they finish
+        pipeline.submit(review.pk, files)
 
-        for img_file in self.request.FILES.getlist('images'):
-            result = cloudinary.uploader.upload(img_file, folder='reviews')
-            ReviewImage.objects.create(review=review, image=result['secure_url'])
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Overall rating of approved reviews, read from the ReviewStats row in one query."""
+        stats = get_stats()
+        return Response({
+            'count': stats.count,
+            'average': stats.average,
+            'histogram': stats.histogram,
+        })
@@ -0,0 +1,120 @@
+"""
+Database-specific full-text queries over SearchDocument.
+
+PostgreSQL: the generated `search_vector` column (title weighted A, body B)
+with a GIN index, ranked by ts_rank and highlighted with ts_headline.
+SQLite: the FTS5 table `search_searchdocument_fts` (porter stemming),
+ranked by bm25 and highlighted with snippet().
+Other databases fall back to an unranked icontains scan.
+
+Highlights are returned as HTML: the document text is escaped and only the
+<mark> tags around matched terms are added, so snippets are safe to render.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+
+from .models import SearchDocument
+
+# Control characters used as highlight markers inside the database, replaced
+# by <mark> tags after the surrounding text has been HTML-escaped.
+START, STOP = '\x02', '\x03'
+SNIPPET_WORDS = 24
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _highlight(snippet):
+    return escape(snippet or '').replace(START, '<mark>').replace(STOP, '</mark>')
+
+
+def _rows(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _kind_clause(kinds, column):
+    if not kinds:
+        return '', []
+    return f" AND {column} IN ({', '.join(['%s'] * len(kinds))})", list(kinds)
+
+
+class PostgresSearchBackend:
+
+    def search(self, query, kinds=(), limit=20):
+        kind_sql, kind_params = _kind_clause(kinds, 'd.kind')
+        # Rank and limit first, then build headlines only for the returned rows
+        sql = f"""
+            SELECT hits.id, hits.kind, hits.object_id, hits.title, hits.url, hits.rank,
+                   ts_headline('english', hits.body, hits.q, %s) AS snippet
+            FROM (
+                SELECT d.id, d.kind, d.object_id, d.title, d.url, d.body, q,
+                       ts_rank(d.search_vector, q) AS rank
+                FROM search_searchdocument d, websearch_to_tsquery('english', %s) q
+                WHERE d.search_vector @@ q{kind_sql}
+                ORDER BY rank DESC
+                LIMIT %s
+            ) hits
+            ORDER BY hits.rank DESC
+        """
+        options = f'StartSel={START}, StopSel={STOP}, MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=1'
+        rows = _rows(sql, [options, query, *kind_params, limit])
+        for row in rows:
+            row['snippet'] = _highlight(row['snippet'])
+        return rows
+
+
+class SqliteSearchBackend:
+
+    def search(self, query, kinds=(), limit=20):
+        tokens = _TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+        # Quote every term so user input can't inject FTS5 syntax; terms are ANDed.
+        # The last term is a prefix so results appear while the user is still typing.
+        match = ' '.join(f'"{token}"' for token in tokens) + '*'
+        kind_sql, kind_params = _kind_clause(kinds, 'd.kind')
+        sql = f"""
+            SELECT d.id, d.kind, d.object_id, d.title, d.url,
+                   -bm25(search_searchdocument_fts, 10.0, 1.0) AS rank,
+                   snippet(search_searchdocument_fts, 1, %s, %s, '…', {SNIPPET_WORDS}) AS snippet
+            FROM search_searchdocument_fts
+            JOIN search_searchdocument d ON d.id = search_searchdocument_fts.rowid
+            WHERE search_searchdocument_fts MATCH %s{kind_sql}
+            ORDER BY bm25(search_searchdocument_fts, 10.0, 1.0)
+            LIMIT %s
+        """
+        rows = _rows(sql, [START, STOP, match, *kind_params, limit])
+        for row in rows:
+            row['snippet'] = _highlight(row['snippet'])
+        return rows
+
+
+class BasicSearchBackend:
+
+    def search(self, query, kinds=(), limit=20):
+        documents = SearchDocument.objects.filter(body__icontains=query) | \
+            SearchDocument.objects.filter(title__icontains=query)
+        if kinds:
+            documents = documents.filter(kind__in=kinds)
+        return [
+            {'id': d.id, 'kind': d.kind, 'object_id': d.object_id, 'title': d.title, 'url': d.url,
+             'rank': 0.0, 'snippet': escape(d.body[:200])}
+            for d in documents[:limit]
+        ]
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SqliteSearchBackend()
+    return BasicSearchBackend()
+
+
+def search(query, kinds=(), limit=20):
+    """Ranked matches as dicts with kind, object_id, title, url, rank and an HTML snippet."""
+    return get_backend().search(query, kinds=kinds, limit=limit)
@@ -0,0 +1,88 @@
+"""
+Builds SearchDocument rows from the content models.
+
+Each source is described by a function returning the document fields for an
+instance, or None when the instance should not be searchable (e.g. a review
+that is not approved). The same functions are used by the incremental
+signal handlers, the rebuild_search_index command and the initial migration.
+"""
+from django.apps import apps as global_apps
+
+
+def blog_document(post):
+    return {
+        'title': post.title,
+        'body': f"{post.excerpt}\n{post.content}".strip(),
+        'url': f'/api/blog/posts/{post.slug}/',
+    }
+
+
+def faq_document(item):
+    return {
+        'title': item.question,
+        'body': item.answer,
+        'url': f'/api/faq/categories/{item.category_id}/',
+    }
+
+
+def review_document(review):
+    if not review.is_approved:
+        return None
+    return {
+        'title': review.patient_name or 'Patient review',
+        'body': review.review_text,
+        'url': f'/api/reviews/{review.pk}/',
+    }
+
+
+# kind -> (model label, document builder)
+SOURCES = {
+    'blog': ('blog.BlogPost', blog_document),
+    'faq': ('faq.FaqItem', faq_document),
+    'review': ('reviews.Review', review_document),
+}
+
+
+def kind_for_model(model):
+    label = model._meta.label
+    for kind, (source_label, _) in SOURCES.items():
+        if source_label == label:
+            return kind
+    return None
+
+
+def index_instance(kind, instance, apps=global_apps):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    fields = SOURCES[kind][1](instance)
+    if fields is None:
+        SearchDocument.objects.filter(kind=kind, object_id=instance.pk).delete()
+        return
+    fields['title'] = fields['title'][:255]
+    SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=fields)
+
+
+def remove_instance(kind, object_id, apps=global_apps):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild(apps=global_apps, batch_size=1000):
+    """Re-creates every document from scratch. Returns {kind: count}."""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    SearchDocument.objects.all().delete()
+    counts = {}
+    for kind, (label, build) in SOURCES.items():
+        batch, counts[kind] = [], 0
+        for instance in apps.get_model(label).objects.order_by('pk').iterator(chunk_size=batch_size):
+            fields = build(instance)
+            if fields is None:
+                continue
+            fields['title'] = fields['title'][:255]
+            batch.append(SearchDocument(kind=kind, object_id=instance.pk, **fields))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                counts[kind] += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        counts[kind] += len(batch)
+    return counts
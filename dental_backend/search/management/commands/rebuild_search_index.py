@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from search.indexing import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index from blog posts, FAQ items and approved reviews."
+
+    def handle(self, *args, **options):
+        counts = rebuild()
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {summary}.'))
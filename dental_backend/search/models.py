@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable row per blog post, FAQ item or approved review.
+
+    The full-text index itself is database specific and is created by the
+    migrations: an FTS5 table kept in sync by triggers on SQLite, and a
+    generated `search_vector` tsvector column with a GIN index on PostgreSQL.
+    Neither is visible to the ORM; see search/backends.py.
+    """
+    KIND_CHOICES = [
+        ('blog', 'Blog post'),
+        ('faq', 'FAQ item'),
+        ('review', 'Review'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=300)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique_source'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
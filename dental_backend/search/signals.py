@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .indexing import SOURCES, index_instance, kind_for_model, remove_instance
+
+
+def update_document(sender, instance, raw=False, **kwargs):
+    """Re-indexes one blog post, FAQ item or review after it is saved."""
+    if raw:
+        return
+    index_instance(kind_for_model(sender), instance)
+
+
+def delete_document(sender, instance, **kwargs):
+    remove_instance(kind_for_model(sender), instance.pk)
+
+
+for _label, _ in SOURCES.values():
+    _model = apps.get_model(_label)
+    post_save.connect(update_document, sender=_model, dispatch_uid=f'search-index-{_label}')
+    post_delete.connect(delete_document, sender=_model, dispatch_uid=f'search-unindex-{_label}')
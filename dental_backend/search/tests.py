@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from blog.models import BlogPost
+from faq.models import FaqCategory, FaqItem
+from reviews.models import Review
+
+from .models import SearchDocument
+
+
+class SearchTests(TestCase):
+    url = '/api/search/'
+
+    def setUp(self):
+        BlogPost.objects.create(
+            title='What to expect from a root canal', slug='root-canal', category='Endodontics',
+            excerpt='A step-by-step guide.', content='Root canals save infected teeth. <b>Painless</b> today.',
+        )
+        category = FaqCategory.objects.create(name='Treatments')
+        self.faq = FaqItem.objects.create(
+            category=category, question='Does a root canal hurt?', answer='Modern anaesthesia keeps it comfortable.',
+        )
+        self.review = Review.objects.create(review_text='My root canal was quick.', rating=5)
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_ranked_results_with_escaped_highlights(self):
+        results = self.search(q='root canal')
+        self.assertEqual({r['type'] for r in results}, {'blog', 'faq'})
+        blog = next(r for r in results if r['type'] == 'blog')
+        self.assertIn('<mark>Root</mark>', blog['snippet'])
+        self.assertIn('&lt;b&gt;', blog['snippet'])
+        self.assertEqual(blog['url'], '/api/blog/posts/root-canal/')
+        self.assertEqual(results, sorted(results, key=lambda r: -r['rank']))
+
+    def test_stemming_and_type_filter(self):
+        results = self.search(q='canals', type='faq')
+        self.assertEqual([r['id'] for r in results], [self.faq.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.review.is_approved = True
+        self.review.save()
+        self.assertEqual([r['id'] for r in self.search(q='quick')], [self.review.pk])
+
+        self.review.is_approved = False
+        self.review.save()
+        self.assertEqual(self.search(q='quick'), [])
+
+        self.faq.answer = 'Numbing gel first.'
+        self.faq.save()
+        self.assertEqual(self.search(q='numbing')[0]['id'], self.faq.pk)
+        self.faq.delete()
+        self.assertEqual(self.search(q='numbing'), [])
+        self.assertFalse(SearchDocument.objects.filter(kind='faq').exists())
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search(q='root" OR "x'), [])
+        self.assertEqual(self.client.get(self.url, {'q': 'r'}).status_code, 400)
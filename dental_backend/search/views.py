@@ -0,0 +1,44 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .backends import search
+from .models import SearchDocument
+
+
+class SearchView(APIView):
+    """
+    Public full-text search over blog posts, FAQ items and approved reviews.
+    GET /api/search/?q=root canal[&type=blog,faq,review][&limit=20]
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            raise ValidationError({'q': 'Enter at least 2 characters.'})
+
+        kinds = [k for k in request.query_params.get('type', '').split(',') if k]
+        valid = {kind for kind, _ in SearchDocument.KIND_CHOICES}
+        if set(kinds) - valid:
+            raise ValidationError({'type': f"Choose from: {', '.join(sorted(valid))}"})
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+
+        results = [
+            {
+                'type': row['kind'],
+                'id': row['object_id'],
+                'title': row['title'],
+                'url': row['url'],
+                'snippet': row['snippet'],
+                'rank': round(float(row['rank']), 4),
+            }
+            for row in search(query, kinds=kinds, limit=limit)
+        ]
+        return Response({'query': query, 'results': results})
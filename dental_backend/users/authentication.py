@@ -0,0 +1,172 @@
+"""
+JWT authentication with a cached user lookup, and a refresh-token class with
+an in-memory front for the blacklist.
+
+simplejwt's JWTAuthentication loads the User row on every request, and
+views that need ``request.user.patient_profile`` then load the profile as
+well. CachedJWTAuthentication keeps the user's fields and its profile's in
+the default cache for ACCESS_TOKEN_LIFETIME. The password hash is not
+cached: the rebuilt user has it deferred, so reading it or saving the user
+goes to the database.
+
+Saving or deleting the User or its Patient drops the entry (see
+users/signals.py), so deactivation and password changes made through the
+ORM still apply to the next request. The last_login-only save on every
+login doesn't drop it. Changes that send no signals (QuerySet.update(),
+raw SQL) are only seen once the entry expires, up to ACCESS_TOKEN_LIFETIME
+later. The cached profile is for reads: code that saves it should reload
+the row first.
+
+As with dental_backend/caching.py, the local-memory cache is per process,
+so an invalidation only reaches other gunicorn workers when CACHE_BACKEND
+is file or redis.
+"""
+import threading
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from dental_backend.metrics import counters
+
+IDENTITY_KEY = 'auth-identity:{}'
+BLACKLIST_MEMORY = 10_000
+
+
+def load_identity(user_id):
+    """The user (with ``patient_profile`` loaded) for ``user_id``, from the cache when possible."""
+    key = IDENTITY_KEY.format(user_id)
+    entry = cache.get(key)
+    counters.inc('cache_requests_total', cache='identity', result='miss' if entry is None else 'hit')
+    if entry is not None:
+        return _rebuild_identity(entry)
+    # select_related also records a missing profile (staff), so that costs no query later either
+    User = get_user_model()
+    user = User.objects.select_related('patient_profile').get(**{api_settings.USER_ID_FIELD: user_id})
+    user.password_digest = get_md5_hash_password(user.password)
+    cache.set(key, _identity_entry(user), timeout=api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    return user
+
+
+def _field_values(instance, exclude=()):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields if field.attname not in exclude
+    }
+
+
+def _identity_entry(user):
+    # (user fields without the password hash, profile fields or None, digest for CHECK_REVOKE_TOKEN)
+    patient = getattr(user, 'patient_profile', None)
+    return (
+        _field_values(user, exclude={'password'}),
+        None if patient is None else _field_values(patient),
+        user.password_digest,
+    )
+
+
+def _rebuild_identity(entry):
+    user_values, patient_values, password_digest = entry
+    User = get_user_model()
+    user = User.from_db(router.db_for_read(User), list(user_values), list(user_values.values()))
+    user.password_digest = password_digest
+    related = User.patient_profile.related
+    if patient_values is None:
+        # Remember that there is no profile, as select_related would have
+        related.set_cached_value(user, None)
+    else:
+        Patient = related.related_model
+        user.patient_profile = Patient.from_db(
+            router.db_for_read(Patient), list(patient_values), list(patient_values.values()),
+        )
+    return user
+
+
+def forget_identity(user_id):
+    # Now, and again once committed: a request that re-cached the old row
+    # between the save and the commit would otherwise win
+    key = IDENTITY_KEY.format(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves request.user from the identity cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = load_identity(user_id)
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.password_digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class _RecentSet:
+    """A thread-safe set that forgets its oldest members past ``size``."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, item):
+        with self._lock:
+            if item in self._items:
+                self._items.move_to_end(item)
+                return True
+            return False
+
+    def add(self, item):
+        with self._lock:
+            self._items[item] = None
+            self._items.move_to_end(item)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+# jtis this process has seen blacklisted. Only positive answers are kept:
+# a blacklisting is permanent, but a token that wasn't blacklisted a moment
+# ago may have been since, by another worker.
+blacklisted_jtis = _RecentSet(BLACKLIST_MEMORY)
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jti in blacklisted_jtis:
+            raise TokenError(_("Token is blacklisted"))
+        try:
+            super().check_blacklist()
+        except TokenError:
+            blacklisted_jtis.add(jti)
+            raise
+
+    def blacklist(self):
+        entry = super().blacklist()
+        blacklisted_jtis.add(self.payload[api_settings.JTI_CLAIM])
+        return entry
+
+
+class CachedBlacklistRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedBlacklistRefreshToken
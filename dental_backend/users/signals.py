@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from patients.models import Patient
+from .authentication import forget_identity
+
+
+@receiver(post_save, sender=User)
+def forget_saved_user(sender, instance, update_fields=None, **kwargs):
+    """Drops the cached identity, except for the last_login-only save on login."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    forget_identity(instance.pk)
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_identity(instance.pk)
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+def forget_patient_owner(sender, instance, **kwargs):
+    forget_identity(instance.user_id)
@@ -1,3 +1,129 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from patients.models import Patient
+from patients.profiles import ensure_patient_profiles
+
+from .authentication import IDENTITY_KEY, blacklisted_jtis, load_identity
+
+
+class ProfileSignalQueryTests(TestCase):
+    """Saving a User should only touch its Patient profile when is_staff changes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('anna', 'anna@example.com', 'correct-horse', first_name='Anna')
+
+    def test_login_writes_only_last_login(self):
+        with self.assertNumQueries(1):
+            user_logged_in.send(sender=User, request=None, user=self.user)
+        # The user, and the refresh token recorded for the blacklist
+        with self.assertNumQueries(2):
+            response = self.client.post('/api/token/', {'username': 'anna', 'password': 'correct-horse'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_registration_creates_and_indexes_profile(self):
+        with self.assertNumQueries(8):
+            response = self.client.post('/api/users/register/', {
+                'username': 'jan', 'password': 'correct-horse', 'email': 'jan@example.com', 'last_name': 'Nowak',
+            })
+        self.assertEqual(response.status_code, 201)
+        patient = Patient.objects.get(user__username='jan')
+        self.assertIn('nowak', patient.search_text)
+
+    def test_profile_follows_staff_flag(self):
+        profile = self.user.patient_profile
+        # A full save that changes nothing searchable: just the UPDATE (the profile was loaded above)
+        with self.assertNumQueries(1):
+            self.user.save()
+
+        self.user.is_staff = True
+        # UPDATE, then the cascade collector's SELECTs and the DELETEs
+        with self.assertNumQueries(6):
+            self.user.save()
+        self.assertFalse(Patient.objects.filter(pk=profile.pk).exists())
+        # Later saves of a staff account don't issue a DELETE each time
+        with self.assertNumQueries(1):
+            self.user.save()
+        staff = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            staff.save()
+
+        staff.is_staff = False
+        staff.save()
+        self.assertTrue(Patient.objects.filter(user=staff).exists())
+
+    def test_bulk_created_users_get_profiles(self):
+        users = User.objects.bulk_create([User(username=f'paper{i}', password='!') for i in range(3)]
+                                         + [User(username='nurse', is_staff=True, password='!')])
+        with self.assertNumQueries(4):
+            created = ensure_patient_profiles(users)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(ensure_patient_profiles(users + [self.user]), [])
+        self.assertFalse(Patient.objects.filter(user__username='nurse').exists())
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('anna', 'anna@example.com', 'correct-horse')
+        self.tokens = self.client.post('/api/token/', {'username': 'anna', 'password': 'correct-horse'}).json()
+        self.auth = {'HTTP_AUTHORIZATION': f"Bearer {self.tokens['access']}"}
+
+    def test_identity_is_cached_until_the_user_changes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/users/me/', **self.auth).status_code, 200)
+        # User and profile both come from the cache: only history and appointments are read
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/api/patients/me/', **self.auth).json()['user']['username'], 'anna')
+
+        self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.client.get('/api/users/me/', **self.auth)
+
+        self.user.first_name = 'Ann'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/users/me/', **self.auth).json()['first_name'], 'Ann')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/', **self.auth).status_code, 401)
+
+    def test_profile_change_invalidates(self):
+        self.client.get('/api/patients/me/', **self.auth)
+        patient = Patient.objects.get(user=self.user)
+        patient.phone = '555-0199'
+        patient.save()
+        self.assertEqual(self.client.get('/api/patients/me/', **self.auth).json()['phone'], '555-0199')
+
+    def test_cache_holds_no_password_hash(self):
+        self.client.get('/api/users/me/', **self.auth)
+        self.assertNotIn(self.user.password, repr(cache.get(IDENTITY_KEY.format(self.user.pk))))
+
+        # Saving a user rebuilt from the cache keeps its password, which was never loaded
+        cached = load_identity(self.user.pk)
+        cached.first_name = 'Ann'
+        cached.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('correct-horse'))
+
+    def test_profile_update_writes_to_the_current_row(self):
+        self.client.get('/api/patients/me/', **self.auth)
+        # A change the cached profile hasn't seen (QuerySet.update() sends no signals)
+        Patient.objects.filter(user=self.user).update(date_of_birth=date(1990, 1, 2))
+        response = self.client.patch('/api/patients/me/', {'phone': '555-0100'},
+                                     content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        patient = Patient.objects.get(user=self.user)
+        self.assertEqual((patient.phone, patient.date_of_birth), ('555-0100', date(1990, 1, 2)))
 
-# Create your tests here.
+    def test_rotated_refresh_token_is_rejected_from_memory(self):
+        refresh = {'refresh': self.tokens['refresh']}
+        self.assertEqual(self.client.post('/api/token/refresh/', refresh).status_code, 200)
+        self.assertIn(RefreshToken(self.tokens['refresh'], verify=False)['jti'], blacklisted_jtis)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post('/api/token/refresh/', refresh).status_code, 401)